@@ -0,0 +1,149 @@
+# Near-duplicate detection on synthetic names, without a database or server:
+# builds N catalog-like names, a share of them near-duplicate variants of
+# another (case and spacing, typos, swapped words, abbreviations), runs
+# src.utils.dedupe.find_duplicates and reports time, candidate volume and
+# pair-level precision/recall against the known groups.
+#
+#   python -m benchmarks.dedupe_benchmark --rows 1000000
+#
+# Needs numpy (it comes with pandas).
+import argparse
+import json
+import random
+import string
+import time
+from collections import Counter
+from src.utils.dedupe import find_duplicates
+
+SYLLABLES = [consonant + vowel for consonant in "bcdfghklmnprstvz" for vowel in "aeiou"]
+WORDS_PER_NAME = (1, 2, 3)
+
+
+def _word(rng: random.Random) -> str:
+    return "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(3, 5))).upper()
+
+
+def _abbreviation(name: str) -> str:
+    # First letter plus the next consonants of each word, numbers kept: "BRG 6205"
+    parts = []
+    for word in name.split():
+        parts.append(word if word.isdigit() else (word[0] + "".join(char for char in word[1:] if char not in "AEIOU"))[:4])
+    return " ".join(parts)
+
+
+def _typo(rng: random.Random, name: str) -> str:
+    letters = [position for position, char in enumerate(name) if char.isalpha()]
+    position = rng.choice(letters)
+    kind = rng.randrange(3)
+    if kind == 0 and position + 1 < len(name) and name[position + 1].isalpha():
+        return name[:position] + name[position + 1] + name[position] + name[position + 2:]
+    if kind == 1:
+        return name[:position] + rng.choice(string.ascii_uppercase) + name[position + 1:]
+    return name[:position] + name[position + 1:]
+
+
+def _variant(rng: random.Random, name: str, abbreviation: str):
+    # Returns (name, abbreviation, kind) for a near-duplicate of name
+    kind = rng.choice(["case", "typo", "order", "abbreviation"])
+    words = name.split()
+    if kind == "order" and len(words) > 1:
+        return " ".join(reversed(words)), "", kind
+    if kind == "abbreviation" and abbreviation:
+        return abbreviation, "", kind
+    if kind == "typo" and len(name) >= 5:
+        return _typo(rng, name), "", kind
+    return f"  {name.title()} ", "", "case"
+
+
+def synthetic(rows: int, duplicate_share: float, seed: int):
+    rng = random.Random(seed)
+    vocabulary = sorted({_word(rng) for _ in range(max(1000, rows // 20))})
+    names, abbreviations, groups, kinds = [], [], [], []
+    # Originals are distinct, as are their abbreviations (blank on a clash), so
+    # every same-group pair is a true duplicate and every other pair is not
+    used_names, used_abbreviations = set(), set()
+    group = 0
+    while len(names) < rows:
+        name = " ".join(rng.choice(vocabulary) for _ in range(rng.choice(WORDS_PER_NAME)))
+        if rng.random() < 0.3:
+            name += f" {rng.randint(1, 500)}"
+        key = " ".join(sorted(name.split()))
+        if key in used_names:
+            continue
+        used_names.add(key)
+        abbreviation = _abbreviation(name)
+        if abbreviation in used_abbreviations:
+            abbreviation = ""
+        used_abbreviations.add(abbreviation)
+        names.append(name)
+        abbreviations.append(abbreviation)
+        groups.append(group)
+        kinds.append("original")
+        if rng.random() < duplicate_share:
+            for _ in range(rng.randint(1, 2)):
+                variant, variant_abbreviation, kind = _variant(rng, name, abbreviation)
+                names.append(variant)
+                abbreviations.append(variant_abbreviation)
+                groups.append(group)
+                kinds.append(kind)
+        group += 1
+    return names[:rows], abbreviations[:rows], groups[:rows], kinds[:rows]
+
+
+def evaluate(result: dict, groups, kinds) -> dict:
+    # Pair-level scores over cluster co-membership: a duplicate counts as found
+    # when both rows land in the same cluster, even if linked through a third
+    truth_pairs = sum(size * (size - 1) // 2 for size in Counter(groups).values())
+    clustered = correct = 0
+    cluster_of = {}
+    for number, cluster in enumerate(result["clusters"]):
+        members = cluster["members"]
+        clustered += len(members) * (len(members) - 1) // 2
+        correct += sum(size * (size - 1) // 2 for size in Counter(groups[row] for row in members).values())
+        for row in members:
+            cluster_of[row] = number
+    missed = Counter()
+    by_group = {}
+    for row, group in enumerate(groups):
+        by_group.setdefault(group, []).append(row)
+    for rows in by_group.values():
+        for row in rows[1:]:
+            if row not in cluster_of or cluster_of[row] != cluster_of.get(rows[0]):
+                missed[kinds[row]] += 1
+    return {
+        "true_pairs": truth_pairs,
+        "clustered_pairs": clustered,
+        "precision": round(correct / clustered, 4) if clustered else None,
+        "recall": round(correct / truth_pairs, 4) if truth_pairs else None,
+        # Variants not clustered with their original, by how they were made
+        "missed_variants": dict(missed),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--duplicate-share", type=float, default=0.1, help="share of names that get near-duplicate variants")
+    parser.add_argument("--threshold", type=float, default=0.6)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    names, abbreviations, groups, kinds = synthetic(args.rows, args.duplicate_share, args.seed)
+    generated = time.perf_counter()
+    result = find_duplicates(names, abbreviations, args.threshold)
+    finished = time.perf_counter()
+
+    report = {
+        "rows": args.rows,
+        "generate_seconds": round(generated - started, 2),
+        "dedupe_seconds": round(finished - generated, 2),
+        "rows_per_second": round(args.rows / (finished - generated)),
+        **result["stats"],
+        **evaluate(result, groups, kinds),
+    }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+# Throughput of a typical list query with SQL echo off versus on.
+#
+#   DATABASE_URL=postgresql+asyncpg://... python -m benchmarks.echo_benchmark --queries 5000
+#
+# Both runs use the same pool settings; only `echo` differs. Echo output is
+# really written, as it would be in production: to --echo-log (default
+# echo_benchmark.log) through a FileHandler, or with --echo-log - to
+# SQLAlchemy's own default StreamHandler on stdout (redirect it to a file so
+# terminal speed does not skew the numbers; the results go to stderr then).
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+import time
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+from src.db import settings
+
+QUERY = text("SELECT noun_id, noun, abbreviation, description, isactive FROM noun_mstr ORDER BY noun_id LIMIT 100")
+
+
+async def run(echo: bool, queries: int, concurrency: int, echo_log: str) -> dict:
+    logger = logging.getLogger("sqlalchemy.engine.Engine")
+    handler = None
+    if echo and echo_log != "-":
+        # Installed before the engine, so SQLAlchemy does not add its stdout handler
+        handler = logging.FileHandler(echo_log, mode="w")
+        handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s %(message)s"))
+        logger.addHandler(handler)
+    engine = create_async_engine(settings.DATABASE_URL, echo=echo, pool_size=concurrency, max_overflow=0)
+
+    async def worker(count: int):
+        async with engine.connect() as conn:
+            for _ in range(count):
+                (await conn.execute(QUERY)).fetchall()
+
+    # Warm the pool and the statement cache before timing
+    await asyncio.gather(*(worker(5) for _ in range(concurrency)))
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(queries // concurrency) for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    await engine.dispose()
+    result = {"echo": echo, "queries": queries, "seconds": round(elapsed, 3), "queries_per_second": round(queries / elapsed, 1)}
+    if handler is not None:
+        logger.removeHandler(handler)
+        handler.close()
+        result["echo_log_bytes"] = os.path.getsize(echo_log)
+    return result
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--queries", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--echo-log", default="echo_benchmark.log", help="file the echo run logs to, or - for stdout")
+    args = parser.parse_args()
+    results = [await run(echo, args.queries, args.concurrency, args.echo_log) for echo in (False, True)]
+    print(json.dumps(results, indent=2), file=sys.stderr if args.echo_log == "-" else sys.stdout)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
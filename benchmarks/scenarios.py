@@ -0,0 +1,121 @@
+# Weighted request mixes. Each scenario is a list of (weight, label, builder);
+# a builder takes the shared run state and returns the request to send.
+import io
+import random
+import uuid
+from openpyxl import Workbook
+
+
+def _upload_sheet(rows: int = 500) -> bytes:
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet("Modifier")
+    sheet.append(["modifier", "abbreviation", "description"])
+    for n in range(rows):
+        sheet.append([f"UPLOAD MODIFIER {n}", f"UM{n}", "Benchmark upload"])
+    output = io.BytesIO()
+    workbook.save(output)
+    return output.getvalue()
+
+
+class RunState:
+    def __init__(self, sizes: dict):
+        self.sizes = sizes
+        self.created_nouns = []
+        self.upload_sheet = _upload_sheet()
+
+    def seeded_id(self, prefix: str, size_key: str) -> str:
+        return f"{prefix}_{random.randint(1, self.sizes[size_key]):04d}"
+
+
+def list_nouns(state):
+    return "GET", "/Noun/", {"params": {"limit": 100}}
+
+
+def list_modifiers(state):
+    return "GET", "/Modifier/Modifier", {"params": {"limit": 100}}
+
+
+def list_nounmodifiers(state):
+    return "GET", "/NounModifier/NounModifier", {"params": {"limit": 100}}
+
+
+def list_attributes(state):
+    return "GET", "/Attributename/Attribute", {"params": {"limit": 100}}
+
+
+def list_attribute_values(state):
+    after = state.seeded_id("ATRV", "attribute_values")
+    return "GET", "/Attributevalue/attribute_values", {"params": {"limit": 100, "after": after}}
+
+
+def list_manufacturers(state):
+    return "GET", "/Manufacure/manufacturers", {"params": {"limit": 100}}
+
+
+def create_noun(state):
+    name = f"BENCH NOUN {uuid.uuid4().hex[:12]}"
+    return "POST", "/Noun/Noun", {"json": {"noun": name, "abbreviation": name[:8], "description": "bench", "isactive": True}}
+
+
+def create_attribute_value(state):
+    value = f"BENCH VALUE {uuid.uuid4().hex[:12]}"
+    return "POST", "/Attributevalue/attribute_value", {"json": {
+        "attribute_value": value, "attribute_value_desc": "bench", "remarks": "", "isactive": True,
+        "nounmodifier_id": state.seeded_id("NM", "nounmodifiers"), "attribute_value_abbr": value[:8],
+    }}
+
+
+def update_noun(state):
+    noun_id = state.seeded_id("N", "nouns")
+    return "PUT", f"/Noun/Noun/{noun_id}", {"json": {
+        "noun": f"NOUN {noun_id}", "abbreviation": noun_id, "description": "bench update", "isactive": True,
+    }}
+
+
+def delete_noun(state):
+    # Only deletes nouns this run created, so the seeded catalog keeps its size
+    if not state.created_nouns:
+        return create_noun(state)
+    return "DELETE", f"/Noun/Noun/{state.created_nouns.pop()}", {}
+
+
+def upload_excel(state):
+    files = {"file": ("modifiers.xlsx", state.upload_sheet, "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")}
+    return "POST", "/Modifier/upload-excel", {"files": files}
+
+
+def export_excel(state):
+    return "GET", "/Modifier/export-excel", {"params": {"format": "xlsx"}}
+
+
+def export_csv(state):
+    return "GET", "/Modifier/export-excel", {"params": {"format": "csv"}}
+
+
+READS = [
+    (10, "list nouns", list_nouns),
+    (10, "list modifiers", list_modifiers),
+    (10, "list nounmodifiers", list_nounmodifiers),
+    (10, "list attributes", list_attributes),
+    (10, "list attribute values", list_attribute_values),
+    (10, "list manufacturers", list_manufacturers),
+]
+
+WRITES = [
+    (10, "create noun", create_noun),
+    (10, "create attribute value", create_attribute_value),
+    (10, "update noun", update_noun),
+    (5, "delete noun", delete_noun),
+    (1, "upload excel", upload_excel),
+]
+
+EXPORTS = [
+    (1, "export excel", export_excel),
+    (1, "export csv", export_csv),
+]
+
+SCENARIOS = {
+    "read": READS,
+    "write": WRITES,
+    "mixed": READS + WRITES + EXPORTS,
+}
@@ -0,0 +1,60 @@
+# Seeds the six master tables with synthetic rows of configurable size.
+# Destructive: every table is truncated first, so point it at a bench database.
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+TABLES = [
+    ("noun_mstr", "noun_id"),
+    ("modifier_mstr", "modifier_id"),
+    ("nounmodifier_combined", "nounmodifier_id"),
+    ("attribute_master", "attribute_id"),
+    ("attribute_value_master", "attribute_value_id"),
+    ("manufacturer_master", "manufacturid"),
+]
+
+PRESETS = {
+    "small": {"nouns": 500, "modifiers": 500, "nounmodifiers": 1_000, "attributes": 5_000, "attribute_values": 20_000, "manufacturers": 1_000},
+    "medium": {"nouns": 5_000, "modifiers": 5_000, "nounmodifiers": 10_000, "attributes": 50_000, "attribute_values": 200_000, "manufacturers": 10_000},
+    "large": {"nouns": 20_000, "modifiers": 20_000, "nounmodifiers": 50_000, "attributes": 250_000, "attribute_values": 1_000_000, "manufacturers": 50_000},
+}
+
+
+def _id(prefix: str, column: str = "n") -> str:
+    return f"'{prefix}_' || lpad({column}::text, 4, '0')"
+
+
+SEED_STATEMENTS = [
+    f"""INSERT INTO noun_mstr (noun_id, noun, abbreviation, description, isactive)
+        SELECT {_id('N')}, 'NOUN ' || n, 'N' || n, 'Benchmark noun ' || n, true
+        FROM generate_series(1, :nouns) AS n""",
+    f"""INSERT INTO modifier_mstr (modifier_id, modifier, abbreviation, description, isactive)
+        SELECT {_id('M')}, 'MODIFIER ' || n, 'M' || n, 'Benchmark modifier ' || n, true
+        FROM generate_series(1, :modifiers) AS n""",
+    f"""INSERT INTO nounmodifier_combined (nounmodifier_id, noun, modifier, abbreviation, description, isactive, noun_id, modifier_id)
+        SELECT {_id('NM')}, 'NOUN ' || (n % :nouns + 1), 'MODIFIER ' || (n % :modifiers + 1), 'NM' || n,
+               'Benchmark class ' || n, true, {_id('N', '(n % :nouns + 1)')}, {_id('M', '(n % :modifiers + 1)')}
+        FROM generate_series(1, :nounmodifiers) AS n""",
+    f"""INSERT INTO attribute_master (attribute_id, nounmodifier_id, attribute_name, abbreviation, description, isactive)
+        SELECT {_id('ATR')}, {_id('NM', '(n % :nounmodifiers + 1)')}, 'ATTRIBUTE ' || n, 'A' || n, 'Benchmark attribute ' || n, true
+        FROM generate_series(1, :attributes) AS n""",
+    f"""INSERT INTO attribute_value_master (attribute_value_id, attribute_value, attribute_value_desc, remarks, isactive, nounmodifier_id, attribute_value_abbr)
+        SELECT {_id('ATRV')}, 'VALUE ' || n, 'Benchmark value ' || n, '', true, {_id('NM', '(n % :nounmodifiers + 1)')}, 'V' || n
+        FROM generate_series(1, :attribute_values) AS n""",
+    f"""INSERT INTO manufacturer_master (manufacturid, manufacturname, manufacturdesc, remarks, isactive, nounmodifier_id)
+        SELECT {_id('MFR')}, 'MANUFACTURER ' || n, 'Benchmark manufacturer ' || n, '', true, {_id('NM', '(n % :nounmodifiers + 1)')}
+        FROM generate_series(1, :manufacturers) AS n""",
+]
+
+
+async def seed(database_url: str, sizes: dict):
+    engine = create_async_engine(database_url)
+    async with engine.begin() as conn:
+        await conn.execute(text(f"TRUNCATE {', '.join(table for table, _ in TABLES)}"))
+        # The id allocator re-creates its sequences past the seeded rows on first use
+        for table, id_column in TABLES:
+            await conn.execute(text(f"DROP SEQUENCE IF EXISTS {table}_{id_column}_seq"))
+        for statement in SEED_STATEMENTS:
+            await conn.execute(text(statement), sizes)
+        for table, _ in TABLES:
+            await conn.execute(text(f"ANALYZE {table}"))
+    await engine.dispose()
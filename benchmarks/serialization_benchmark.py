@@ -0,0 +1,76 @@
+# Serialization cost of one large attribute_value_master list page: per-row
+# Pydantic models + jsonable_encoder + json.dumps versus RowEncoder.
+#
+#   python -m benchmarks.serialization_benchmark --rows 100000 --repeat 5
+#
+# Rows are synthetic tuples shaped like LIST_COLUMNS, so no database is needed.
+# Both documents are decoded and compared before timing starts.
+import argparse
+import json
+import statistics
+import time
+from fastapi.encoders import jsonable_encoder
+from src.model.attributevalueschemas import Attribute_valueData, Attribute_valueResponse
+from src.utils import serialization
+from src.utils.serialization import RowEncoder
+
+LIST_COLUMNS = "attribute_value_id, attribute_value, attribute_value_desc, attribute_value_abbr, remarks, isactive, nounmodifier_id"
+
+
+def make_rows(count: int):
+    return [
+        (f"ATRV_{i:06d}", f"value {i}", f"description of value {i}", f"V{i}", f"remark {i % 97}", i % 3 != 0, f"NM_{i % 5000:04d}")
+        for i in range(count)
+    ]
+
+
+def model_path(rows, next_cursor) -> bytes:
+    data = [
+        Attribute_valueData(
+            attribute_value_id=row[0],
+            attribute_value=row[1],
+            attribute_value_desc=row[2],
+            attribute_value_abbr=row[3],
+            remarks=row[4],
+            isactive=row[5],
+            nounmodifier_id=row[6]
+        ) for row in rows
+    ]
+    payload = Attribute_valueResponse(message="success", data=data, next_cursor=next_cursor)
+    return json.dumps(jsonable_encoder(payload)).encode()
+
+
+def time_it(function, repeat: int) -> dict:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        body = function()
+        timings.append(time.perf_counter() - started)
+    return {"median_seconds": round(statistics.median(timings), 4), "best_seconds": round(min(timings), 4), "bytes": len(body)}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    rows = make_rows(args.rows)
+    next_cursor = rows[-1][0]
+    encoder = RowEncoder(Attribute_valueData, LIST_COLUMNS)
+
+    if json.loads(model_path(rows, next_cursor)) != json.loads(encoder.page(rows, next_cursor)):
+        raise SystemExit("RowEncoder output differs from the model path")
+
+    results = {
+        "rows": args.rows,
+        "encoder": "orjson" if serialization.orjson is not None else "json",
+        "model_path": time_it(lambda: model_path(rows, next_cursor), args.repeat),
+        "row_encoder": time_it(lambda: encoder.page(rows, next_cursor), args.repeat),
+    }
+    results["speedup"] = round(results["model_path"]["median_seconds"] / results["row_encoder"]["median_seconds"], 1)
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
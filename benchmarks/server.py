@@ -0,0 +1,36 @@
+# Runs main:app through serve.py, the production launcher, in a child process
+# for the duration of a benchmark
+import os
+import subprocess
+import sys
+import time
+import httpx
+
+
+class Server:
+    def __init__(self, database_url: str, host: str = "127.0.0.1", port: int = 8765, workers: int = 1, env: dict = None):
+        self.base_url = f"http://{host}:{port}"
+        self.command = [sys.executable, "serve.py"]
+        self.env = {
+            **os.environ, "DATABASE_URL": database_url, "HOST": host, "PORT": str(port), "WEB_CONCURRENCY": str(workers),
+            **(env or {}),
+        }
+        self.process = None
+
+    def __enter__(self):
+        self.process = subprocess.Popen(self.command, env=self.env)
+        deadline = time.monotonic() + 30
+        while time.monotonic() < deadline:
+            if self.process.poll() is not None:
+                raise RuntimeError(f"uvicorn exited with code {self.process.returncode}")
+            try:
+                httpx.get(f"{self.base_url}/docs", timeout=1)
+                return self
+            except httpx.HTTPError:
+                time.sleep(0.2)
+        self.process.terminate()
+        raise RuntimeError("uvicorn did not start within 30 seconds")
+
+    def __exit__(self, *exc):
+        self.process.terminate()
+        self.process.wait(timeout=30)
@@ -0,0 +1,61 @@
+# Cost of `import main` for a fresh worker: wall time and peak RSS.
+#
+#   python -m benchmarks.startup_benchmark --baseline <git-ref> --repeat 10
+#
+# Every sample is a new interpreter, so nothing is cached between runs. With
+# --baseline the same measurement is taken on that commit (checked out into a
+# temporary git worktree) for a before/after comparison. Also reports whether
+# pandas and openpyxl ended up loaded.
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import tempfile
+
+PROBE = """
+import json, resource, sys, time
+started = time.perf_counter()
+import main
+elapsed = time.perf_counter() - started
+print(json.dumps({
+    "seconds": elapsed,
+    "max_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    "pandas": "pandas" in sys.modules,
+    "openpyxl": "openpyxl" in sys.modules,
+}))
+"""
+
+
+def measure(directory: str, repeat: int) -> dict:
+    samples = []
+    for _ in range(repeat):
+        output = subprocess.check_output([sys.executable, "-c", PROBE], cwd=directory, text=True)
+        samples.append(json.loads(output.strip().splitlines()[-1]))
+    return {
+        "import_seconds_median": round(statistics.median(sample["seconds"] for sample in samples), 3),
+        "max_rss_mb_median": round(statistics.median(sample["max_rss_mb"] for sample in samples), 1),
+        "pandas_loaded": samples[-1]["pandas"],
+        "openpyxl_loaded": samples[-1]["openpyxl"],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--baseline", help="git ref to compare against, e.g. HEAD~1")
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    results = {"current": measure(".", args.repeat)}
+    if args.baseline:
+        with tempfile.TemporaryDirectory() as worktree:
+            subprocess.check_call(["git", "worktree", "add", "--detach", worktree, args.baseline], stdout=subprocess.DEVNULL)
+            try:
+                results[args.baseline] = measure(worktree, args.repeat)
+            finally:
+                subprocess.check_call(["git", "worktree", "remove", "--force", worktree])
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,6 @@
+import asyncio
 import uvicorn
-from fastapi import FastAPI
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
 from src.services.nounapi import app as noun_router
 from src.services.nounmodifierapi import app as nounmodifier_router
@@ -7,7 +8,18 @@ from src.services.modifierapi import app as modifier_router
 from src.services.attributenameapi import app as attributename_router
 from src.services.attributevalueapi import app as attributevalue_router
 from src.services.manufactureapi import app as manufacture_router
+from src.services.catalogapi import app as catalog_router
+from src.services.jobsapi import app as jobs_router
+from src.services.dedupeapi import app as dedupe_router
 from src.db.database import engine, Base
+from src.db.schema import ensure_schema
+from src.utils.cache import start_cache_listener, stop_cache_listener
+from src.utils.jobs import upload_jobs
+from src.utils.dedupejobs import dedupe_jobs
+from src.utils.changes import prune_change_log_periodically
+from src.db import settings
+from src.utils.executor import shutdown_executors
+from src.utils import metrics
 
 app = FastAPI()
 
@@ -19,6 +31,8 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+# Per-route latency and DB usage, exposed on /metrics
+app.add_middleware(metrics.MetricsMiddleware)
 
 # Include the  router
 app.include_router(noun_router, prefix="/Noun", tags=["Noun"])
@@ -27,6 +41,48 @@ app.include_router(modifier_router, prefix="/Modifier", tags=["Modifier"])
 app.include_router(attributename_router,prefix="/Attributename",tags=["Attributename"])
 app.include_router(attributevalue_router,prefix="/Attributevalue",tags=["Attributevalue"])
 app.include_router(manufacture_router,prefix="/Manufacure",tags=["Manufacure"])
+app.include_router(catalog_router, prefix="/catalog", tags=["Catalog"])
+app.include_router(jobs_router, prefix="/jobs", tags=["Jobs"])
+app.include_router(dedupe_router, prefix="/dedupe", tags=["Dedupe"])
+
+
+@app.on_event("startup")
+async def startup():
+    await ensure_schema()
+    # Keep list caches in step with writes made by other workers
+    await start_cache_listener()
+    await upload_jobs.start()
+    await dedupe_jobs.start()
+    app.state.loop_lag_watcher = asyncio.create_task(metrics.watch_event_loop_lag())
+    app.state.change_log_pruner = None
+    if settings.CHANGE_LOG_RETENTION_HOURS > 0:
+        app.state.change_log_pruner = asyncio.create_task(prune_change_log_periodically())
+
+
+@app.on_event("shutdown")
+async def shutdown():
+    app.state.loop_lag_watcher.cancel()
+    if app.state.change_log_pruner is not None:
+        app.state.change_log_pruner.cancel()
+    await upload_jobs.stop()
+    await dedupe_jobs.stop()
+    await stop_cache_listener()
+    shutdown_executors()
+
+
+@app.get("/metrics", include_in_schema=False)
+async def get_metrics():
+    pool = engine.pool
+    pool_lines = [
+        "# HELP db_pool_checked_out Connections currently checked out of the pool",
+        "# TYPE db_pool_checked_out gauge",
+        f"db_pool_checked_out {pool.checkedout()}",
+        "# HELP db_pool_size Configured pool size",
+        "# TYPE db_pool_size gauge",
+        f"db_pool_size {pool.size()}",
+    ]
+    return Response(content=metrics.render(pool_lines), media_type="text/plain; version=0.0.4")
+
 
 if __name__ == "__main__":
     import uvicorn
@@ -0,0 +1,23 @@
+# Applies src/db/schema.py, including pending one-off migrations, and exits:
+#
+#   DATABASE_URL=... python migrate.py
+#
+# serve.py runs this once before starting its workers, so index builds and
+# backfills happen once per deploy rather than once per worker. Run it from
+# the deploy pipeline where DB_APPLY_SCHEMA is off.
+import asyncio
+import logging
+from src.db.database import engine
+from src.db.schema import apply_schema
+
+
+async def migrate():
+    try:
+        await apply_schema()
+    finally:
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(migrate())
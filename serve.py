@@ -0,0 +1,40 @@
+# Production entry point:
+#
+#   WEB_CONCURRENCY=8 PORT=8000 python serve.py
+#
+# Runs WEB_CONCURRENCY uvicorn workers (default: CPU count) behind one
+# listening socket. On SIGTERM the supervisor stops accepting connections and
+# each worker finishes its in-flight requests, waiting up to GRACEFUL_TIMEOUT
+# seconds, before running the shutdown hooks. `python main.py` remains the
+# single-process auto-reloading development server.
+#
+# With DB_APPLY_SCHEMA set the schema and pending migrations are applied here,
+# once, before any worker starts (see migrate.py).
+import asyncio
+import importlib.util
+import uvicorn
+from src.db import settings
+
+
+def _available(module: str) -> bool:
+    return importlib.util.find_spec(module) is not None
+
+
+if __name__ == "__main__":
+    if settings.DB_APPLY_SCHEMA:
+        from migrate import migrate
+        asyncio.run(migrate())
+    uvicorn.run(
+        "main:app",
+        host=settings.HOST,
+        port=settings.PORT,
+        workers=settings.WEB_CONCURRENCY,
+        loop="uvloop" if _available("uvloop") else "asyncio",
+        http="httptools" if _available("httptools") else "h11",
+        timeout_keep_alive=settings.KEEPALIVE_TIMEOUT,
+        backlog=settings.BACKLOG,
+        timeout_graceful_shutdown=settings.GRACEFUL_TIMEOUT,
+        proxy_headers=True,
+        # Per-request logging is left to the load balancer; /metrics has per-route counts
+        access_log=False,
+    )
@@ -0,0 +1,80 @@
+import asyncio
+import os
+from typing import List
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+from src.db.database import engine
+from src.utils import metrics
+
+# How many ids one nextval() reserves. Only used when the sequence is first
+# created; afterwards the sequence's own INCREMENT BY is authoritative.
+ID_BLOCK_SIZE = int(os.getenv("ID_BLOCK_SIZE", "100"))
+
+
+# Hands out prefixed ids like N_0001 from a Postgres sequence. Every nextval()
+# reserves a whole block of numbers which is then served from memory, so a
+# single create or a bulk load costs at most one allocation round-trip and
+# concurrent workers never see the same number. Unused numbers of a block are
+# lost when the process exits, which leaves gaps but never duplicates.
+class IdAllocator:
+    def __init__(self, prefix: str, table: str, id_column: str):
+        self.prefix = prefix
+        self.table = table
+        self.id_column = id_column
+        self.sequence = f"{table}_{id_column}_seq"
+        self.block_size = None
+        self._pool: List[int] = []
+        self._lock = asyncio.Lock()
+
+    def format(self, number: int) -> str:
+        return f"{self.prefix}_{number:04d}"
+
+    async def _ensure_sequence(self):
+        # Create the sequence on first use, seeded past the highest id already
+        # in the table. Runs once per process on its own connection; the
+        # advisory lock stops two workers from seeding it at the same time.
+        async with engine.begin() as conn:
+            await conn.execute(text("SELECT pg_advisory_xact_lock(hashtext(:sequence))"), {"sequence": self.sequence})
+            exists = await conn.execute(
+                text("SELECT increment_by FROM pg_sequences WHERE sequencename = :sequence"),
+                {"sequence": self.sequence}
+            )
+            increment = exists.scalar()
+            if increment is None:
+                await conn.execute(text(f"CREATE SEQUENCE {self.sequence} INCREMENT BY {ID_BLOCK_SIZE} MINVALUE 1"))
+                await conn.execute(text(f"""
+                    SELECT setval('{self.sequence}', COALESCE(MAX(NULLIF(regexp_replace({self.id_column}, '\\D', '', 'g'), '')::bigint), 0) + 1, false)
+                    FROM {self.table}
+                """))
+                increment = ID_BLOCK_SIZE
+        self.block_size = increment
+
+    async def next_ids(self, db: AsyncSession, count: int) -> List[str]:
+        if count <= 0:
+            return []
+        async with self._lock:
+            if self.block_size is None:
+                with metrics.untracked():
+                    await self._ensure_sequence()
+            missing = count - len(self._pool)
+            if missing > 0:
+                blocks = -(-missing // self.block_size)
+                result = await db.execute(
+                    text(f"SELECT nextval('{self.sequence}') FROM generate_series(1, :blocks)"),
+                    {"blocks": blocks}
+                )
+                for start in result.scalars().all():
+                    self._pool.extend(range(start, start + self.block_size))
+            numbers, self._pool = self._pool[:count], self._pool[count:]
+        return [self.format(number) for number in numbers]
+
+    async def next_id(self, db: AsyncSession) -> str:
+        return (await self.next_ids(db, 1))[0]
+
+
+noun_ids = IdAllocator("N", "noun_mstr", "noun_id")
+modifier_ids = IdAllocator("M", "modifier_mstr", "modifier_id")
+nounmodifier_ids = IdAllocator("NM", "nounmodifier_combined", "nounmodifier_id")
+attribute_ids = IdAllocator("ATR", "attribute_master", "attribute_id")
+attribute_value_ids = IdAllocator("ATRV", "attribute_value_master", "attribute_value_id")
+manufacturer_ids = IdAllocator("MFR", "manufacturer_master", "manufacturid")
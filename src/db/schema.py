@@ -0,0 +1,458 @@
+import logging
+import time
+from typing import NamedTuple
+from sqlalchemy import text
+from sqlalchemy.exc import IntegrityError
+from src.db import settings
+from src.db.database import engine
+
+logger = logging.getLogger(__name__)
+
+CHANGE_LOG_TABLE = "catalog_change_log"
+CHANGE_LOG_HORIZON_TABLE = "catalog_change_log_horizon"
+MIGRATIONS_TABLE = "schema_migrations"
+
+
+# Startup must not lock the catalog tables, so triggers are created only when
+# missing; their functions are CREATE OR REPLACE and pick up a changed body on
+# the next start. A trigger whose events or arguments change needs a new name
+# (or a migration that drops the old one).
+def _create_trigger(table: str, name: str, definition: str) -> str:
+    return f"""
+    DO $$
+    BEGIN
+        IF NOT EXISTS (SELECT 1 FROM pg_trigger WHERE tgrelid = '{table}'::regclass AND tgname = '{name}') THEN
+            CREATE TRIGGER {name} {definition};
+        END IF;
+    END
+    $$
+    """
+
+# Tables whose writes are recorded, with their id column. Rows are logged by
+# a trigger, so every write path (single, bulk, upload, CTEs) is covered
+# without each handler having to remember it.
+TRACKED_TABLES = {
+    "noun_mstr": "noun_id",
+    "modifier_mstr": "modifier_id",
+    "nounmodifier_combined": "nounmodifier_id",
+    "attribute_master": "attribute_id",
+    "attribute_value_master": "attribute_value_id",
+    "manufacturer_master": "manufacturid",
+}
+
+# Change log behind ?since= delta syncs
+CHANGE_LOG_STATEMENTS = [
+    f"""
+    CREATE TABLE IF NOT EXISTS {CHANGE_LOG_TABLE} (
+        change_id bigserial PRIMARY KEY,
+        table_name text NOT NULL,
+        row_id text NOT NULL,
+        txid bigint NOT NULL DEFAULT txid_current(),
+        changed_at timestamptz NOT NULL DEFAULT now()
+    )
+    """,
+    # One row: sync tokens below pruned_txid predate the retained history
+    f"""
+    CREATE TABLE IF NOT EXISTS {CHANGE_LOG_HORIZON_TABLE} (
+        only_row boolean PRIMARY KEY DEFAULT true CHECK (only_row),
+        pruned_txid bigint NOT NULL DEFAULT 0
+    )
+    """,
+    f"INSERT INTO {CHANGE_LOG_HORIZON_TABLE} (only_row) VALUES (true) ON CONFLICT DO NOTHING",
+    f"""
+    CREATE OR REPLACE FUNCTION record_catalog_change() RETURNS trigger AS $$
+    BEGIN
+        IF TG_OP <> 'INSERT' THEN
+            INSERT INTO {CHANGE_LOG_TABLE} (table_name, row_id) VALUES (TG_TABLE_NAME, to_jsonb(OLD) ->> TG_ARGV[0]);
+        END IF;
+        IF TG_OP <> 'DELETE' AND (TG_OP = 'INSERT' OR (to_jsonb(NEW) ->> TG_ARGV[0]) IS DISTINCT FROM (to_jsonb(OLD) ->> TG_ARGV[0])) THEN
+            INSERT INTO {CHANGE_LOG_TABLE} (table_name, row_id) VALUES (TG_TABLE_NAME, to_jsonb(NEW) ->> TG_ARGV[0]);
+        END IF;
+        RETURN NULL;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+]
+for _table, _id_column in TRACKED_TABLES.items():
+    CHANGE_LOG_STATEMENTS.append(_create_trigger(
+        _table, f"{_table}_change_log",
+        f"AFTER INSERT OR UPDATE OR DELETE ON {_table} FOR EACH ROW EXECUTE PROCEDURE record_catalog_change('{_id_column}')",
+    ))
+
+# Name columns that must be unique once trimmed and case-folded. Creates insert
+# with ON CONFLICT DO NOTHING against these indexes, so duplicate detection is
+# part of the INSERT itself, and nothing else checks for duplicates. If legacy
+# rows already collide the index cannot be built, and migration 0003 below
+# fails naming the table until they are merged (the /dedupe jobs list them).
+NORMALIZED_NAME_COLUMNS = {
+    "noun_mstr": "noun",
+    "attribute_master": "attribute_name",
+    "attribute_value_master": "attribute_value",
+    "manufacturer_master": "manufacturname",
+}
+
+# Optimistic concurrency: every catalog row carries a version that the PATCH
+# handlers expose as an ETag and check against If-Match. A trigger bumps it so
+# bulk updates and uploads also invalidate outstanding ETags.
+ROW_VERSION_STATEMENTS = [
+    """
+    CREATE OR REPLACE FUNCTION bump_row_version() RETURNS trigger AS $$
+    BEGIN
+        NEW.row_version := OLD.row_version + 1;
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+]
+# The row_version column itself is added by migration 0004
+for _table in TRACKED_TABLES:
+    ROW_VERSION_STATEMENTS.append(_create_trigger(
+        _table, f"{_table}_row_version",
+        f"BEFORE UPDATE ON {_table} FOR EACH ROW EXECUTE PROCEDURE bump_row_version()",
+    ))
+
+JOBS_TABLE = "upload_jobs"
+
+# Background spreadsheet uploads, see src/utils/jobs.py
+JOB_STATEMENTS = [
+    f"""
+    CREATE TABLE IF NOT EXISTS {JOBS_TABLE} (
+        job_id text PRIMARY KEY,
+        kind text NOT NULL,
+        status text NOT NULL DEFAULT 'queued',
+        filename text,
+        file_path text NOT NULL,
+        total_rows integer,
+        processed_rows integer NOT NULL DEFAULT 0,
+        start_row integer NOT NULL DEFAULT 0,
+        inserted integer NOT NULL DEFAULT 0,
+        updated integer NOT NULL DEFAULT 0,
+        skipped integer NOT NULL DEFAULT 0,
+        failed integer NOT NULL DEFAULT 0,
+        row_errors jsonb NOT NULL DEFAULT '[]',
+        error text,
+        created_at timestamptz NOT NULL DEFAULT now(),
+        started_at timestamptz,
+        finished_at timestamptz
+    )
+    """,
+    f"CREATE INDEX IF NOT EXISTS {JOBS_TABLE}_status ON {JOBS_TABLE} (status, created_at)",
+]
+
+DEDUPE_JOBS_TABLE = "dedupe_jobs"
+DEDUPE_CLUSTERS_TABLE = "dedupe_clusters"
+
+# Near-duplicate detection jobs and their clusters, see src/utils/dedupejobs.py
+DEDUPE_STATEMENTS = [
+    f"""
+    CREATE TABLE IF NOT EXISTS {DEDUPE_JOBS_TABLE} (
+        job_id text PRIMARY KEY,
+        status text NOT NULL DEFAULT 'queued',
+        sources text[] NOT NULL,
+        threshold real NOT NULL,
+        total_rows integer NOT NULL DEFAULT 0,
+        processed_sources integer NOT NULL DEFAULT 0,
+        clusters integer NOT NULL DEFAULT 0,
+        error text,
+        created_at timestamptz NOT NULL DEFAULT now(),
+        started_at timestamptz,
+        finished_at timestamptz
+    )
+    """,
+    f"CREATE INDEX IF NOT EXISTS {DEDUPE_JOBS_TABLE}_status ON {DEDUPE_JOBS_TABLE} (status, created_at)",
+    f"""
+    CREATE TABLE IF NOT EXISTS {DEDUPE_CLUSTERS_TABLE} (
+        job_id text NOT NULL REFERENCES {DEDUPE_JOBS_TABLE} ON DELETE CASCADE,
+        cluster_no integer NOT NULL,
+        source text NOT NULL,
+        size integer NOT NULL,
+        score real NOT NULL,
+        members jsonb NOT NULL,
+        pairs jsonb NOT NULL,
+        PRIMARY KEY (job_id, cluster_no)
+    )
+    """,
+]
+
+SHORT_DESCRIPTIONS_TABLE = "short_descriptions"
+
+# Material short descriptions, "NOUN, MODIFIER: VALUE, VALUE, ...", stored per
+# nounmodifier_id so a read is one primary-key lookup. Each part uses the
+# entity's abbreviation and falls back to its name. attribute_value_master
+# rows are not linked to an attribute_master row, so the values are listed in
+# id order without attribute labels. Values that no longer fit in
+# SHORT_DESCRIPTION_LENGTH are dropped whole; full_length is the length before
+# that, so truncated descriptions can be found.
+#
+# Statement-level triggers recompute only the noun-modifiers a write touched,
+# in one set-based call per statement, so bulk writes and uploads cost no more
+# round-trips. Updates that leave the columns a description reads unchanged
+# recompute nothing.
+# source table -> (id column, columns the description reads, affected nounmodifier_ids of the rows in r)
+SHORT_DESCRIPTION_SOURCES = {
+    "noun_mstr": (
+        "noun_id", ["noun", "abbreviation"],
+        "SELECT nm.nounmodifier_id FROM nounmodifier_combined nm JOIN {rows} r ON nm.noun_id = r.noun_id",
+    ),
+    "modifier_mstr": (
+        "modifier_id", ["modifier", "abbreviation"],
+        "SELECT nm.nounmodifier_id FROM nounmodifier_combined nm JOIN {rows} r ON nm.modifier_id = r.modifier_id",
+    ),
+    "nounmodifier_combined": (
+        "nounmodifier_id", ["noun", "modifier", "noun_id", "modifier_id"],
+        "SELECT r.nounmodifier_id FROM {rows} r",
+    ),
+    "attribute_value_master": (
+        "attribute_value_id", ["attribute_value", "attribute_value_abbr", "isactive", "nounmodifier_id"],
+        "SELECT r.nounmodifier_id FROM {rows} r",
+    ),
+}
+_limit = int(settings.SHORT_DESCRIPTION_LENGTH)
+SHORT_DESCRIPTION_STATEMENTS = [
+    f"""
+    CREATE TABLE IF NOT EXISTS {SHORT_DESCRIPTIONS_TABLE} (
+        nounmodifier_id text PRIMARY KEY,
+        description text NOT NULL,
+        full_length integer NOT NULL,
+        max_length integer NOT NULL,
+        updated_at timestamptz NOT NULL DEFAULT now()
+    )
+    """,
+    f"""
+    CREATE OR REPLACE FUNCTION rebuild_short_descriptions(ids text[]) RETURNS void AS $$
+        -- Serialises concurrent rebuilds of one noun-modifier until commit.
+        -- Each statement below takes a fresh snapshot once the lock is held,
+        -- so the later writer sees the earlier one's committed values instead
+        -- of overwriting its description with one that lacks them. NO KEY
+        -- UPDATE leaves the FK checks of child inserts unblocked.
+        SELECT 1 FROM nounmodifier_combined
+        WHERE nounmodifier_id = ANY(ids)
+        ORDER BY nounmodifier_id
+        FOR NO KEY UPDATE;
+
+        DELETE FROM {SHORT_DESCRIPTIONS_TABLE} d
+        WHERE d.nounmodifier_id = ANY(ids)
+          AND NOT EXISTS (SELECT 1 FROM nounmodifier_combined nm WHERE nm.nounmodifier_id = d.nounmodifier_id);
+
+        INSERT INTO {SHORT_DESCRIPTIONS_TABLE} (nounmodifier_id, description, full_length, max_length, updated_at)
+        WITH heads AS (
+            SELECT nm.nounmodifier_id,
+                   concat_ws(', ',
+                       COALESCE(NULLIF(btrim(n.abbreviation), ''), NULLIF(btrim(nm.noun), '')),
+                       COALESCE(NULLIF(btrim(m.abbreviation), ''), NULLIF(btrim(nm.modifier), ''))
+                   ) AS head
+            FROM nounmodifier_combined nm
+            LEFT JOIN noun_mstr n ON n.noun_id = nm.noun_id
+            LEFT JOIN modifier_mstr m ON m.modifier_id = nm.modifier_id
+            WHERE nm.nounmodifier_id = ANY(ids)
+        ),
+        tokens AS (
+            -- running is the description length up to and including this value
+            SELECT h.nounmodifier_id, v.attribute_value_id, v.token,
+                   length(h.head) + sum(length(v.token) + 2) OVER (
+                       PARTITION BY h.nounmodifier_id ORDER BY v.attribute_value_id
+                   ) AS running
+            FROM heads h
+            JOIN LATERAL (
+                SELECT av.attribute_value_id, COALESCE(NULLIF(btrim(av.attribute_value_abbr), ''), btrim(av.attribute_value)) AS token
+                FROM attribute_value_master av
+                WHERE av.nounmodifier_id = h.nounmodifier_id AND av.isactive IS NOT false
+            ) v ON v.token <> ''
+        )
+        SELECT h.nounmodifier_id,
+               left(h.head || COALESCE(': ' || string_agg(t.token, ', ' ORDER BY t.attribute_value_id) FILTER (WHERE t.running <= {_limit}), ''), {_limit}),
+               COALESCE(max(t.running), length(h.head)),
+               {_limit},
+               now()
+        FROM heads h
+        LEFT JOIN tokens t ON t.nounmodifier_id = h.nounmodifier_id
+        GROUP BY h.nounmodifier_id, h.head
+        ON CONFLICT (nounmodifier_id) DO UPDATE
+        SET description = EXCLUDED.description, full_length = EXCLUDED.full_length,
+            max_length = EXCLUDED.max_length, updated_at = EXCLUDED.updated_at;
+    $$ LANGUAGE sql
+    """,
+]
+for _table, (_id_column, _columns, _affected) in SHORT_DESCRIPTION_SOURCES.items():
+    _new = ", ".join(f"n.{_column}" for _column in _columns)
+    _old = ", ".join(f"o.{_column}" for _column in _columns)
+    _changed = f"new_rows n JOIN old_rows o ON o.{_id_column} = n.{_id_column} WHERE ROW({_new}) IS DISTINCT FROM ROW({_old})"
+    SHORT_DESCRIPTION_STATEMENTS.append(f"""
+    CREATE OR REPLACE FUNCTION {_table}_short_descriptions() RETURNS trigger AS $$
+    BEGIN
+        IF TG_OP = 'INSERT' THEN
+            PERFORM rebuild_short_descriptions(ARRAY({_affected.format(rows="new_rows")}));
+        ELSIF TG_OP = 'DELETE' THEN
+            PERFORM rebuild_short_descriptions(ARRAY({_affected.format(rows="old_rows")}));
+        ELSE
+            PERFORM rebuild_short_descriptions(ARRAY(
+                {_affected.format(rows=f"(SELECT n.* FROM {_changed})")}
+                UNION
+                {_affected.format(rows=f"(SELECT o.* FROM {_changed})")}
+            ));
+        END IF;
+        RETURN NULL;
+    END
+    $$ LANGUAGE plpgsql
+    """)
+    # Transition tables need one trigger per event
+    for _event, _referencing in (
+        ("INSERT", "NEW TABLE AS new_rows"),
+        ("UPDATE", "OLD TABLE AS old_rows NEW TABLE AS new_rows"),
+        ("DELETE", "OLD TABLE AS old_rows"),
+    ):
+        SHORT_DESCRIPTION_STATEMENTS.append(_create_trigger(
+            _table, f"{_table}_short_descriptions_{_event.lower()}",
+            f"AFTER {_event} ON {_table} REFERENCING {_referencing} FOR EACH STATEMENT EXECUTE PROCEDURE {_table}_short_descriptions()",
+        ))
+
+# Idempotent DDL the services rely on beyond the base tables, run by every
+# worker on startup under an advisory lock so concurrent workers do not race.
+# Only the services' own tables, functions and missing triggers belong here:
+# nothing that takes a lock on, or scans, a catalog table.
+SCHEMA_STATEMENTS = CHANGE_LOG_STATEMENTS + JOB_STATEMENTS + ROW_VERSION_STATEMENTS + DEDUPE_STATEMENTS + SHORT_DESCRIPTION_STATEMENTS
+
+
+class Index(NamedTuple):
+    name: str
+    definition: str
+    unique: bool = False
+
+
+# One-off changes to the catalog tables, applied in order and recorded in
+# MIGRATIONS_TABLE so each runs once per database. Indexes are built
+# CONCURRENTLY, which keeps the tables writable; every step is idempotent, so
+# an interrupted migration is simply run again. A step is SQL or an Index.
+# Never edit an applied migration, add a new one.
+MIGRATIONS = [
+    ("0001_trigram_search", [
+        # Behind the /search endpoints
+        "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+        Index("noun_mstr_noun_trgm", "noun_mstr USING gin (noun gin_trgm_ops)"),
+        Index("noun_mstr_abbreviation_trgm", "noun_mstr USING gin (abbreviation gin_trgm_ops)"),
+        Index("modifier_mstr_modifier_trgm", "modifier_mstr USING gin (modifier gin_trgm_ops)"),
+        Index("modifier_mstr_abbreviation_trgm", "modifier_mstr USING gin (abbreviation gin_trgm_ops)"),
+        Index("nounmodifier_combined_noun_trgm", "nounmodifier_combined USING gin (noun gin_trgm_ops)"),
+        Index("nounmodifier_combined_modifier_trgm", "nounmodifier_combined USING gin (modifier gin_trgm_ops)"),
+        Index("nounmodifier_combined_noun_modifier_trgm", "nounmodifier_combined USING gin (noun_modifier gin_trgm_ops)"),
+        Index("nounmodifier_combined_abbreviation_trgm", "nounmodifier_combined USING gin (abbreviation gin_trgm_ops)"),
+    ]),
+    ("0002_lookup_indexes", [
+        # Child lookups by nounmodifier_id behind /catalog
+        Index("attribute_master_nounmodifier_id", "attribute_master (nounmodifier_id)"),
+        Index("attribute_value_master_nounmodifier_id", "attribute_value_master (nounmodifier_id)"),
+        Index("manufacturer_master_nounmodifier_id", "manufacturer_master (nounmodifier_id)"),
+        # Noun and modifier changes find their noun-modifiers (and short descriptions) through these
+        Index("nounmodifier_combined_noun_id", "nounmodifier_combined (noun_id)"),
+        Index("nounmodifier_combined_modifier_id", "nounmodifier_combined (modifier_id)"),
+        # Modifier lookups by trimmed, case-folded name (noun_mstr has its unique index)
+        Index("modifier_mstr_modifier_normalized", "modifier_mstr (lower(btrim(modifier)))"),
+        Index(f"{CHANGE_LOG_TABLE}_table_txid", f"{CHANGE_LOG_TABLE} (table_name, txid)"),
+    ]),
+    ("0003_normalized_names", [
+        Index(f"{_table}_{_column}_normalized", f"{_table} (lower(btrim({_column})))", unique=True)
+        for _table, _column in NORMALIZED_NAME_COLUMNS.items()
+    ]),
+    ("0004_row_version", [
+        f"ALTER TABLE {_table} ADD COLUMN IF NOT EXISTS row_version bigint NOT NULL DEFAULT 1"
+        for _table in TRACKED_TABLES
+    ]),
+    ("0005_upload_job_errors", [
+        # Rows an upload rejected, e.g. a noun-modifier whose noun does not exist
+        f"ALTER TABLE {JOBS_TABLE} ADD COLUMN IF NOT EXISTS failed integer NOT NULL DEFAULT 0",
+        f"ALTER TABLE {JOBS_TABLE} ADD COLUMN IF NOT EXISTS row_errors jsonb NOT NULL DEFAULT '[]'",
+    ]),
+    ("0006_change_log_retention", [
+        # Pruning deletes by age
+        Index(f"{CHANGE_LOG_TABLE}_changed_at", f"{CHANGE_LOG_TABLE} (changed_at)"),
+    ]),
+    # Backfill: noun-modifiers without a description, or built under another
+    # length limit. Named after the limit so changing SHORT_DESCRIPTION_LENGTH
+    # runs it again; forgetting the other limits lets a later switch back run it too.
+    (f"short_descriptions_{_limit}", [
+        f"""
+        SELECT rebuild_short_descriptions(ARRAY(
+            SELECT nm.nounmodifier_id
+            FROM nounmodifier_combined nm
+            LEFT JOIN {SHORT_DESCRIPTIONS_TABLE} d ON d.nounmodifier_id = nm.nounmodifier_id
+            WHERE d.max_length IS DISTINCT FROM {_limit}
+        ))
+        """,
+        f"DELETE FROM {MIGRATIONS_TABLE} WHERE name LIKE 'short\\_descriptions\\_%' AND name <> 'short_descriptions_{_limit}'",
+    ]),
+]
+
+
+async def _build_index(conn, index: Index):
+    # A failed concurrent build leaves an invalid index behind that IF NOT
+    # EXISTS would then skip
+    invalid = await conn.execute(
+        text("SELECT 1 FROM pg_index WHERE indexrelid = to_regclass(:name) AND NOT indisvalid"),
+        {"name": index.name},
+    )
+    if invalid.first():
+        await conn.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {index.name}"))
+    try:
+        await conn.execute(text(
+            f"CREATE {'UNIQUE ' if index.unique else ''}INDEX CONCURRENTLY IF NOT EXISTS {index.name} ON {index.definition}"
+        ))
+    except IntegrityError as ie:
+        await conn.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {index.name}"))
+        raise RuntimeError(
+            f"Cannot build unique index {index.name}: {index.definition.split(' ')[0]} has duplicate values "
+            f"once trimmed and case-folded; merge them (the /dedupe jobs list them) and run migrate.py again"
+        ) from ie
+
+
+async def apply_migrations():
+    # Autocommit: CREATE INDEX CONCURRENTLY cannot run inside a transaction
+    async with engine.connect() as conn:
+        await conn.execution_options(isolation_level="AUTOCOMMIT")
+        await conn.execute(text(
+            f"CREATE TABLE IF NOT EXISTS {MIGRATIONS_TABLE} (name text PRIMARY KEY, applied_at timestamptz NOT NULL DEFAULT now())"
+        ))
+        if not await _pending_migrations(conn):
+            return
+        await conn.execute(text("SELECT pg_advisory_lock(hashtext('apply_migrations'))"))
+        try:
+            # Index builds and backfills outlast the API's statement timeout
+            await conn.execute(text("SET statement_timeout = 0"))
+            # Re-read: another process may have applied them while we waited
+            for name, steps in await _pending_migrations(conn):
+                started = time.perf_counter()
+                for step in steps:
+                    if isinstance(step, Index):
+                        await _build_index(conn, step)
+                    else:
+                        # ALTER TABLE queues every reader behind it while it
+                        # waits for its lock, so give up instead of waiting long
+                        await conn.execute(text(f"SET lock_timeout = {int(settings.DB_MIGRATION_LOCK_TIMEOUT_MS)}"))
+                        await conn.execute(text(step))
+                        await conn.execute(text("SET lock_timeout = 0"))
+                await conn.execute(text(f"INSERT INTO {MIGRATIONS_TABLE} (name) VALUES (:name)"), {"name": name})
+                logger.info("Applied migration %s in %.1fs", name, time.perf_counter() - started)
+        finally:
+            await conn.execute(text("RESET statement_timeout"))
+            await conn.execute(text("RESET lock_timeout"))
+            await conn.execute(text("SELECT pg_advisory_unlock(hashtext('apply_migrations'))"))
+
+
+async def _pending_migrations(conn):
+    applied = set((await conn.execute(text(f"SELECT name FROM {MIGRATIONS_TABLE}"))).scalars())
+    return [(name, steps) for name, steps in MIGRATIONS if name not in applied]
+
+
+async def apply_schema():
+    # Statements first: migrations index and backfill the tables they create
+    async with engine.begin() as conn:
+        await conn.execute(text("SELECT pg_advisory_xact_lock(hashtext('ensure_schema'))"))
+        for statement in SCHEMA_STATEMENTS:
+            await conn.execute(text(statement))
+    logger.info("Applied %d schema statements", len(SCHEMA_STATEMENTS))
+    await apply_migrations()
+
+
+async def ensure_schema():
+    if not settings.DB_APPLY_SCHEMA:
+        return
+    await apply_schema()
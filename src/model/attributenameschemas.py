@@ -1,5 +1,6 @@
 from pydantic import BaseModel
 from typing import List, Optional
+from src.model.paginationschemas import PageResponse
 
 class AttributeCreate(BaseModel):
     attribute_name: str
@@ -9,10 +10,10 @@ class AttributeCreate(BaseModel):
     isactive: bool
     # message: Optional[str]
 class AttributeUpdate(BaseModel):
-    attribute_name: str
-    abbreviation: str
-    description: str
-    isactive: bool
+    attribute_name: Optional[str] = None
+    abbreviation: Optional[str] = None
+    description: Optional[str] = None
+    isactive: Optional[bool] = None
 
 class AttributeData(BaseModel):
     attribute_id: Optional[str]
@@ -21,6 +22,9 @@ class AttributeData(BaseModel):
     abbreviation: str
     description: str
     isactive: bool
-class AttributeResponse(BaseModel):
-    message: str
-    data: List[AttributeData]  # Add a message field for responses
\ No newline at end of file
+    row_version: Optional[int] = None
+class AttributeResponse(PageResponse):
+    data: List[AttributeData]  # Add a message field for responses
+
+class AttributeBulkUpdate(AttributeUpdate):
+    attribute_id: str
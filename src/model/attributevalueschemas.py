@@ -1,5 +1,6 @@
 from pydantic import BaseModel
 from typing import List, Optional
+from src.model.paginationschemas import PageResponse
 
 class attribute_valueCreate(BaseModel):
     attribute_value: str
@@ -11,12 +12,12 @@ class attribute_valueCreate(BaseModel):
 
 
 class Attribute_valueUpdate(BaseModel):
-    attribute_value: str
-    attribute_value_desc: str
-    attribute_value_abbr: str
-    remarks:str
-    isactive: bool
-    nounmodifier_id: Optional[str]
+    attribute_value: Optional[str] = None
+    attribute_value_desc: Optional[str] = None
+    attribute_value_abbr: Optional[str] = None
+    remarks: Optional[str] = None
+    isactive: Optional[bool] = None
+    nounmodifier_id: Optional[str] = None
 
 class Attribute_valueData(BaseModel):
     attribute_value_id: Optional[str]
@@ -26,6 +27,9 @@ class Attribute_valueData(BaseModel):
     remarks: str
     attribute_value_abbr:str
     isactive: bool
-class Attribute_valueResponse(BaseModel):
-    message: str
-    data: List[Attribute_valueData]
\ No newline at end of file
+    row_version: Optional[int] = None
+class Attribute_valueResponse(PageResponse):
+    data: List[Attribute_valueData]
+
+class Attribute_valueBulkUpdate(Attribute_valueUpdate):
+    attribute_value_id: str
@@ -0,0 +1,29 @@
+from pydantic import BaseModel
+from typing import Any, Dict, List, Optional
+
+class BulkDelete(BaseModel):
+    ids: List[str]
+
+class BulkItemResult(BaseModel):
+    index: int  # Position of the item in the request array
+    status: str  # created, updated, deleted or error
+    id: Optional[str] = None
+    error: Optional[str] = None
+
+class BulkResponse(BaseModel):
+    message: str
+    results: List[BulkItemResult]
+
+class BulkFilterAction(BaseModel):
+    action: str  # deactivate or delete
+    ids: Optional[List[str]] = None
+    # Column equality filters, e.g. {"nounmodifier_id": "NM_0042"}; a list value matches any of its items
+    where: Dict[str, Any] = {}
+    dry_run: bool = False
+
+class BulkFilterResponse(BaseModel):
+    message: str
+    action: str
+    dry_run: bool
+    matched: int  # Rows selected by the filter
+    affected: int  # Rows changed, or that would be changed on a dry run
@@ -0,0 +1,41 @@
+from pydantic import BaseModel
+from datetime import datetime
+from typing import List, Optional
+from src.model.nounschemas import NounData
+from src.model.modifierschemas import ModifierData
+from src.model.attributenameschemas import AttributeData
+from src.model.attributevalueschemas import Attribute_valueData
+from src.model.manufactureschemas import ManufacturerData
+
+class CatalogBatch(BaseModel):
+    ids: List[str]
+
+class CatalogEntry(BaseModel):
+    nounmodifier_id: str
+    noun_modifier: str
+    abbreviation: str
+    description: str
+    isactive: bool
+    noun: Optional[NounData]
+    modifier: Optional[ModifierData]
+    attributes: List[AttributeData]
+    attribute_values: List[Attribute_valueData]
+    manufacturers: List[ManufacturerData]
+
+class CatalogResponse(BaseModel):
+    message: str
+    data: List[CatalogEntry]
+    # Requested ids that have no noun-modifier row
+    missing: List[str] = []
+
+class ShortDescription(BaseModel):
+    nounmodifier_id: str
+    description: str
+    full_length: int  # Length before values were dropped to fit max_length
+    max_length: int
+    updated_at: datetime
+
+class ShortDescriptionResponse(BaseModel):
+    message: str
+    data: List[ShortDescription]
+    missing: List[str] = []
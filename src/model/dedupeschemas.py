@@ -0,0 +1,44 @@
+from pydantic import BaseModel
+from datetime import datetime
+from typing import List, Optional
+from src.model.paginationschemas import PageResponse
+
+class DedupeRequest(BaseModel):
+    # Any of noun, modifier, attribute_value, manufacturer; all of them when omitted
+    sources: Optional[List[str]] = None
+    # Minimum similarity for pairs found by MinHash alone; rule matches are always kept
+    threshold: float = 0.6
+
+class DedupeJobStatus(BaseModel):
+    job_id: str
+    status: str  # queued, running, succeeded or failed
+    sources: List[str]
+    threshold: float
+    total_rows: int
+    processed_sources: int
+    clusters: int
+    error: Optional[str] = None
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+class DedupeMember(BaseModel):
+    id: str
+    name: Optional[str] = None
+
+class DedupePair(BaseModel):
+    first: str
+    second: str
+    score: float
+    reason: str  # normalized, token_order, abbreviation, typo or minhash
+
+class DedupeCluster(BaseModel):
+    cluster_no: int
+    source: str
+    size: int
+    score: float  # Weakest accepted pair in the cluster
+    members: List[DedupeMember]
+    pairs: List[DedupePair]
+
+class DedupeClusterPage(PageResponse):
+    data: List[DedupeCluster]
@@ -0,0 +1,36 @@
+from pydantic import BaseModel
+from datetime import datetime
+from typing import List, Optional
+
+class JobAccepted(BaseModel):
+    message: str
+    job_id: str
+    status_url: str
+
+class JobRowError(BaseModel):
+    row: int  # Spreadsheet row number, header is row 1
+    error: str
+
+class JobProgress(BaseModel):
+    job_id: str
+    status: str  # queued, running, succeeded or failed
+    total_rows: Optional[int] = None
+    processed_rows: int
+    inserted: int
+    updated: int
+    skipped: int
+    failed: int = 0  # Rows rejected, e.g. for an unknown noun or modifier
+    row_errors: List[JobRowError] = []  # The first UPLOAD_MAX_ROW_ERRORS of them
+    rows_per_second: Optional[float] = None
+    error: Optional[str] = None
+
+class JobStatus(JobProgress):
+    kind: str
+    filename: Optional[str] = None
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+class JobList(BaseModel):
+    message: str
+    data: List[JobStatus]
@@ -1,5 +1,6 @@
 from pydantic import BaseModel
 from typing import List, Optional
+from src.model.paginationschemas import PageResponse
 
 class ManufacturerCreate(BaseModel):
     manufacturid: str
@@ -7,14 +8,15 @@ class ManufacturerCreate(BaseModel):
     manufacturdesc: str
     remarks: str
     isactive: bool
+    nounmodifier_id: Optional[str] = None
     # manufacturer_abbr: str  # Adjust based on your database type
 
 class ManufacturerUpdate(BaseModel):
-    manufacturname: str
+    manufacturname: Optional[str] = None
     manufacturdesc: Optional[str] = None
     remarks: Optional[str] = None
-    isactive: bool
-    nounmodifier_id: str
+    isactive: Optional[bool] = None
+    nounmodifier_id: Optional[str] = None
 
 class ManufacturerData(BaseModel):
     manufacturid: str
@@ -22,9 +24,12 @@ class ManufacturerData(BaseModel):
     manufacturdesc: str
     remarks: Optional[str]
     isactive: bool
-    nounmodifier_id: str
+    nounmodifier_id: Optional[str]
+    row_version: Optional[int] = None
     # manufacturer_abbr:str
 
-class ManufacturerResponse(BaseModel):
-    message: str
-    data: List[ManufacturerData]
\ No newline at end of file
+class ManufacturerResponse(PageResponse):
+    data: List[ManufacturerData]
+
+class ManufacturerBulkUpdate(ManufacturerUpdate):
+    manufacturid: str
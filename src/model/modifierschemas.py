@@ -1,5 +1,6 @@
 from pydantic import BaseModel
 from typing import List, Optional
+from src.model.paginationschemas import PageResponse
 
 class ModifierCreate(BaseModel):
     modifier: str
@@ -9,10 +10,10 @@ class ModifierCreate(BaseModel):
     message: Optional[str]
 
 class ModifierUpdate(BaseModel):
-    modifier: str
-    abbreviation: str
-    description: str
-    isactive: bool
+    modifier: Optional[str] = None
+    abbreviation: Optional[str] = None
+    description: Optional[str] = None
+    isactive: Optional[bool] = None
     # message: Optional[str]
 
 class ModifierData(BaseModel):
@@ -21,7 +22,10 @@ class ModifierData(BaseModel):
     abbreviation: str
     description: str
     isactive: bool
+    row_version: Optional[int] = None
+
+class ModifierResponse(PageResponse):
+    data: List[ModifierData]
 
-class ModifierResponse(BaseModel):
-    message: str
-    data: List[ModifierData]
\ No newline at end of file
+class ModifierBulkUpdate(ModifierUpdate):
+    modifier_id: str
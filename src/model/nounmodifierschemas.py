@@ -1,5 +1,6 @@
 from pydantic import BaseModel
 from typing import List, Optional
+from src.model.paginationschemas import PageResponse
 
 class NounModifierCreate(BaseModel):
     # noun_id: str
@@ -14,11 +15,11 @@ class NounModifierCreate(BaseModel):
 class NounModifierUpdate(BaseModel):
     # noun_id: str
     # modifier_id: str
-    noun: str
-    modifier:str
-    abbreviation: str
-    description: str
-    isactive: bool
+    noun: Optional[str] = None
+    modifier: Optional[str] = None
+    abbreviation: Optional[str] = None
+    description: Optional[str] = None
+    isactive: Optional[bool] = None
 
 class NounModifierData(BaseModel):
     noun_id: str
@@ -30,6 +31,9 @@ class NounModifierData(BaseModel):
     isactive: bool
     nounmodifier_id: str
     noun_modifier:str
-class NounModifierResponse(BaseModel):
-    message: str
-    data:List[NounModifierData]# Add a message field for responses
\ No newline at end of file
+    row_version: Optional[int] = None
+class NounModifierResponse(PageResponse):
+    data:List[NounModifierData]# Add a message field for responses
+
+class NounModifierBulkUpdate(NounModifierUpdate):
+    nounmodifier_id: str
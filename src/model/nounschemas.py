@@ -1,5 +1,6 @@
 from pydantic import BaseModel
 from typing import List, Optional
+from src.model.paginationschemas import PageResponse
 
 class NounCreate(BaseModel):
     noun: str
@@ -8,10 +9,10 @@ class NounCreate(BaseModel):
     isactive: bool
 
 class NounUpdate(BaseModel):
-    noun: str
-    abbreviation: str
-    description: str
-    isactive: bool
+    noun: Optional[str] = None
+    abbreviation: Optional[str] = None
+    description: Optional[str] = None
+    isactive: Optional[bool] = None
 
 class NounData(BaseModel):
     noun_id: str
@@ -19,7 +20,10 @@ class NounData(BaseModel):
     abbreviation: str
     description: str
     isactive: bool
+    row_version: Optional[int] = None
+
+class NounResponse(PageResponse):
+    data: List[NounData]
 
-class NounResponse(BaseModel):
-    message: str
-    data: List[NounData]
\ No newline at end of file
+class NounBulkUpdate(NounUpdate):
+    noun_id: str
@@ -0,0 +1,7 @@
+from pydantic import BaseModel
+from typing import Optional
+
+class PageResponse(BaseModel):
+    message: str
+    # Pass back as `after` to fetch the next page, None on the last page
+    next_cursor: Optional[str] = None
@@ -1,10 +1,20 @@
-from fastapi import APIRouter, HTTPException, Depends, File, UploadFile
+from fastapi import APIRouter, HTTPException, Depends, File, UploadFile, Request, Query, Header, Response
 from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from fastapi.middleware.cors import CORSMiddleware
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine 
 from src.db .database import get_db
-from src.model.attributenameschemas import AttributeCreate,AttributeData, AttributeResponse, AttributeUpdate
+from src.db.idallocator import attribute_ids
+from src.model.attributenameschemas import AttributeCreate,AttributeData, AttributeResponse, AttributeUpdate, AttributeBulkUpdate
+from src.model.bulkschemas import BulkDelete, BulkResponse, BulkFilterAction, BulkFilterResponse
+from src.utils.pagination import PageParams, keyset_query, split_page
+from src.utils.streaming import streaming_media_type, stream_table
+from src.utils.cache import list_cache, invalidate
+from src.utils.serialization import RowEncoder
+from src.utils.changes import delta_response
+from src.utils.querybudget import query_budget
+from src.utils.patch import patch_row, etag
+from src.utils.bulkops import bulk_create, bulk_update, bulk_delete, bulk_filter_action
 from typing import List
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy import text
@@ -15,95 +25,82 @@ from sqlalchemy.exc import IntegrityError, SQLAlchemyError
 app = APIRouter()
 
 TABLE_NAME = "attribute_master"
+LIST_COLUMNS = "attribute_id,nounmodifier_id, attribute_name,abbreviation,description,isactive, row_version"
+LIST_ENCODER = RowEncoder(AttributeData, LIST_COLUMNS)
+BULK_CREATE_COLUMNS = {"attribute_name": "text", "nounmodifier_id": "text", "abbreviation": "text", "description": "text", "isactive": "boolean"}
+BULK_UPDATE_COLUMNS = {"attribute_name": "text", "abbreviation": "text", "description": "text", "isactive": "boolean"}
+# Columns the /bulk/filter route may filter on, with their SQL types
+FILTER_COLUMNS = {"nounmodifier_id": "text", "attribute_name": "text", "isactive": "boolean"}
 
-async def generate_attribute_id(db: AsyncSession):
-    result = await db.execute(text("SELECT MAX(attribute_id) FROM attribute_master"))
-    last_id = result.scalar()  # Get the last id from the database
+async def generate_attribute_id(db: AsyncSession) -> str:
+    return await attribute_ids.next_id(db)
 
-    # Extract the number part from the last_id
-    if last_id:
-        number_part = int(last_id.split('_')[1])  # Assuming the format is ATR_XXXX
-        new_number_part = number_part + 1
-    else:
-        new_number_part = 1  # Start from 1 if there's no entry
 
-    return f"ATR_{new_number_part:04d}"  # Format it as ATR_XXXX
+@app.get("/Attribute", response_model=AttributeResponse)
+@query_budget(2)
+async def get_noun_values(
+    request: Request,
+    page: PageParams = Depends(),
+    since: Optional[str] = Query(None, description="Token from a previous sync; returns only rows changed since then"),
+    db: AsyncSession = Depends(get_db),
+):
+    try:
+        if since is not None:
+            return await delta_response(db, since, LIST_COLUMNS, TABLE_NAME, "attribute_id", LIST_ENCODER, page)
 
+        media_type = streaming_media_type(request)
+        if media_type:
+            return stream_table(LIST_COLUMNS, TABLE_NAME, "attribute_id", page, media_type)
 
-async def get_existing_nounmodifier_id(db: AsyncSession) -> str:
-    query = text("SELECT nounmodifier_id FROM attribute_master ORDER BY attribute_id DESC LIMIT 1")
-    result = await db.execute(query)
-    return result.scalar() or "NM_0000"  # Return a default if not found
+        cached = list_cache.lookup(request, TABLE_NAME, page)
+        if cached:
+            return cached
+        version = list_cache.version(TABLE_NAME)
 
-# Helper function to increment IDs like "N_0990", "M_0990"
-def increment_id(existing_id: str) -> str:
-    prefix, num_part = existing_id.split('_')
-    new_number = int(num_part) + 1
-    return f"{prefix}_{new_number:04d}"  # Maintain format with leading zeros
+        query, params = keyset_query(LIST_COLUMNS, TABLE_NAME, "attribute_id", page)
+        result = await db.execute(query, params)
+        rows, next_cursor = split_page(result.fetchall(), page)
 
-@app.get("/Attribute", response_model=AttributeResponse)
-async def get_noun_values(db: AsyncSession = Depends(get_db)):
-    try:
-        query = text(f"""
-            SELECT attribute_id,nounmodifier_id, attribute_name,abbreviation,description,isactive
-            FROM {TABLE_NAME}
-            ORDER BY attribute_id
-        """)
-        result = await db.execute(query)
-        rows = result.fetchall()
-
-        # Map the fetched rows to the NounResponse model
-        attributes = [AttributeData(
-            attribute_id=row[0],
-            nounmodifier_id=row[1],
-            attribute_name=row[2],
-            abbreviation=row[3],
-            description=row[4],
-            isactive=row[5]
-           # Explicitly setting message to None or remove this line
-        ) for row in rows]
-
-        return AttributeResponse(message="success", data=attributes)
+        return list_cache.store(request, TABLE_NAME, page, version, LIST_ENCODER.page(rows, next_cursor))
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 
 @app.post("/Attribute", response_model=AttributeResponse)
+@query_budget(3)
 async def create_attributename(entry: AttributeCreate, db: AsyncSession = Depends(get_db)):
     try:
         if not entry.attribute_name.strip():
             raise HTTPException(status_code=400, detail="Attribute cannot be an empty string or just whitespace")
 
-        existing_attribute_name = await db.execute(
-            text(f"SELECT 1 FROM {TABLE_NAME} WHERE attribute_name = :attribute_name"),
-            {"attribute_name": entry.attribute_name}
-        )
-        if existing_attribute_name.fetchone():
-            raise HTTPException(status_code=400, detail="attribute_name already exists.")
-
-        existing_nounmodifier_id = await get_existing_nounmodifier_id(db)
-
-        new_nounmodifier_id = increment_id(existing_nounmodifier_id)
-
         # Generate the new attribute_id in the format ATR_XXXX
         new_attribute_id = await generate_attribute_id(db)
 
+        # Duplicates (trimmed, case-folded) return no row
         query = text(f"""
             INSERT INTO {TABLE_NAME} (attribute_id, nounmodifier_id, attribute_name, abbreviation, description, isactive)
             VALUES (:attribute_id, :nounmodifier_id, :attribute_name, :abbreviation, :description, :isactive)
+            ON CONFLICT (lower(btrim(attribute_name))) DO NOTHING
             RETURNING attribute_id, nounmodifier_id, attribute_name, abbreviation, description, isactive
         """)
         result = await db.execute(query, {
             "attribute_id": new_attribute_id,
-            "nounmodifier_id": new_nounmodifier_id,
+            "nounmodifier_id": entry.nounmodifier_id,
             "attribute_name": entry.attribute_name,
             "abbreviation": entry.abbreviation,
             "description": entry.description,
             "isactive": entry.isactive
         })
+        # No row back means the normalized name already exists
+        inserted_values = result.fetchone()
+        if inserted_values is None:
+            raise HTTPException(status_code=400, detail="attribute_name already exists.")
+
+        await invalidate(db, TABLE_NAME)
         await db.commit()
 
-        inserted_values = result.fetchone()
         return {
             "message": "success",
             "data": [{
@@ -118,9 +115,13 @@ async def create_attributename(entry: AttributeCreate, db: AsyncSession = Depend
         }
         return JSONResponse(content=response_data)
 
-    except IntegrityError:
+    except HTTPException:
+        await db.rollback()
+        raise
+    except IntegrityError as ie:
+        # Name duplicates return no row above; this is any other constraint, e.g. an id clash
         await db.rollback()
-        raise HTTPException(status_code=400, detail="Integrity Error: Duplicate noun entry.")
+        raise HTTPException(status_code=409, detail=f"Integrity Error: {str(ie.orig)}")
     except SQLAlchemyError as sql_err:
         await db.rollback()
         raise HTTPException(status_code=500, detail=f"Database error: {str(sql_err)}")
@@ -132,69 +133,43 @@ async def create_attributename(entry: AttributeCreate, db: AsyncSession = Depend
 
 # Updating an existing noun
 @app.put("/Attribute/{attribute_id}", response_model=AttributeResponse)
-async def update_attribute_name(attribute_id: str, entry: AttributeUpdate, db: AsyncSession = Depends(get_db)):
+@app.patch("/Attribute/{attribute_id}", response_model=AttributeResponse)
+@query_budget(2)
+async def update_attribute_name(
+    attribute_id: str,
+    entry: AttributeUpdate,
+    response: Response,
+    if_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_db),
+):
     try:
-        # Fetch the existing attribute by attribute_id
-        existing_attribute = await db.execute(
-            text(f"SELECT * FROM {TABLE_NAME} WHERE attribute_id = :attribute_id"),
-            {"attribute_id": attribute_id}
+        updated_row = await patch_row(
+            db, TABLE_NAME, "attribute_id", attribute_id, BULK_UPDATE_COLUMNS, entry.dict(), LIST_COLUMNS, if_match,
+            f"Attribute with id {attribute_id} not found."
         )
-        row = existing_attribute.fetchone()
-
-        if row is None:
-            raise HTTPException(status_code=404, detail=f"Attribute with id {attribute_id} not found.")
-
-        # Update the fields that are provided (allow partial updates)
-        update_data = {
-            "attribute_name": entry.attribute_name if entry.attribute_name else row[1],
-            "abbreviation": entry.abbreviation if entry.abbreviation else row[2],
-            "description": entry.description if entry.description else row[3],
-            "isactive": entry.isactive if entry.isactive is not None else row[4]
-        }
-
-        # Update the attribute in the database
-        query = text(f"""
-            UPDATE {TABLE_NAME} 
-            SET attribute_name = :attribute_name, abbreviation = :abbreviation, description = :description, isactive = :isactive
-            WHERE attribute_id = :attribute_id
-            RETURNING attribute_id, attribute_name, abbreviation, description, isactive
-        """)
-        result = await db.execute(query, {
-            "attribute_id": attribute_id,
-            "attribute_name": update_data["attribute_name"],
-            "abbreviation": update_data["abbreviation"],
-            "description": update_data["description"],
-            "isactive": update_data["isactive"]
-        })
+        await invalidate(db, TABLE_NAME)
         await db.commit()
 
-        updated_row = result.fetchone()
-
-        # Create the response format
-        response_data = [
-            {
-                "attribute_id": updated_row[0],
-                "nounmodifier_id": row[5],  # Assuming you have this in the original row
-                "attribute_name": updated_row[1],
-                "abbreviation": updated_row[2],
-                "description": updated_row[3],
-                "isactive": updated_row[4]
-            }
-        ]
-
+        response.headers["ETag"] = etag(updated_row.row_version)
         return {
             "message": "Attribute updated successfully",
-            "data": response_data  # Return the updated attribute in a list
+            "data": LIST_ENCODER.rows([updated_row])
         }
 
+    except HTTPException:
+        await db.rollback()
+        raise
+    except IntegrityError as ie:
+        await db.rollback()
+        raise HTTPException(status_code=409, detail=f"Integrity Error: {str(ie.orig)}")
     except Exception as e:
         await db.rollback()
         raise HTTPException(status_code=500, detail=f"Internal Server Error: {str(e)}")
 
 
-
 # Deleting a noun using noun_id
 @app.delete("/Attribute/{attribute_id}", response_model=dict)
+@query_budget(3)
 async def delete_noun(attribute_id: str, db: AsyncSession = Depends(get_db)):
     try:
         query_check = text(f"""
@@ -213,9 +188,81 @@ async def delete_noun(attribute_id: str, db: AsyncSession = Depends(get_db)):
             WHERE attribute_id = :attribute_id
         """)
         await db.execute(query_delete, {"attribute_id": attribute_id})
+        await invalidate(db, TABLE_NAME)
         await db.commit()
 
         return {"message": "AttributeName entry deleted successfully"}
     except Exception as e:
         await db.rollback()
-        raise HTTPException(status_code=400, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@app.post("/bulk", response_model=BulkResponse)
+@query_budget(3)
+async def bulk_create_attributes(entries: List[AttributeCreate], db: AsyncSession = Depends(get_db)):
+    try:
+        results = await bulk_create(
+            db, [entry.dict() for entry in entries], TABLE_NAME, "attribute_id", BULK_CREATE_COLUMNS, attribute_ids, "attribute_name"
+        )
+        await invalidate(db, TABLE_NAME)
+        await db.commit()
+        return {"message": "success", "results": results}
+    except SQLAlchemyError as sql_err:
+        await db.rollback()
+        raise HTTPException(status_code=500, detail=f"Database error: {str(sql_err)}")
+
+
+@app.put("/bulk", response_model=BulkResponse)
+@query_budget(2)
+async def bulk_update_attributes(entries: List[AttributeBulkUpdate], db: AsyncSession = Depends(get_db)):
+    try:
+        results = await bulk_update(db, [entry.dict() for entry in entries], TABLE_NAME, "attribute_id", BULK_UPDATE_COLUMNS, "attribute_name")
+        await invalidate(db, TABLE_NAME)
+        await db.commit()
+        return {"message": "success", "results": results}
+    except IntegrityError as ie:
+        await db.rollback()
+        raise HTTPException(status_code=409, detail=f"Integrity Error: {str(ie.orig)}")
+    except SQLAlchemyError as sql_err:
+        await db.rollback()
+        raise HTTPException(status_code=500, detail=f"Database error: {str(sql_err)}")
+
+
+@app.post("/bulk/delete", response_model=BulkResponse)
+@query_budget(2)
+async def bulk_delete_attributes(entry: BulkDelete, db: AsyncSession = Depends(get_db)):
+    try:
+        results = await bulk_delete(db, entry.ids, TABLE_NAME, "attribute_id")
+        await invalidate(db, TABLE_NAME)
+        await db.commit()
+        return {"message": "success", "results": results}
+    except IntegrityError:
+        await db.rollback()
+        raise HTTPException(status_code=409, detail="Some of these rows are still referenced; nothing was deleted")
+    except SQLAlchemyError as sql_err:
+        await db.rollback()
+        raise HTTPException(status_code=500, detail=f"Database error: {str(sql_err)}")
+
+
+# Deactivates or deletes every row matching ids and/or column filters in one
+# statement; with dry_run only the counts are returned
+@app.post("/bulk/filter", response_model=BulkFilterResponse)
+@query_budget(2)
+async def bulk_filter_attributes(entry: BulkFilterAction, db: AsyncSession = Depends(get_db)):
+    try:
+        counts = await bulk_filter_action(
+            db, TABLE_NAME, "attribute_id", FILTER_COLUMNS, entry.action, entry.ids, entry.where, entry.dry_run
+        )
+        if counts["affected"] and not entry.dry_run:
+            await invalidate(db, TABLE_NAME)
+        await db.commit()
+        return {"message": "success", **counts}
+    except HTTPException:
+        await db.rollback()
+        raise
+    except IntegrityError:
+        await db.rollback()
+        raise HTTPException(status_code=409, detail="Some matching rows are still referenced; nothing was changed")
+    except SQLAlchemyError as sql_err:
+        await db.rollback()
+        raise HTTPException(status_code=500, detail=f"Database error: {str(sql_err)}")
@@ -1,11 +1,20 @@
-import pandas as pd
-from fastapi import APIRouter, HTTPException, Depends, File, UploadFile
+from fastapi import APIRouter, HTTPException, Depends, File, UploadFile, Request, Query, Header, Response
 from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from fastapi.middleware.cors import CORSMiddleware
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from src.db .database import get_db
-from src.model.attributevalueschemas import Attribute_valueData, Attribute_valueResponse, Attribute_valueUpdate,attribute_valueCreate
+from src.db.idallocator import attribute_value_ids
+from src.model.attributevalueschemas import Attribute_valueData, Attribute_valueResponse, Attribute_valueUpdate,attribute_valueCreate, Attribute_valueBulkUpdate
+from src.model.bulkschemas import BulkDelete, BulkResponse, BulkFilterAction, BulkFilterResponse
+from src.utils.pagination import PageParams, keyset_query, split_page
+from src.utils.streaming import streaming_media_type, stream_table
+from src.utils.cache import list_cache, invalidate
+from src.utils.serialization import RowEncoder
+from src.utils.changes import delta_response
+from src.utils.querybudget import query_budget
+from src.utils.patch import patch_row, etag
+from src.utils.bulkops import bulk_create, bulk_update, bulk_delete, bulk_filter_action
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy import text
 from typing import List, Optional
@@ -15,73 +24,65 @@ from sqlalchemy.exc import IntegrityError, SQLAlchemyError
 app = APIRouter()
 
 TABLE_NAME = "attribute_value_master"
+LIST_COLUMNS = "attribute_value_id, attribute_value, attribute_value_desc, attribute_value_abbr, remarks, isactive, nounmodifier_id, row_version"
+LIST_ENCODER = RowEncoder(Attribute_valueData, LIST_COLUMNS)
+BULK_COLUMNS = {
+    "attribute_value": "text", "attribute_value_desc": "text", "remarks": "text",
+    "isactive": "boolean", "nounmodifier_id": "text", "attribute_value_abbr": "text"
+}
+# Columns the /bulk/filter route may filter on, with their SQL types
+FILTER_COLUMNS = {"nounmodifier_id": "text", "attribute_value": "text", "isactive": "boolean"}
 
 async def generate_attribute_value_id(db: AsyncSession) -> str:
-    # Fetch the maximum existing attribute_value_id
-    query = text("SELECT MAX(attribute_value_id) FROM attribute_value_master")
-    result = await db.execute(query)
-    last_id = result.scalar()
-
-    if last_id:
-        # Extract the numeric part and increment it
-        try:
-            prefix, num_part = last_id.split('_')
-            new_id_number = int(num_part) + 1
-            return f"{prefix}_{new_id_number:04d}"  # Pad with leading zeros
-        except ValueError:
-            raise HTTPException(status_code=500, detail=f"Invalid attribute_value_id format: {last_id}")
-    else:
-        return "ATRV_0001"  # Start with this if no entries exist
+    return await attribute_value_ids.next_id(db)
 
 @app.get("/attribute_values", response_model=Attribute_valueResponse)
-async def get_attribute_values(db: AsyncSession = Depends(get_db)):
+@query_budget(2)
+async def get_attribute_values(
+    request: Request,
+    page: PageParams = Depends(),
+    since: Optional[str] = Query(None, description="Token from a previous sync; returns only rows changed since then"),
+    db: AsyncSession = Depends(get_db),
+):
     try:
-        query = text(
-            "SELECT attribute_value_id, attribute_value, attribute_value_desc, attribute_value_abbr, remarks, isactive, nounmodifier_id "
-            "FROM attribute_value_master "
-            "ORDER BY attribute_value_id"
-        )
-        result = await db.execute(query)
-        rows = result.fetchall()
-
-        attribute_value = [
-            Attribute_valueData(
-                attribute_value_id=row[0],
-                attribute_value=row[1],
-                attribute_value_desc=row[2],
-                attribute_value_abbr=row[3],
-                remarks=row[4],
-                isactive=row[5],
-                nounmodifier_id=row[6]
-            ) for row in rows
-        ]
-
-        return Attribute_valueResponse(message="success", data=attribute_value)
+        if since is not None:
+            return await delta_response(db, since, LIST_COLUMNS, TABLE_NAME, "attribute_value_id", LIST_ENCODER, page)
+
+        media_type = streaming_media_type(request)
+        if media_type:
+            return stream_table(LIST_COLUMNS, TABLE_NAME, "attribute_value_id", page, media_type)
+
+        cached = list_cache.lookup(request, TABLE_NAME, page)
+        if cached:
+            return cached
+        version = list_cache.version(TABLE_NAME)
+
+        query, params = keyset_query(LIST_COLUMNS, TABLE_NAME, "attribute_value_id", page)
+        result = await db.execute(query, params)
+        rows, next_cursor = split_page(result.fetchall(), page)
+
+        return list_cache.store(request, TABLE_NAME, page, version, LIST_ENCODER.page(rows, next_cursor))
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 @app.post("/attribute_value", response_model=Attribute_valueResponse)
+@query_budget(3)
 async def create_attribute_value(entry: attribute_valueCreate, db: AsyncSession = Depends(get_db)):
     try:
         # Validate that attribute_value is not empty or just whitespace
         if not entry.attribute_value.strip():
             raise HTTPException(status_code=400, detail="Attribute value cannot be an empty string or just whitespace.")
 
-        # Check if the attribute_value already exists to prevent duplicates
-        existing_attribute_value = await db.execute(
-            text("SELECT 1 FROM attribute_value_master WHERE attribute_value = :attribute_value"),
-            {"attribute_value": entry.attribute_value}
-        )
-        if existing_attribute_value.fetchone():
-            raise HTTPException(status_code=400, detail="Attribute value already exists.")
-
         # Generate new attribute_value_id
         new_attribute_value_id = await generate_attribute_value_id(db)
 
-        # Insert into the database
+        # Insert into the database; duplicates (trimmed, case-folded) return no row
         query = text("""
             INSERT INTO attribute_value_master (attribute_value_id, attribute_value, attribute_value_desc, remarks, isactive, nounmodifier_id, attribute_value_abbr)
             VALUES (:attribute_value_id, :attribute_value, :attribute_value_desc, :remarks, :isactive, :nounmodifier_id, :attribute_value_abbr)
+            ON CONFLICT (lower(btrim(attribute_value))) DO NOTHING
             RETURNING attribute_value_id, attribute_value, attribute_value_desc, remarks, isactive, nounmodifier_id, attribute_value_abbr
         """)
         result = await db.execute(query, {
@@ -93,10 +94,14 @@ async def create_attribute_value(entry: attribute_valueCreate, db: AsyncSession
             "nounmodifier_id": entry.nounmodifier_id,
             "attribute_value_abbr": entry.attribute_value_abbr
         })
+        inserted_values = result.fetchone()
+        if inserted_values is None:
+            raise HTTPException(status_code=400, detail="Attribute value already exists.")
+
+        await invalidate(db, TABLE_NAME)
         await db.commit()
 
-        # Fetch and return the inserted values
-        inserted_values = result.fetchone()
+        # Return the inserted values
         return {
             "message": "success",
             "data": [{
@@ -111,9 +116,13 @@ async def create_attribute_value(entry: attribute_valueCreate, db: AsyncSession
         }
         return JSONResponse(content=response_data)
 
-    except IntegrityError:
+    except HTTPException:
+        await db.rollback()
+        raise
+    except IntegrityError as ie:
+        # Name duplicates return no row above; this is any other constraint, e.g. an id clash
         await db.rollback()
-        raise HTTPException(status_code=400, detail="Integrity Error: Duplicate attribute_value entry.")
+        raise HTTPException(status_code=409, detail=f"Integrity Error: {str(ie.orig)}")
     except SQLAlchemyError as sql_err:
         await db.rollback()
         raise HTTPException(status_code=500, detail=f"Database error: {str(sql_err)}")
@@ -123,90 +132,52 @@ async def create_attribute_value(entry: attribute_valueCreate, db: AsyncSession
 
 
 @app.put("/AttributeValue/{attribute_value_id}", response_model=Attribute_valueResponse)
-async def update_attribute_value(attribute_value_id: str, entry: Attribute_valueUpdate, db: AsyncSession = Depends(get_db)):
+@app.patch("/AttributeValue/{attribute_value_id}", response_model=Attribute_valueResponse)
+@query_budget(2)
+async def update_attribute_value(
+    attribute_value_id: str,
+    entry: Attribute_valueUpdate,
+    response: Response,
+    if_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_db),
+):
     try:
         # Ensure attribute_value_id follows the expected pattern
         if not attribute_value_id.startswith("ATRV_"):
             raise HTTPException(status_code=400, detail="Invalid attribute_value_id format.")
 
-        # Fetch the existing attribute value by attribute_value_id
-        existing_attribute_value = await db.execute(
-            text(f"SELECT * FROM {TABLE_NAME} WHERE attribute_value_id = :attribute_value_id"),
-            {"attribute_value_id": attribute_value_id}
+        updated_row = await patch_row(
+            db, TABLE_NAME, "attribute_value_id", attribute_value_id, BULK_COLUMNS, entry.dict(), LIST_COLUMNS, if_match,
+            f"Attribute value with id {attribute_value_id} not found."
         )
-        row = existing_attribute_value.fetchone()
-
-        if row is None:
-            raise HTTPException(status_code=404, detail=f"Attribute value with id {attribute_value_id} not found.")
-
-        # Update the fields that are provided (allow partial updates)
-        update_data = {
-            "attribute_value": entry.attribute_value if entry.attribute_value else row[1],
-            "attribute_value_desc": entry.attribute_value_desc if entry.attribute_value_desc else row[2],
-            "remarks": entry.remarks if entry.remarks else row[3],
-            "isactive": entry.isactive if entry.isactive is not None else row[4],
-            "attribute_value_abbr": entry.attribute_value_abbr if entry.attribute_value_abbr else row[5],
-            "nounmodifier_id": entry.nounmodifier_id if entry.nounmodifier_id else row[6]
-        }
-
-        # Update the attribute value in the database
-        query = text(f"""
-            UPDATE {TABLE_NAME}
-            SET attribute_value = :attribute_value,
-                attribute_value_desc = :attribute_value_desc,
-                remarks = :remarks,
-                isactive = :isactive,
-                attribute_value_abbr = :attribute_value_abbr,
-                nounmodifier_id = :nounmodifier_id
-            WHERE attribute_value_id = :attribute_value_id
-            RETURNING attribute_value_id, attribute_value, attribute_value_desc, remarks, isactive, attribute_value_abbr, nounmodifier_id
-        """)
-        result = await db.execute(query, {
-            "attribute_value_id": attribute_value_id,
-            "attribute_value": update_data["attribute_value"],
-            "attribute_value_desc": update_data["attribute_value_desc"],
-            "remarks": update_data["remarks"],
-            "isactive": update_data["isactive"],
-            "attribute_value_abbr": update_data["attribute_value_abbr"],
-            "nounmodifier_id": update_data["nounmodifier_id"]
-        })
+        await invalidate(db, TABLE_NAME)
         await db.commit()
 
-        updated_row = result.fetchone()
-        if not updated_row:
-            raise HTTPException(status_code=404, detail="Attribute value not found after update.")
-
-        # Create the response format
-        response_data = [
-            {
-                "attribute_value_id": updated_row[0],
-                "attribute_value": updated_row[1],
-                "attribute_value_desc": updated_row[2],
-                "remarks": updated_row[3],
-                "isactive": updated_row[4],
-                "attribute_value_abbr": updated_row[5],
-                "nounmodifier_id": updated_row[6]
-            }
-        ]
-
+        response.headers["ETag"] = etag(updated_row.row_version)
         return {
             "message": "Attribute value updated successfully",
-            "data": response_data  # Return the updated attribute value wrapped in a list
+            "data": LIST_ENCODER.rows([updated_row])
         }
 
+    except HTTPException:
+        await db.rollback()
+        raise
+    except IntegrityError as ie:
+        await db.rollback()
+        raise HTTPException(status_code=409, detail=f"Integrity Error: {str(ie.orig)}")
     except Exception as e:
         await db.rollback()
         raise HTTPException(status_code=500, detail=f"Internal Server Error: {str(e)}")
 
 
-
-
 @app.delete("/{attribute_value_id}", response_model=dict)
+@query_budget(2)
 async def delete_attribute_value(attribute_value_id: str, db: AsyncSession = Depends(get_db)):
     try:
         query = text(f"DELETE FROM {TABLE_NAME} WHERE attribute_value_id = :attribute_value_id")
         result = await db.execute(query, {
             "attribute_value_id": attribute_value_id})  # Ensure attribute_value_id is passed as a string
+        await invalidate(db, TABLE_NAME)
         await db.commit()
 
         if result.rowcount == 0:
@@ -216,4 +187,76 @@ async def delete_attribute_value(attribute_value_id: str, db: AsyncSession = Dep
 
     except Exception as e:
         await db.rollback()
-        raise HTTPException(status_code=400, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@app.post("/bulk", response_model=BulkResponse)
+@query_budget(3)
+async def bulk_create_attribute_values(entries: List[attribute_valueCreate], db: AsyncSession = Depends(get_db)):
+    try:
+        results = await bulk_create(
+            db, [entry.dict() for entry in entries], TABLE_NAME, "attribute_value_id", BULK_COLUMNS, attribute_value_ids, "attribute_value"
+        )
+        await invalidate(db, TABLE_NAME)
+        await db.commit()
+        return {"message": "success", "results": results}
+    except SQLAlchemyError as sql_err:
+        await db.rollback()
+        raise HTTPException(status_code=500, detail=f"Database error: {str(sql_err)}")
+
+
+@app.put("/bulk", response_model=BulkResponse)
+@query_budget(2)
+async def bulk_update_attribute_values(entries: List[Attribute_valueBulkUpdate], db: AsyncSession = Depends(get_db)):
+    try:
+        results = await bulk_update(db, [entry.dict() for entry in entries], TABLE_NAME, "attribute_value_id", BULK_COLUMNS, "attribute_value")
+        await invalidate(db, TABLE_NAME)
+        await db.commit()
+        return {"message": "success", "results": results}
+    except IntegrityError as ie:
+        await db.rollback()
+        raise HTTPException(status_code=409, detail=f"Integrity Error: {str(ie.orig)}")
+    except SQLAlchemyError as sql_err:
+        await db.rollback()
+        raise HTTPException(status_code=500, detail=f"Database error: {str(sql_err)}")
+
+
+# A POST because DELETE /bulk would be routed to delete_attribute_value
+@app.post("/bulk/delete", response_model=BulkResponse)
+@query_budget(2)
+async def bulk_delete_attribute_values(entry: BulkDelete, db: AsyncSession = Depends(get_db)):
+    try:
+        results = await bulk_delete(db, entry.ids, TABLE_NAME, "attribute_value_id")
+        await invalidate(db, TABLE_NAME)
+        await db.commit()
+        return {"message": "success", "results": results}
+    except IntegrityError:
+        await db.rollback()
+        raise HTTPException(status_code=409, detail="Some of these rows are still referenced; nothing was deleted")
+    except SQLAlchemyError as sql_err:
+        await db.rollback()
+        raise HTTPException(status_code=500, detail=f"Database error: {str(sql_err)}")
+
+
+# Deactivates or deletes every row matching ids and/or column filters in one
+# statement; with dry_run only the counts are returned
+@app.post("/bulk/filter", response_model=BulkFilterResponse)
+@query_budget(2)
+async def bulk_filter_attribute_values(entry: BulkFilterAction, db: AsyncSession = Depends(get_db)):
+    try:
+        counts = await bulk_filter_action(
+            db, TABLE_NAME, "attribute_value_id", FILTER_COLUMNS, entry.action, entry.ids, entry.where, entry.dry_run
+        )
+        if counts["affected"] and not entry.dry_run:
+            await invalidate(db, TABLE_NAME)
+        await db.commit()
+        return {"message": "success", **counts}
+    except HTTPException:
+        await db.rollback()
+        raise
+    except IntegrityError:
+        await db.rollback()
+        raise HTTPException(status_code=409, detail="Some matching rows are still referenced; nothing was changed")
+    except SQLAlchemyError as sql_err:
+        await db.rollback()
+        raise HTTPException(status_code=500, detail=f"Database error: {str(sql_err)}")
@@ -0,0 +1,153 @@
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import text
+from sqlalchemy.exc import SQLAlchemyError
+from src.db.database import get_db
+from src.db.schema import SHORT_DESCRIPTIONS_TABLE
+from src.model.catalogschemas import CatalogBatch, CatalogResponse, ShortDescriptionResponse
+from src.utils.querybudget import query_budget
+from typing import List
+
+app = APIRouter()
+
+MAX_BATCH_IDS = 500
+
+# One statement per level of the document, each keyed by nounmodifier_id so a
+# batch of ids costs the same four round-trips as a single one
+HEADER_QUERY = text("""
+    SELECT nm.nounmodifier_id, nm.noun_modifier, nm.abbreviation, nm.description, nm.isactive,
+           n.noun_id, n.noun, n.abbreviation AS noun_abbreviation, n.description AS noun_description, n.isactive AS noun_isactive,
+           m.modifier_id, m.modifier, m.abbreviation AS modifier_abbreviation, m.description AS modifier_description,
+           m.isactive AS modifier_isactive
+    FROM nounmodifier_combined nm
+    LEFT JOIN noun_mstr n ON n.noun_id = nm.noun_id
+    LEFT JOIN modifier_mstr m ON m.modifier_id = nm.modifier_id
+    WHERE nm.nounmodifier_id = ANY(CAST(:ids AS text[]))
+""")
+CHILD_QUERIES = {
+    "attributes": text("""
+        SELECT attribute_id, nounmodifier_id, attribute_name, abbreviation, description, isactive
+        FROM attribute_master
+        WHERE nounmodifier_id = ANY(CAST(:ids AS text[]))
+        ORDER BY attribute_id
+    """),
+    "attribute_values": text("""
+        SELECT attribute_value_id, attribute_value, attribute_value_desc, attribute_value_abbr, remarks, isactive, nounmodifier_id
+        FROM attribute_value_master
+        WHERE nounmodifier_id = ANY(CAST(:ids AS text[]))
+        ORDER BY attribute_value_id
+    """),
+    "manufacturers": text("""
+        SELECT manufacturid, manufacturname, manufacturdesc, remarks, isactive, nounmodifier_id
+        FROM manufacturer_master
+        WHERE nounmodifier_id = ANY(CAST(:ids AS text[]))
+        ORDER BY manufacturid
+    """),
+}
+
+# Maintained by triggers (src/db/schema.py), so a read is one primary-key lookup
+SHORT_DESCRIPTION_QUERY = text(f"""
+    SELECT nounmodifier_id, description, full_length, max_length, updated_at
+    FROM {SHORT_DESCRIPTIONS_TABLE}
+    WHERE nounmodifier_id = ANY(CAST(:ids AS text[]))
+""")
+
+
+async def build_catalog(db: AsyncSession, ids: List[str]):
+    ids = list(dict.fromkeys(ids))
+    result = await db.execute(HEADER_QUERY, {"ids": ids})
+    documents = {}
+    for row in result.fetchall():
+        documents[row.nounmodifier_id] = {
+            "nounmodifier_id": row.nounmodifier_id,
+            "noun_modifier": row.noun_modifier,
+            "abbreviation": row.abbreviation,
+            "description": row.description,
+            "isactive": row.isactive,
+            "noun": {
+                "noun_id": row.noun_id,
+                "noun": row.noun,
+                "abbreviation": row.noun_abbreviation,
+                "description": row.noun_description,
+                "isactive": row.noun_isactive,
+            } if row.noun_id is not None else None,
+            "modifier": {
+                "modifier_id": row.modifier_id,
+                "modifier": row.modifier,
+                "abbreviation": row.modifier_abbreviation,
+                "description": row.modifier_description,
+                "isactive": row.modifier_isactive,
+            } if row.modifier_id is not None else None,
+            "attributes": [],
+            "attribute_values": [],
+            "manufacturers": [],
+        }
+
+    found = list(documents)
+    if found:
+        for key, query in CHILD_QUERIES.items():
+            result = await db.execute(query, {"ids": found})
+            for row in result.mappings():
+                documents[row["nounmodifier_id"]][key].append(dict(row))
+
+    data = [documents[nounmodifier_id] for nounmodifier_id in ids if nounmodifier_id in documents]
+    missing = [nounmodifier_id for nounmodifier_id in ids if nounmodifier_id not in documents]
+    return data, missing
+
+
+async def get_short_descriptions(db: AsyncSession, ids: List[str]):
+    ids = list(dict.fromkeys(ids))
+    result = await db.execute(SHORT_DESCRIPTION_QUERY, {"ids": ids})
+    found = {row["nounmodifier_id"]: dict(row) for row in result.mappings()}
+    data = [found[nounmodifier_id] for nounmodifier_id in ids if nounmodifier_id in found]
+    missing = [nounmodifier_id for nounmodifier_id in ids if nounmodifier_id not in found]
+    return data, missing
+
+
+@app.get("/{nounmodifier_id}", response_model=CatalogResponse)
+@query_budget(4)
+async def get_catalog(nounmodifier_id: str, db: AsyncSession = Depends(get_db)):
+    try:
+        data, missing = await build_catalog(db, [nounmodifier_id])
+        if not data:
+            raise HTTPException(status_code=404, detail="Noun-modifier not found")
+        return {"message": "success", "data": data}
+    except SQLAlchemyError as sql_err:
+        raise HTTPException(status_code=500, detail=f"Database error: {str(sql_err)}")
+
+
+# POST so a large id list travels in the body rather than the query string
+@app.post("/batch", response_model=CatalogResponse)
+@query_budget(4)
+async def get_catalog_batch(batch: CatalogBatch, db: AsyncSession = Depends(get_db)):
+    if len(batch.ids) > MAX_BATCH_IDS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BATCH_IDS} ids per request")
+    try:
+        data, missing = await build_catalog(db, batch.ids)
+        return {"message": "success", "data": data, "missing": missing}
+    except SQLAlchemyError as sql_err:
+        raise HTTPException(status_code=500, detail=f"Database error: {str(sql_err)}")
+
+
+@app.get("/{nounmodifier_id}/short-description", response_model=ShortDescriptionResponse)
+@query_budget(1)
+async def get_short_description(nounmodifier_id: str, db: AsyncSession = Depends(get_db)):
+    try:
+        data, missing = await get_short_descriptions(db, [nounmodifier_id])
+        if not data:
+            raise HTTPException(status_code=404, detail="Noun-modifier not found")
+        return {"message": "success", "data": data}
+    except SQLAlchemyError as sql_err:
+        raise HTTPException(status_code=500, detail=f"Database error: {str(sql_err)}")
+
+
+@app.post("/short-descriptions", response_model=ShortDescriptionResponse)
+@query_budget(1)
+async def get_short_description_batch(batch: CatalogBatch, db: AsyncSession = Depends(get_db)):
+    if len(batch.ids) > MAX_BATCH_IDS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BATCH_IDS} ids per request")
+    try:
+        data, missing = await get_short_descriptions(db, batch.ids)
+        return {"message": "success", "data": data, "missing": missing}
+    except SQLAlchemyError as sql_err:
+        raise HTTPException(status_code=500, detail=f"Database error: {str(sql_err)}")
@@ -0,0 +1,33 @@
+from typing import Optional
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from src.db.database import get_db
+from src.model.dedupeschemas import DedupeRequest, DedupeJobStatus, DedupeClusterPage
+from src.model.jobschemas import JobAccepted
+from src.utils.dedupejobs import dedupe_jobs
+from src.utils.pagination import PageParams
+
+app = APIRouter()
+
+
+# Returns straight away; poll the status_url, then page through the clusters
+@app.post("/", status_code=202, response_model=JobAccepted)
+async def start_dedupe(entry: DedupeRequest, db: AsyncSession = Depends(get_db)):
+    job_id = await dedupe_jobs.submit(db, entry.sources, entry.threshold)
+    return {"message": "Duplicate scan accepted for processing.", "job_id": job_id, "status_url": f"/dedupe/{job_id}"}
+
+
+@app.get("/{job_id}", response_model=DedupeJobStatus)
+async def get_dedupe_job(job_id: str, db: AsyncSession = Depends(get_db)):
+    return await dedupe_jobs.get(db, job_id)
+
+
+@app.get("/{job_id}/clusters", response_model=DedupeClusterPage)
+async def get_dedupe_clusters(
+    job_id: str,
+    page: PageParams = Depends(),
+    source: Optional[str] = Query(None, description="Only clusters from this source, e.g. manufacturer"),
+    db: AsyncSession = Depends(get_db),
+):
+    rows, next_cursor = await dedupe_jobs.clusters(db, job_id, page, source)
+    return {"message": "success", "next_cursor": next_cursor, "data": rows}
@@ -0,0 +1,29 @@
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from src.db.database import get_db
+from src.model.jobschemas import JobList, JobProgress, JobStatus
+from src.utils.jobs import upload_jobs
+
+app = APIRouter()
+
+
+@app.get("/", response_model=JobList)
+async def list_jobs(limit: int = Query(50, ge=1, le=500), db: AsyncSession = Depends(get_db)):
+    return {"message": "success", "data": await upload_jobs.recent(db, limit)}
+
+
+@app.get("/{job_id}", response_model=JobStatus)
+async def get_job(job_id: str, db: AsyncSession = Depends(get_db)):
+    return await upload_jobs.get(db, job_id)
+
+
+# Same numbers without the bookkeeping fields, for polling
+@app.get("/{job_id}/progress", response_model=JobProgress)
+async def get_job_progress(job_id: str, db: AsyncSession = Depends(get_db)):
+    return await upload_jobs.get(db, job_id)
+
+
+@app.post("/{job_id}/resume", response_model=JobStatus)
+async def resume_job(job_id: str, db: AsyncSession = Depends(get_db)):
+    await upload_jobs.resume(db, job_id)
+    return await upload_jobs.get(db, job_id)
@@ -1,11 +1,20 @@
-import pandas as pd
-from fastapi import APIRouter, HTTPException, Depends, File, UploadFile
+from fastapi import APIRouter, HTTPException, Depends, File, UploadFile, Request, Query, Header, Response
 from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from fastapi.middleware.cors import CORSMiddleware
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from src.db .database import get_db
-from src.model.manufactureschemas import ManufacturerCreate, ManufacturerData, ManufacturerResponse,ManufacturerUpdate
+from src.db.idallocator import manufacturer_ids
+from src.model.manufactureschemas import ManufacturerCreate, ManufacturerData, ManufacturerResponse,ManufacturerUpdate, ManufacturerBulkUpdate
+from src.model.bulkschemas import BulkDelete, BulkResponse, BulkFilterAction, BulkFilterResponse
+from src.utils.pagination import PageParams, keyset_query, split_page
+from src.utils.streaming import streaming_media_type, stream_table
+from src.utils.cache import list_cache, invalidate
+from src.utils.serialization import RowEncoder
+from src.utils.changes import delta_response
+from src.utils.querybudget import query_budget
+from src.utils.patch import patch_row, etag
+from src.utils.bulkops import bulk_create, bulk_update, bulk_delete, bulk_filter_action
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy import text
 from typing import List, Optional
@@ -15,78 +24,71 @@ from sqlalchemy.exc import IntegrityError, SQLAlchemyError
 app = APIRouter()
 
 TABLE_NAME = "manufacturer_master"
+LIST_COLUMNS = "manufacturid, manufacturname, manufacturdesc, remarks, isactive, nounmodifier_id, row_version"
+LIST_ENCODER = RowEncoder(ManufacturerData, LIST_COLUMNS, converters={
+    "manufacturid": str,
+    "remarks": lambda value: str(value) if value is not None else "",
+    "isactive": bool,
+    "nounmodifier_id": lambda value: str(value) if value is not None else None,
+})
+BULK_CREATE_COLUMNS = {"manufacturname": "text", "manufacturdesc": "text", "remarks": "text", "isactive": "boolean", "nounmodifier_id": "text"}
+BULK_UPDATE_COLUMNS = {"manufacturname": "text", "manufacturdesc": "text", "remarks": "text", "isactive": "boolean", "nounmodifier_id": "text"}
+# Columns the /bulk/filter route may filter on, with their SQL types
+FILTER_COLUMNS = {"nounmodifier_id": "text", "manufacturname": "text", "isactive": "boolean"}
 
 async def generate_manufacturid(db: AsyncSession) -> str:
-    # Fetch the maximum existing manufacturid
-    query = text("SELECT MAX(manufacturid) FROM manufacturer_master")
-    result = await db.execute(query)
-    last_id = result.scalar()
-
-    if last_id:
-        # Extract the numeric part and increment it
-        try:
-            prefix, num_part = last_id.split('_')
-            new_id_number = int(num_part) + 1
-            return f"{prefix}_{new_id_number:04d}"  # Pad with leading zeros
-        except ValueError:
-            raise HTTPException(status_code=500, detail=f"Invalid manufacturid format: {last_id}")
-    else:
-        return "MFR_0001"  # Start with this if no entries exist
+    return await manufacturer_ids.next_id(db)
 
 @app.get("/manufacturers", response_model=ManufacturerResponse)
-async def get_manufacturers(db: AsyncSession = Depends(get_db)):
+@query_budget(2)
+async def get_manufacturers(
+    request: Request,
+    page: PageParams = Depends(),
+    since: Optional[str] = Query(None, description="Token from a previous sync; returns only rows changed since then"),
+    db: AsyncSession = Depends(get_db),
+):
     try:
-        query = text(
-            "SELECT manufacturid, manufacturname, manufacturdesc, remarks, isactive, nounmodifier_id "
-            "FROM manufacturer_master "
-            "ORDER BY manufacturid"
-        )
-        result = await db.execute(query)
-        rows = result.fetchall()
-
-        # Map the fetched rows to the ManufacturerData model
-        manufacturers = [
-            ManufacturerData(
-                manufacturid=str(row[0]),  # Ensure it is a string
-                manufacturname=row[1],
-                manufacturdesc=row[2],
-                remarks=str(row[3]) if row[3] is not None else "",  # Ensure remarks is a string
-                isactive=bool(row[4]),  # Convert to boolean
-                nounmodifier_id=str(row[5])  # Ensure it is a string
-                # manufacturer_abbr=str(row[6]) if row[6] is not None else ""  # Ensure abbr is a string
-            ) for row in rows
-        ]
-
-        # Return the structured response
-        return ManufacturerResponse(message="success", data=manufacturers)
+        if since is not None:
+            return await delta_response(db, since, LIST_COLUMNS, TABLE_NAME, "manufacturid", LIST_ENCODER, page)
+
+        media_type = streaming_media_type(request)
+        if media_type:
+            return stream_table(LIST_COLUMNS, TABLE_NAME, "manufacturid", page, media_type)
+
+        cached = list_cache.lookup(request, TABLE_NAME, page)
+        if cached:
+            return cached
+        version = list_cache.version(TABLE_NAME)
+
+        query, params = keyset_query(LIST_COLUMNS, TABLE_NAME, "manufacturid", page)
+        result = await db.execute(query, params)
+        rows, next_cursor = split_page(result.fetchall(), page)
+
+        return list_cache.store(request, TABLE_NAME, page, version, LIST_ENCODER.page(rows, next_cursor))
 
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 
 
 @app.post("/manufacturer")
+@query_budget(3)
 async def create_manufacturer(entry: ManufacturerCreate, db: AsyncSession = Depends(get_db)):
     try:
-        # Generate new manufacturid
-        new_manufacturid = await generate_manufacturid(db)
-
         # Validate that manufacturname is not empty or just whitespace
         if not entry.manufacturname.strip():
             raise HTTPException(status_code=400, detail="Manufacturer name cannot be an empty string or just whitespace")
 
-        # Check if the manufacturer already exists
-        existing_manufacturer = await db.execute(
-            text("SELECT 1 FROM manufacturer_master WHERE manufacturname = :manufacturname"),
-            {"manufacturname": entry.manufacturname}
-        )
-        if existing_manufacturer.fetchone():
-            raise HTTPException(status_code=400, detail="Manufacturer already exists.")
+        # Generate new manufacturid
+        new_manufacturid = await generate_manufacturid(db)
 
-        # Insert into the database
+        # Insert into the database; duplicates (trimmed, case-folded) return no row
         query = text("""
             INSERT INTO manufacturer_master (manufacturid, manufacturname, manufacturdesc, remarks, isactive, nounmodifier_id)
             VALUES (:manufacturid, :manufacturname, :manufacturdesc, :remarks, :isactive, :nounmodifier_id)
+            ON CONFLICT (lower(btrim(manufacturname))) DO NOTHING
             RETURNING manufacturid, manufacturname, manufacturdesc, remarks, isactive, nounmodifier_id
         """)
         result = await db.execute(query, {
@@ -97,10 +99,15 @@ async def create_manufacturer(entry: ManufacturerCreate, db: AsyncSession = Depe
             "isactive": entry.isactive,
             "nounmodifier_id": entry.nounmodifier_id,
         })
+        inserted = result.fetchone()
+        if inserted is None:
+            raise HTTPException(status_code=400, detail="Manufacturer already exists.")
+
+        await invalidate(db, TABLE_NAME)
         await db.commit()
 
         # Fetching the inserted values
-        manufacturid, manufacturname, manufacturdesc, remarks, isactive, nounmodifier_id = result.fetchone()
+        manufacturid, manufacturname, manufacturdesc, remarks, isactive, nounmodifier_id = inserted
 
         # Generate manufacturer abbreviation (e.g., first 3 characters of name or leave empty if not required)
         manufacturer_abbr = manufacturname[:3].upper()
@@ -121,9 +128,13 @@ async def create_manufacturer(entry: ManufacturerCreate, db: AsyncSession = Depe
             ]
         }
 
-    except IntegrityError:
+    except HTTPException:
         await db.rollback()
-        raise HTTPException(status_code=400, detail="Integrity Error: Duplicate manufacturer entry.")
+        raise
+    except IntegrityError as ie:
+        # Name duplicates return no row above; this is any other constraint, e.g. an id clash
+        await db.rollback()
+        raise HTTPException(status_code=409, detail=f"Integrity Error: {str(ie.orig)}")
     except SQLAlchemyError as sql_err:
         await db.rollback()
         raise HTTPException(status_code=500, detail=f"Database error: {str(sql_err)}")
@@ -133,82 +144,47 @@ async def create_manufacturer(entry: ManufacturerCreate, db: AsyncSession = Depe
 
 
 @app.put("/Manufacturer/{manufacturid}", response_model=ManufacturerResponse)
-async def update_manufacturer(manufacturid: str, manufacturer: ManufacturerUpdate, db: AsyncSession = Depends(get_db)):
+@app.patch("/Manufacturer/{manufacturid}", response_model=ManufacturerResponse)
+@query_budget(2)
+async def update_manufacturer(
+    manufacturid: str,
+    entry: ManufacturerUpdate,
+    response: Response,
+    if_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_db),
+):
     try:
-        # Fetch the existing manufacturer by manufacturid
-        existing_manufacturer = await db.execute(
-            text(f"SELECT * FROM {TABLE_NAME} WHERE manufacturid = :manufacturid"),
-            {"manufacturid": manufacturid}
+        updated_row = await patch_row(
+            db, TABLE_NAME, "manufacturid", manufacturid, BULK_UPDATE_COLUMNS, entry.dict(), LIST_COLUMNS, if_match,
+            f"Manufacturer with id {manufacturid} not found."
         )
-        row = existing_manufacturer.fetchone()
-
-        if row is None:
-            raise HTTPException(status_code=404, detail=f"Manufacturer with id {manufacturid} not found.")
-
-        # Update the fields that are provided (allow partial updates)
-        update_data = {
-            "manufacturname": manufacturer.manufacturname if manufacturer.manufacturname is not None else row[1],
-            "manufacturdesc": manufacturer.manufacturdesc if manufacturer.manufacturdesc is not None else row[2],
-            "remarks": manufacturer.remarks if manufacturer.remarks is not None else row[3],
-            "isactive": manufacturer.isactive if manufacturer.isactive is not None else row[4],
-            "nounmodifier_id": manufacturer.nounmodifier_id if manufacturer.nounmodifier_id is not None else row[5]
-            # "manufacturer_abbr": row[6]  
-        }
-
-        # Update the manufacturer in the database
-        query = text(f"""
-            UPDATE {TABLE_NAME}
-            SET manufacturname = :manufacturname,
-                manufacturdesc = :manufacturdesc,
-                remarks = :remarks,
-                isactive = :isactive,
-                nounmodifier_id = :nounmodifier_id
-            WHERE manufacturid = :manufacturid
-            RETURNING manufacturid, manufacturname, manufacturdesc, remarks, isactive
-        """)
-        result = await db.execute(query, {
-            "manufacturid": manufacturid,
-            "manufacturname": update_data["manufacturname"],
-            "manufacturdesc": update_data["manufacturdesc"],
-            "remarks": update_data["remarks"],
-            "isactive": update_data["isactive"],
-            "nounmodifier_id": update_data["nounmodifier_id"]
-        })
+        await invalidate(db, TABLE_NAME)
         await db.commit()
 
-        updated_row = result.fetchone()
-
-        if not updated_row:
-            raise HTTPException(status_code=404, detail="Manufacturer not found")
-
-        # Prepare the response data
-        response_data = {
-            "manufacturid": updated_row[0],
-            "manufacturname": updated_row[1],
-            "manufacturdesc": updated_row[2],
-            "remarks": updated_row[3],
-            "isactive": updated_row[4],
-            # "manufacturer_abbr": updated_row[5],  # Include manufacturer_abbr in response
-            "nounmodifier_id": update_data["nounmodifier_id"]
-        }
-
+        response.headers["ETag"] = etag(updated_row.row_version)
         return {
             "message": "Manufacturer updated successfully",
-            "data": [response_data]  # Return as a list
+            "data": LIST_ENCODER.rows([updated_row])
         }
 
+    except HTTPException:
+        await db.rollback()
+        raise
+    except IntegrityError as ie:
+        await db.rollback()
+        raise HTTPException(status_code=409, detail=f"Integrity Error: {str(ie.orig)}")
     except Exception as e:
         await db.rollback()
         raise HTTPException(status_code=500, detail=f"Internal Server Error: {str(e)}")
 
 
-
-
 @app.delete("/{manufacturid}", response_model=dict)
+@query_budget(2)
 async def delete_manufacturer(manufacturid: str, db: AsyncSession = Depends(get_db)):
     try:
         query = text(f"DELETE FROM {TABLE_NAME} WHERE manufacturid = :manufacturid")
         result = await db.execute(query, {"manufacturid": manufacturid})  # Ensure manufacturid is passed as a string
+        await invalidate(db, TABLE_NAME)
         await db.commit()
 
         if result.rowcount == 0:
@@ -218,4 +194,76 @@ async def delete_manufacturer(manufacturid: str, db: AsyncSession = Depends(get_
     
     except Exception as e:
         await db.rollback()
-        raise HTTPException(status_code=400, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@app.post("/bulk", response_model=BulkResponse)
+@query_budget(3)
+async def bulk_create_manufacturers(entries: List[ManufacturerCreate], db: AsyncSession = Depends(get_db)):
+    try:
+        results = await bulk_create(
+            db, [entry.dict() for entry in entries], TABLE_NAME, "manufacturid", BULK_CREATE_COLUMNS, manufacturer_ids, "manufacturname"
+        )
+        await invalidate(db, TABLE_NAME)
+        await db.commit()
+        return {"message": "success", "results": results}
+    except SQLAlchemyError as sql_err:
+        await db.rollback()
+        raise HTTPException(status_code=500, detail=f"Database error: {str(sql_err)}")
+
+
+@app.put("/bulk", response_model=BulkResponse)
+@query_budget(2)
+async def bulk_update_manufacturers(entries: List[ManufacturerBulkUpdate], db: AsyncSession = Depends(get_db)):
+    try:
+        results = await bulk_update(db, [entry.dict() for entry in entries], TABLE_NAME, "manufacturid", BULK_UPDATE_COLUMNS, "manufacturname")
+        await invalidate(db, TABLE_NAME)
+        await db.commit()
+        return {"message": "success", "results": results}
+    except IntegrityError as ie:
+        await db.rollback()
+        raise HTTPException(status_code=409, detail=f"Integrity Error: {str(ie.orig)}")
+    except SQLAlchemyError as sql_err:
+        await db.rollback()
+        raise HTTPException(status_code=500, detail=f"Database error: {str(sql_err)}")
+
+
+# A POST because DELETE /bulk would be routed to delete_manufacturer
+@app.post("/bulk/delete", response_model=BulkResponse)
+@query_budget(2)
+async def bulk_delete_manufacturers(entry: BulkDelete, db: AsyncSession = Depends(get_db)):
+    try:
+        results = await bulk_delete(db, entry.ids, TABLE_NAME, "manufacturid")
+        await invalidate(db, TABLE_NAME)
+        await db.commit()
+        return {"message": "success", "results": results}
+    except IntegrityError:
+        await db.rollback()
+        raise HTTPException(status_code=409, detail="Some of these rows are still referenced; nothing was deleted")
+    except SQLAlchemyError as sql_err:
+        await db.rollback()
+        raise HTTPException(status_code=500, detail=f"Database error: {str(sql_err)}")
+
+
+# Deactivates or deletes every row matching ids and/or column filters in one
+# statement; with dry_run only the counts are returned
+@app.post("/bulk/filter", response_model=BulkFilterResponse)
+@query_budget(2)
+async def bulk_filter_manufacturers(entry: BulkFilterAction, db: AsyncSession = Depends(get_db)):
+    try:
+        counts = await bulk_filter_action(
+            db, TABLE_NAME, "manufacturid", FILTER_COLUMNS, entry.action, entry.ids, entry.where, entry.dry_run
+        )
+        if counts["affected"] and not entry.dry_run:
+            await invalidate(db, TABLE_NAME)
+        await db.commit()
+        return {"message": "success", **counts}
+    except HTTPException:
+        await db.rollback()
+        raise
+    except IntegrityError:
+        await db.rollback()
+        raise HTTPException(status_code=409, detail="Some matching rows are still referenced; nothing was changed")
+    except SQLAlchemyError as sql_err:
+        await db.rollback()
+        raise HTTPException(status_code=500, detail=f"Database error: {str(sql_err)}")
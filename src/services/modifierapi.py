@@ -1,10 +1,25 @@
-from fastapi import APIRouter, HTTPException, Depends, File, UploadFile
+from fastapi import APIRouter, HTTPException, Depends, File, UploadFile, Request, Query, Header, Response
 from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from fastapi.middleware.cors import CORSMiddleware
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from src.db .database import get_db
-from src.model.modifierschemas import ModifierCreate,ModifierData, ModifierResponse, ModifierUpdate
+from src.db.idallocator import modifier_ids
+from src.model.modifierschemas import ModifierCreate,ModifierData, ModifierResponse, ModifierUpdate, ModifierBulkUpdate
+from src.model.bulkschemas import BulkDelete, BulkResponse, BulkFilterAction, BulkFilterResponse
+from src.model.jobschemas import JobAccepted
+from src.utils.pagination import PageParams, keyset_query, split_page
+from src.utils.streaming import streaming_media_type, stream_table
+from src.utils.cache import list_cache, invalidate
+from src.utils.serialization import RowEncoder
+from src.utils.changes import delta_response
+from src.utils.querybudget import query_budget
+from src.utils.patch import patch_row, etag
+from src.utils.search import SearchParams, PrefixIndex, trigram_search
+from src.utils.bulkops import bulk_create, bulk_update, bulk_delete, bulk_filter_action
+from src.spreadsheet.ingest import bulk_upsert
+from src.utils.jobs import upload_jobs
+from src.spreadsheet.export import export_response
 from typing import List
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy import text
@@ -16,54 +31,53 @@ from sqlalchemy.exc import IntegrityError, SQLAlchemyError
 app = APIRouter()
 
 TABLE_NAME = "modifier_mstr"
+LIST_COLUMNS = "modifier_id, modifier,abbreviation,description,isactive, row_version"
+LIST_ENCODER = RowEncoder(ModifierData, LIST_COLUMNS)
+SEARCH_COLUMNS = ["modifier", "abbreviation"]
+# Optional spreadsheet columns and their SQL types
+UPLOAD_COLUMNS = {"abbreviation": "text", "description": "text", "isactive": "boolean"}
+BULK_COLUMNS = {"modifier": "text", "abbreviation": "text", "description": "text", "isactive": "boolean"}
+# Columns the /bulk/filter route may filter on, with their SQL types
+FILTER_COLUMNS = {"modifier": "text", "abbreviation": "text", "isactive": "boolean"}
 
 async def generate_modifier_id(db: AsyncSession) -> str:
-    query = text(f"SELECT modifier_id FROM {TABLE_NAME} ORDER BY modifier_id DESC LIMIT 1")
-    result = await db.execute(query)
-    last_modifier_id = result.scalar()
-
-    if last_modifier_id is not None:
-        # Extract the numeric part of the modifier_id
-        try:
-            prefix, num_part = last_modifier_id.split('_')
-            if prefix != 'M':
-                raise HTTPException(status_code=500, detail=f"Unexpected modifier_id prefix: {prefix}")
-
-            new_id_number = int(num_part) + 1
-            return f"{prefix}_{new_id_number:04d}"  # Ensuring 4 digits format
-        except ValueError:
-            raise HTTPException(status_code=500, detail=f"Invalid modifier_id format: {last_modifier_id}")
-    else:
-        return "M_0001"  # If no entries, start with "M_0001"
+    return await modifier_ids.next_id(db)
 
 
 @app.get("/Modifier", response_model=ModifierResponse)
-async def get_noun_values(db: AsyncSession = Depends(get_db)):
+@query_budget(2)
+async def get_noun_values(
+    request: Request,
+    page: PageParams = Depends(),
+    since: Optional[str] = Query(None, description="Token from a previous sync; returns only rows changed since then"),
+    db: AsyncSession = Depends(get_db),
+):
     try:
-        query = text(f"""
-            SELECT modifier_id, modifier,abbreviation,description,isactive
-            FROM {TABLE_NAME}
-            ORDER BY modifier_id
-        """)
-        result = await db.execute(query)
-        rows = result.fetchall()
-
-        # Map the fetched rows to the NounResponse model
-        modifiers = [ModifierData(
-            modifier_id=row[0],
-            modifier=row[1],
-            abbreviation=row[2],
-            description=row[3],
-            isactive=row[4]
-            # Explicitly setting message to None or remove this line
-        ) for row in rows]
-
-        return ModifierResponse(message="sucess",data=modifiers)
+        if since is not None:
+            return await delta_response(db, since, LIST_COLUMNS, TABLE_NAME, "modifier_id", LIST_ENCODER, page)
+
+        media_type = streaming_media_type(request)
+        if media_type:
+            return stream_table(LIST_COLUMNS, TABLE_NAME, "modifier_id", page, media_type)
+
+        cached = list_cache.lookup(request, TABLE_NAME, page)
+        if cached:
+            return cached
+        version = list_cache.version(TABLE_NAME)
+
+        query, params = keyset_query(LIST_COLUMNS, TABLE_NAME, "modifier_id", page)
+        result = await db.execute(query, params)
+        rows, next_cursor = split_page(result.fetchall(), page)
+
+        return list_cache.store(request, TABLE_NAME, page, version, LIST_ENCODER.page(rows, next_cursor, message="sucess"))
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 
 @app.post("/Modifier",response_model=ModifierResponse)
+@query_budget(3)
 async def create_modifier(entry: ModifierCreate, db: AsyncSession = Depends(get_db)):
     try:
         if not entry.modifier.strip():
@@ -85,6 +99,7 @@ async def create_modifier(entry: ModifierCreate, db: AsyncSession = Depends(get_
             "description": entry.description,
             "isactive": entry.isactive  # Mapping 'isActive' from request to 'isactive' in the DB
         })
+        await invalidate(db, TABLE_NAME)
         await db.commit()
 
         # Fetching inserted values
@@ -113,66 +128,37 @@ async def create_modifier(entry: ModifierCreate, db: AsyncSession = Depends(get_
 
 # Updating an existing noun
 @app.put("/modifier/{modifier_id}", response_model=ModifierResponse)
+@app.patch("/modifier/{modifier_id}", response_model=ModifierResponse)
+@app.put("/Modifier/{modifier_id}", response_model=ModifierResponse)
+@app.patch("/Modifier/{modifier_id}", response_model=ModifierResponse)
+@query_budget(2)
 async def update_modifier(
-        modifier_id: str,
-        entry: ModifierUpdate,
-        db: AsyncSession = Depends(get_db)
+    modifier_id: str,
+    entry: ModifierUpdate,
+    response: Response,
+    if_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_db),
 ):
     try:
-        # Fetch existing modifier
-        existing_modifier = await db.execute(
-            text(f"SELECT * FROM {TABLE_NAME} WHERE modifier_id = :modifier_id"),
-            {"modifier_id": modifier_id}
+        updated_row = await patch_row(
+            db, TABLE_NAME, "modifier_id", modifier_id, BULK_COLUMNS, entry.dict(), LIST_COLUMNS, if_match,
+            f"Modifier with id {modifier_id} not found."
         )
-        row = existing_modifier.fetchone()
-
-        if row is None:
-            raise HTTPException(status_code=404, detail=f"Modifier with id {modifier_id} not found.")
-
-        # Prepare the update data
-        update_data = {
-            "modifier": entry.modifier if entry.modifier is not None else row[1],
-            "abbreviation": entry.abbreviation if entry.abbreviation is not None else row[2],
-            "description": entry.description if entry.description is not None else row[3],
-            "isactive": entry.isactive if entry.isactive is not None else row[4]
-        }
-
-        # Update the existing row
-        query = text(f"""
-            UPDATE {TABLE_NAME} 
-            SET modifier = :modifier, abbreviation = :abbreviation, description = :description, isactive = :isactive
-            WHERE modifier_id = :modifier_id
-            RETURNING modifier_id, modifier, abbreviation, description, isactive
-        """)
-
-        result = await db.execute(query, {
-            "modifier_id": modifier_id,
-            "modifier": update_data["modifier"],
-            "abbreviation": update_data["abbreviation"],
-            "description": update_data["description"],
-            "isactive": update_data["isactive"]
-        })
+        await invalidate(db, TABLE_NAME)
         await db.commit()
 
-        updated_row = result.fetchone()
-
-        if updated_row is None:
-            raise HTTPException(status_code=404, detail="Update failed. Modifier not found.")
-
-        # Construct response data
-        response_data = {
-            "modifier_id": updated_row[0],
-            "modifier": updated_row[1],
-            "abbreviation": updated_row[2],
-            "description": updated_row[3],
-            "isactive": updated_row[4]
-        }
-
+        response.headers["ETag"] = etag(updated_row.row_version)
         return {
             "message": "Modifier updated successfully",
-            "data": response_data
+            "data": LIST_ENCODER.rows([updated_row])
         }
 
+    except HTTPException:
+        await db.rollback()
+        raise
+    except IntegrityError as ie:
+        await db.rollback()
+        raise HTTPException(status_code=409, detail=f"Integrity Error: {str(ie.orig)}")
     except Exception as e:
         await db.rollback()
         raise HTTPException(status_code=500, detail=f"Internal Server Error: {str(e)}")
@@ -180,6 +166,7 @@ async def update_modifier(
 
 # Deleting a noun using noun_id
 @app.delete("/Modifier/{modifier_id}", response_model=dict)
+@query_budget(3)
 async def delete_modifier(modifier_id: str, db: AsyncSession = Depends(get_db)):
     try:
         query_check = text(f"""
@@ -198,6 +185,7 @@ async def delete_modifier(modifier_id: str, db: AsyncSession = Depends(get_db)):
             WHERE modifier_id = :modifier_id
         """)
         await db.execute(query_delete, {"modifier_id": modifier_id})
+        await invalidate(db, TABLE_NAME)
         await db.commit()
 
         return {"message": "Modifier entry deleted successfully"}
@@ -207,72 +195,34 @@ async def delete_modifier(modifier_id: str, db: AsyncSession = Depends(get_db)):
 
 
 # Upload an Excel file containing nouns
-@app.post("/upload-excel")
-async def upload_excel(file: UploadFile = File(...), db: AsyncSession = Depends(get_db)):
-    try:
-        df = pd.read_excel(file.file)
-
-        if 'modifier' not in df.columns:
-            raise HTTPException(status_code=400, detail="Excel file must contain a 'modifier' column")
-
-        async with db.begin():  # Use transaction
-            for index, row in df.iterrows():
-                modifier_value = row['modifier']
-                if pd.isna(modifier_value) or not modifier_value.strip():
-                    continue  # Skip empty rows
-
-                query_check = text(f"""
-                    SELECT modifier_id
-                    FROM {TABLE_NAME}
-                    WHERE modifier = :modifier
-                """)
-                result_check = await db.execute(query_check, {"modifier": modifier_value})
-                existing_modifier = result_check.fetchone()
-
-                if existing_modifier:
-                    query_update = text(f"""
-                        UPDATE {TABLE_NAME}
-                        SET noun = :noun
-                        WHERE noun_id = :noun_id
-                    """)
-                    await db.execute(query_update, {"noun": modifier_value, "noun_id": existing_modifier[0]})
-                else:
-                    new_modifier_id = await generate_modifier_id(db)  # Generate new noun_id
-                    query_insert = text(f"""
-                        INSERT INTO {TABLE_NAME} (modifier_id, modifier)
-                        VALUES (:modifier_id, :noun)
-                    """)
-                    await db.execute(query_insert, {"modifier_id": new_modifier_id, "modifier": modifier_value})
+async def ingest_modifiers(db: AsyncSession, df) -> dict:
+    stats = await bulk_upsert(db, df, TABLE_NAME, "modifier_id", ["modifier"], UPLOAD_COLUMNS, modifier_ids)
+    await invalidate(db, TABLE_NAME)
+    return stats
 
-        await db.commit()
-        return {"message": "Excel file processed successfully."}
-    except Exception as e:
-        await db.rollback()
-        raise HTTPException(status_code=400, detail=str(e))
+upload_jobs.register("modifier", ["modifier"], ingest_modifiers)
+
+
+# Returns straight away; progress is reported under /jobs/{job_id}
+@app.post("/upload-excel", status_code=202, response_model=JobAccepted)
+async def upload_excel(file: UploadFile = File(...), db: AsyncSession = Depends(get_db)):
+    job_id = await upload_jobs.submit(db, "modifier", file)
+    return {"message": "Excel file accepted for processing.", "job_id": job_id, "status_url": f"/jobs/{job_id}"}
 
 
 # Export noun data to an Excel file
 @app.get("/export-excel")
-async def export_excel(db: AsyncSession = Depends(get_db)):
+@query_budget(0)
+async def export_excel(export_format: str = Query("xlsx", alias="format"), db: AsyncSession = Depends(get_db)):
     try:
         query = text(f"""
             SELECT modifier_id, modifier
             FROM {TABLE_NAME}
             ORDER BY modifier_id
         """)
-        result = await db.execute(query)
-        rows = result.fetchall()
-
-        df = pd.DataFrame(rows, columns=["modifier_id", "modifier"])
-
-        output = io.BytesIO()
-        with pd.ExcelWriter(output, engine='openpyxl') as writer:
-            df.to_excel(writer, index=False, sheet_name='Modifier')
-
-        output.seek(0)  # Rewind the buffer to the beginning
-
-        return StreamingResponse(output, media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-                                 headers={"Content-Disposition": "attachment; filename=nouns.xlsx"})
+        return export_response(query, ["modifier_id", "modifier"], "Modifier", "nouns", export_format)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
@@ -280,12 +230,13 @@ async def export_excel(db: AsyncSession = Depends(get_db)):
 # Run the app using: uvicorn main:app --reload
 
 
-# Updating an existing noun
-@app.put("/Modifier/{modifier_id}", response_model=ModifierResponse)
-async def update_modifier(modifier_id: str, entry: ModifierUpdate, db: AsyncSession = Depends(get_db)):
+# Deleting a noun using noun_id
+@app.delete("/Modifier/{modifier_id}", response_model=dict)
+@query_budget(3)
+async def delete_noun(modifier_id: str, db: AsyncSession = Depends(get_db)):
     try:
         query_check = text(f"""
-            SELECT modifier_id, modifier
+            SELECT modifier_id
             FROM {TABLE_NAME}
             WHERE modifier_id = :modifier_id
         """)
@@ -295,49 +246,104 @@ async def update_modifier(modifier_id: str, entry: ModifierUpdate, db: AsyncSess
         if not modifier:
             raise HTTPException(status_code=404, detail="Noun not found")
 
-        query_update = text(f"""
-            UPDATE {TABLE_NAME}
-            SET modifier = :modifier
+        query_delete = text(f"""
+            DELETE FROM {TABLE_NAME}
             WHERE modifier_id = :modifier_id
-            RETURNING modifier_id, modifier
         """)
-        result_update = await db.execute(query_update, {"modifier": entry.modifier, "modifier_id": modifier_id})
+        await db.execute(query_delete, {"modifier_id": modifier_id})
+        await invalidate(db, TABLE_NAME)
         await db.commit()
 
-        updated_modifier = result_update.fetchone()
-        if updated_modifier is None:
-            raise HTTPException(status_code=400, detail="Failed to update modifier")
-
-        updated_modifier_id, updated_modifier_value = updated_modifier
-        return ModifierResponse(noun_id=updated_modifier_id, noun=updated_modifier_value, message="Modifier entry updated successfully")
+        return {"message": "Modifier entry deleted successfully"}
     except Exception as e:
         await db.rollback()
         raise HTTPException(status_code=400, detail=str(e))
 
 
-# Deleting a noun using noun_id
-@app.delete("/Modifier/{modifier_id}", response_model=dict)
-async def delete_noun(modifier_id: str, db: AsyncSession = Depends(get_db)):
+@app.post("/bulk", response_model=BulkResponse)
+@query_budget(3)
+async def bulk_create_modifiers(entries: List[ModifierCreate], db: AsyncSession = Depends(get_db)):
     try:
-        query_check = text(f"""
-            SELECT modifier_id
-            FROM {TABLE_NAME}
-            WHERE modifier_id = :modifier_id
-        """)
-        result_check = await db.execute(query_check, {"modifier_id": modifier_id})
-        modifier = result_check.fetchone()
+        results = await bulk_create(
+            db, [entry.dict() for entry in entries], TABLE_NAME, "modifier_id", BULK_COLUMNS, modifier_ids, "modifier", unique=False
+        )
+        await invalidate(db, TABLE_NAME)
+        await db.commit()
+        return {"message": "success", "results": results}
+    except SQLAlchemyError as sql_err:
+        await db.rollback()
+        raise HTTPException(status_code=500, detail=f"Database error: {str(sql_err)}")
 
-        if not modifier:
-            raise HTTPException(status_code=404, detail="Noun not found")
 
-        query_delete = text(f"""
-            DELETE FROM {TABLE_NAME}
-            WHERE modifier_id = :modifier_id
-        """)
-        await db.execute(query_delete, {"modifier_id": modifier_id})
+@app.put("/bulk", response_model=BulkResponse)
+@query_budget(2)
+async def bulk_update_modifiers(entries: List[ModifierBulkUpdate], db: AsyncSession = Depends(get_db)):
+    try:
+        results = await bulk_update(db, [entry.dict() for entry in entries], TABLE_NAME, "modifier_id", BULK_COLUMNS)
+        await invalidate(db, TABLE_NAME)
         await db.commit()
+        return {"message": "success", "results": results}
+    except IntegrityError as ie:
+        await db.rollback()
+        raise HTTPException(status_code=409, detail=f"Integrity Error: {str(ie.orig)}")
+    except SQLAlchemyError as sql_err:
+        await db.rollback()
+        raise HTTPException(status_code=500, detail=f"Database error: {str(sql_err)}")
 
-        return {"message": "Modifier entry deleted successfully"}
-    except Exception as e:
+
+@app.post("/bulk/delete", response_model=BulkResponse)
+@query_budget(2)
+async def bulk_delete_modifiers(entry: BulkDelete, db: AsyncSession = Depends(get_db)):
+    try:
+        results = await bulk_delete(db, entry.ids, TABLE_NAME, "modifier_id")
+        await invalidate(db, TABLE_NAME)
+        await db.commit()
+        return {"message": "success", "results": results}
+    except IntegrityError:
+        await db.rollback()
+        raise HTTPException(status_code=409, detail="Some of these rows are still referenced; nothing was deleted")
+    except SQLAlchemyError as sql_err:
+        await db.rollback()
+        raise HTTPException(status_code=500, detail=f"Database error: {str(sql_err)}")
+
+
+# Deactivates or deletes every row matching ids and/or column filters in one
+# statement; with dry_run only the counts are returned
+@app.post("/bulk/filter", response_model=BulkFilterResponse)
+@query_budget(2)
+async def bulk_filter_modifiers(entry: BulkFilterAction, db: AsyncSession = Depends(get_db)):
+    try:
+        counts = await bulk_filter_action(
+            db, TABLE_NAME, "modifier_id", FILTER_COLUMNS, entry.action, entry.ids, entry.where, entry.dry_run
+        )
+        if counts["affected"] and not entry.dry_run:
+            await invalidate(db, TABLE_NAME)
+        await db.commit()
+        return {"message": "success", **counts}
+    except HTTPException:
         await db.rollback()
-        raise HTTPException(status_code=400, detail=str(e))
\ No newline at end of file
+        raise
+    except IntegrityError:
+        await db.rollback()
+        raise HTTPException(status_code=409, detail="Some matching rows are still referenced; nothing was changed")
+    except SQLAlchemyError as sql_err:
+        await db.rollback()
+        raise HTTPException(status_code=500, detail=f"Database error: {str(sql_err)}")
+
+
+modifier_prefix_index = PrefixIndex(TABLE_NAME, LIST_COLUMNS, SEARCH_COLUMNS)
+
+
+@app.get("/search", response_model=ModifierResponse)
+@query_budget(1)
+async def search_modifiers(params: SearchParams = Depends(), db: AsyncSession = Depends(get_db)):
+    try:
+        if params.mode == "memory":
+            rows = await modifier_prefix_index.search(db, params)
+        else:
+            rows = await trigram_search(db, TABLE_NAME, LIST_COLUMNS, SEARCH_COLUMNS, params)
+
+        modifiers = [ModifierData(**row._mapping) for row in rows]
+        return ModifierResponse(message="success", data=modifiers)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
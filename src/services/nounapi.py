@@ -1,80 +1,88 @@
-from fastapi import APIRouter, Depends, HTTPException, File, UploadFile
+from fastapi import APIRouter, Depends, HTTPException, File, UploadFile, Request, Query, Header, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import text
 from sqlalchemy.exc import IntegrityError, SQLAlchemyError
 from src.db .database import get_db
-from src.model.nounschemas import NounCreate,NounData, NounUpdate, NounResponse
-from typing import List
-import pandas as pd
+from src.db.idallocator import noun_ids
+from src.model.nounschemas import NounCreate,NounData, NounUpdate, NounResponse, NounBulkUpdate
+from src.model.bulkschemas import BulkDelete, BulkResponse, BulkFilterAction, BulkFilterResponse
+from src.utils.pagination import PageParams, keyset_query, split_page
+from src.utils.streaming import streaming_media_type, stream_table
+from src.utils.cache import list_cache, invalidate
+from src.utils.serialization import RowEncoder
+from src.utils.changes import delta_response
+from src.utils.querybudget import query_budget
+from src.utils.patch import patch_row, etag
+from src.utils.search import SearchParams, PrefixIndex, trigram_search
+from src.utils.bulkops import bulk_create, bulk_update, bulk_delete, bulk_filter_action
+from typing import List, Optional
 import io
-from fastapi.responses import StreamingResponse
+from fastapi.responses import StreamingResponse, JSONResponse
 
 app = APIRouter()
 
 TABLE_NAME = "noun_mstr"
+LIST_COLUMNS = "noun_id, noun, abbreviation, description, isactive, row_version"
+LIST_ENCODER = RowEncoder(NounData, LIST_COLUMNS)
+SEARCH_COLUMNS = ["noun", "abbreviation"]
+BULK_COLUMNS = {"noun": "text", "abbreviation": "text", "description": "text", "isactive": "boolean"}
+# Columns the /bulk/filter route may filter on, with their SQL types
+FILTER_COLUMNS = {"noun": "text", "abbreviation": "text", "isactive": "boolean"}
 
 
-async def generate_noun_id(db: AsyncSession):
-    # Query to fetch the latest noun_id
-    result = await db.execute(text("SELECT noun_id FROM noun_mstr ORDER BY noun_id DESC LIMIT 1"))
-    last_id = result.fetchone()
-
-    if last_id:
-        # Extract the numeric part from the noun_id (e.g., 'N_0989' -> 989)
-        last_numeric_id = int(last_id[0].split('_')[1])
-        new_numeric_id = last_numeric_id + 1
-    else:
-        new_numeric_id = 1  # Start from 1 if no records exist
-
-    # Create new noun_id in the format 'N_XXXX'
-    new_noun_id = f"N_{new_numeric_id:04d}"
-    return new_noun_id
+async def generate_noun_id(db: AsyncSession) -> str:
+    return await noun_ids.next_id(db)
 
 
 @app.get("/", response_model=NounResponse)
-async def get_noun_values(db: AsyncSession = Depends(get_db)):
+@query_budget(2)
+async def get_noun_values(
+    request: Request,
+    page: PageParams = Depends(),
+    since: Optional[str] = Query(None, description="Token from a previous sync; returns only rows changed since then"),
+    db: AsyncSession = Depends(get_db),
+):
     try:
-        query = text(f"""
-            SELECT noun_id, noun, abbreviation, description, isactive
-            FROM {TABLE_NAME}
-            ORDER BY noun_id
-        """)
-        result = await db.execute(query)
-        rows = result.fetchall()
-
-        # Map the fetched rows to the NounData model
-        nouns = [NounData(
-            noun_id=row[0],
-            noun=row[1],
-            abbreviation=row[2],
-            description=row[3],
-            isactive=row[4]
-        ) for row in rows]
+        if since is not None:
+            return await delta_response(db, since, LIST_COLUMNS, TABLE_NAME, "noun_id", LIST_ENCODER, page)
 
-        return NounResponse(message="success", data=nouns)
+        media_type = streaming_media_type(request)
+        if media_type:
+            return stream_table(LIST_COLUMNS, TABLE_NAME, "noun_id", page, media_type)
+
+        cached = list_cache.lookup(request, TABLE_NAME, page)
+        if cached:
+            return cached
+        version = list_cache.version(TABLE_NAME)
+
+        query, params = keyset_query(LIST_COLUMNS, TABLE_NAME, "noun_id", page)
+        result = await db.execute(query, params)
+        rows, next_cursor = split_page(result.fetchall(), page)
+
+        return list_cache.store(request, TABLE_NAME, page, version, LIST_ENCODER.page(rows, next_cursor))
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 
 @app.post("/Noun", response_model=NounResponse)
+@query_budget(3)
 async def create_noun(entry: NounCreate, db: AsyncSession = Depends(get_db)):
     try:
         if not entry.noun.strip():
             raise HTTPException(status_code=400, detail="Noun cannot be empty")
 
-        # Check for existing noun
-        existing_query = text("SELECT 1 FROM noun_mstr WHERE noun = :noun")
-        result = await db.execute(existing_query, {"noun": entry.noun})
-        if result.scalar():
-            raise HTTPException(status_code=400, detail="Noun already exists")
-
         # Generate new noun_id
         new_noun_id = await generate_noun_id(db)
 
-        # Insert query
+        # Insert query; a noun that matches an existing one once trimmed and
+        # case-folded hits the normalized unique index and returns no row.
+        # Naming the index as the conflict target keeps other clashes errors.
         insert_query = text("""
             INSERT INTO noun_mstr (noun_id, noun, abbreviation, description, isactive)
             VALUES (:noun_id, :noun, :abbreviation, :description, :isactive)
+            ON CONFLICT (lower(btrim(noun))) DO NOTHING
             RETURNING noun_id, noun, abbreviation, description, isactive
         """)
         
@@ -88,10 +96,14 @@ async def create_noun(entry: NounCreate, db: AsyncSession = Depends(get_db)):
                 "isactive": entry.isactive
             }
         )
-        
-        await db.commit()
-        
+
         row = result.fetchone()
+        if row is None:
+            raise HTTPException(status_code=400, detail="Noun already exists")
+
+        await invalidate(db, TABLE_NAME)
+        await db.commit()
+
         response_data = {
             "message": "success",
             "data": [{
@@ -104,7 +116,14 @@ async def create_noun(entry: NounCreate, db: AsyncSession = Depends(get_db)):
         }
         
         return JSONResponse(content=response_data)
-        
+
+    except HTTPException:
+        await db.rollback()
+        raise
+    except IntegrityError as ie:
+        # Name duplicates return no row above; this is any other constraint, e.g. an id clash
+        await db.rollback()
+        raise HTTPException(status_code=409, detail=f"Integrity Error: {str(ie.orig)}")
     except SQLAlchemyError as e:
         await db.rollback()
         raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
@@ -115,63 +134,43 @@ async def create_noun(entry: NounCreate, db: AsyncSession = Depends(get_db)):
 
 # Updating an existing noun
 @app.put("/Noun/{noun_id}", response_model=NounResponse)
-async def update_noun(noun_id: str, entry: NounUpdate, db: AsyncSession = Depends(get_db)):
+@app.patch("/Noun/{noun_id}", response_model=NounResponse)
+@query_budget(2)
+async def update_noun(
+    noun_id: str,
+    entry: NounUpdate,
+    response: Response,
+    if_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_db),
+):
     try:
-        # Fetch the existing noun by noun_id
-        existing_noun = await db.execute(text(f"SELECT * FROM {TABLE_NAME} WHERE noun_id = :noun_id"), {"noun_id": noun_id})
-        row = existing_noun.fetchone()
-
-        if row is None:
-            raise HTTPException(status_code=404, detail=f"Noun with id {noun_id} not found.")
-
-        # Update the fields that are provided (allow partial updates)
-        update_data = {
-            "noun": entry.noun if entry.noun else row[1],
-            "abbreviation": entry.abbreviation if entry.abbreviation else row[2],
-            "description": entry.description if entry.description else row[3],
-            "isactive": entry.isactive if entry.isactive is not None else row[4]
-        }
-
-        # Update the noun in the database
-        query = text(f"""
-            UPDATE {TABLE_NAME} 
-            SET noun = :noun, abbreviation = :abbreviation, description = :description, isactive = :isactive
-            WHERE noun_id = :noun_id
-            RETURNING noun_id, noun, abbreviation, description, isactive
-        """)
-        result = await db.execute(query, {
-            "noun_id": noun_id,
-            "noun": update_data["noun"],
-            "abbreviation": update_data["abbreviation"],
-            "description": update_data["description"],
-            "isactive": update_data["isactive"]
-        })
+        updated_row = await patch_row(
+            db, TABLE_NAME, "noun_id", noun_id, BULK_COLUMNS, entry.dict(), LIST_COLUMNS, if_match,
+            f"Noun with id {noun_id} not found."
+        )
+        await invalidate(db, TABLE_NAME)
         await db.commit()
 
-        updated_row = result.fetchone()
-
-        # Create the response format
-        response_data = [
-            {
-                "noun_id": updated_row[0],
-                "noun": updated_row[1],
-                "abbreviation": updated_row[2],
-                "description": updated_row[3],
-                "isactive": updated_row[4]
-            }
-        ]
-
+        response.headers["ETag"] = etag(updated_row.row_version)
         return {
             "message": "Noun updated successfully",
-            "data": response_data  # Return the updated noun in a list
+            "data": LIST_ENCODER.rows([updated_row])
         }
 
+    except HTTPException:
+        await db.rollback()
+        raise
+    except IntegrityError as ie:
+        await db.rollback()
+        raise HTTPException(status_code=409, detail=f"Integrity Error: {str(ie.orig)}")
     except Exception as e:
         await db.rollback()
         raise HTTPException(status_code=500, detail=f"Internal Server Error: {str(e)}")
 
+
 # Deleting a noun using noun_id
 @app.delete("/Noun/{noun_id}", response_model=dict)
+@query_budget(3)
 async def delete_noun(noun_id: str, db: AsyncSession = Depends(get_db)):
     try:
         query_check = text(f"""
@@ -190,9 +189,99 @@ async def delete_noun(noun_id: str, db: AsyncSession = Depends(get_db)):
             WHERE noun_id = :noun_id
         """)
         await db.execute(query_delete, {"noun_id": noun_id})
+        await invalidate(db, TABLE_NAME)
         await db.commit()
 
         return {"message": "Noun entry deleted successfully"}
     except Exception as e:
         await db.rollback()
-        raise HTTPException(status_code=400, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@app.post("/bulk", response_model=BulkResponse)
+@query_budget(3)
+async def bulk_create_nouns(entries: List[NounCreate], db: AsyncSession = Depends(get_db)):
+    try:
+        results = await bulk_create(
+            db, [entry.dict() for entry in entries], TABLE_NAME, "noun_id", BULK_COLUMNS, noun_ids, "noun"
+        )
+        await invalidate(db, TABLE_NAME)
+        await db.commit()
+        return {"message": "success", "results": results}
+    except SQLAlchemyError as sql_err:
+        await db.rollback()
+        raise HTTPException(status_code=500, detail=f"Database error: {str(sql_err)}")
+
+
+@app.put("/bulk", response_model=BulkResponse)
+@query_budget(2)
+async def bulk_update_nouns(entries: List[NounBulkUpdate], db: AsyncSession = Depends(get_db)):
+    try:
+        results = await bulk_update(db, [entry.dict() for entry in entries], TABLE_NAME, "noun_id", BULK_COLUMNS, "noun")
+        await invalidate(db, TABLE_NAME)
+        await db.commit()
+        return {"message": "success", "results": results}
+    except IntegrityError as ie:
+        await db.rollback()
+        raise HTTPException(status_code=409, detail=f"Integrity Error: {str(ie.orig)}")
+    except SQLAlchemyError as sql_err:
+        await db.rollback()
+        raise HTTPException(status_code=500, detail=f"Database error: {str(sql_err)}")
+
+
+@app.post("/bulk/delete", response_model=BulkResponse)
+@query_budget(2)
+async def bulk_delete_nouns(entry: BulkDelete, db: AsyncSession = Depends(get_db)):
+    try:
+        results = await bulk_delete(db, entry.ids, TABLE_NAME, "noun_id")
+        await invalidate(db, TABLE_NAME)
+        await db.commit()
+        return {"message": "success", "results": results}
+    except IntegrityError:
+        await db.rollback()
+        raise HTTPException(status_code=409, detail="Some of these rows are still referenced; nothing was deleted")
+    except SQLAlchemyError as sql_err:
+        await db.rollback()
+        raise HTTPException(status_code=500, detail=f"Database error: {str(sql_err)}")
+
+
+# Deactivates or deletes every row matching ids and/or column filters in one
+# statement; with dry_run only the counts are returned
+@app.post("/bulk/filter", response_model=BulkFilterResponse)
+@query_budget(2)
+async def bulk_filter_nouns(entry: BulkFilterAction, db: AsyncSession = Depends(get_db)):
+    try:
+        counts = await bulk_filter_action(
+            db, TABLE_NAME, "noun_id", FILTER_COLUMNS, entry.action, entry.ids, entry.where, entry.dry_run
+        )
+        if counts["affected"] and not entry.dry_run:
+            await invalidate(db, TABLE_NAME)
+        await db.commit()
+        return {"message": "success", **counts}
+    except HTTPException:
+        await db.rollback()
+        raise
+    except IntegrityError:
+        await db.rollback()
+        raise HTTPException(status_code=409, detail="Some matching rows are still referenced; nothing was changed")
+    except SQLAlchemyError as sql_err:
+        await db.rollback()
+        raise HTTPException(status_code=500, detail=f"Database error: {str(sql_err)}")
+
+
+noun_prefix_index = PrefixIndex(TABLE_NAME, LIST_COLUMNS, SEARCH_COLUMNS)
+
+
+@app.get("/search", response_model=NounResponse)
+@query_budget(1)
+async def search_nouns(params: SearchParams = Depends(), db: AsyncSession = Depends(get_db)):
+    try:
+        if params.mode == "memory":
+            rows = await noun_prefix_index.search(db, params)
+        else:
+            rows = await trigram_search(db, TABLE_NAME, LIST_COLUMNS, SEARCH_COLUMNS, params)
+
+        nouns = [NounData(**row._mapping) for row in rows]
+        return NounResponse(message="success", data=nouns)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
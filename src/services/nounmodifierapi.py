@@ -1,75 +1,201 @@
-from fastapi import APIRouter, Depends, HTTPException, File, UploadFile
+from fastapi import APIRouter, Depends, HTTPException, File, UploadFile, Request, Query, Header, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import text
 from sqlalchemy.exc import IntegrityError, SQLAlchemyError
 from src.db .database import get_db
-from src.model.nounmodifierschemas import NounModifierCreate,NounModifierUpdate, NounModifierData, NounModifierResponse
-from typing import List
-import pandas as pd
+from src.db.idallocator import noun_ids, modifier_ids, nounmodifier_ids
+from src.model.nounmodifierschemas import NounModifierCreate,NounModifierUpdate, NounModifierData, NounModifierResponse, NounModifierBulkUpdate
+from src.model.bulkschemas import BulkDelete, BulkResponse, BulkFilterAction, BulkFilterResponse
+from src.model.jobschemas import JobAccepted
+from src.utils.pagination import PageParams, keyset_query, split_page
+from src.utils.streaming import streaming_media_type, stream_table
+from src.utils.cache import CACHE_CHANNEL, bump_after_commit, list_cache, invalidate
+from src.utils.serialization import RowEncoder
+from src.utils.changes import delta_response
+from src.utils.querybudget import query_budget
+from src.utils.patch import patch_row, etag
+from src.utils.search import SearchParams, PrefixIndex, trigram_search
+from src.utils.bulkops import bulk_update, bulk_delete, bulk_filter_action
+from src.spreadsheet.ingest import bulk_upsert
+from src.utils.jobs import upload_jobs
+from src.spreadsheet.export import export_response
+from typing import List, Optional
 import io
-from fastapi.responses import StreamingResponse
+from fastapi.responses import StreamingResponse, JSONResponse
 
 app = APIRouter()
 
 TABLE_NAME = "nounmodifier_combined"
+LIST_COLUMNS = "noun_id,modifier_id, noun,modifier,abbreviation,description,isactive,nounmodifier_id,noun_modifier, row_version"
+LIST_ENCODER = RowEncoder(NounModifierData, LIST_COLUMNS)
+SEARCH_COLUMNS = ["noun", "modifier", "noun_modifier", "abbreviation"]
+# Optional spreadsheet columns and their SQL types
+UPLOAD_COLUMNS = {"abbreviation": "text", "description": "text", "isactive": "boolean"}
+BULK_COLUMNS = {"noun": "text", "modifier": "text", "abbreviation": "text", "description": "text", "isactive": "boolean"}
+# Columns the /bulk/filter route may filter on, with their SQL types
+FILTER_COLUMNS = {"noun_id": "text", "modifier_id": "text", "noun": "text", "modifier": "text", "isactive": "boolean"}
+# Resolve noun_id/modifier_id from the master tables by name
+NOUN_MODIFIER_JOINS = [("noun_id", "noun_mstr", "noun", "noun_id"), ("modifier_id", "modifier_mstr", "modifier", "modifier_id")]
+
+
+# Resolves noun_id/modifier_id by name and inserts the combinations in one
+# statement. Names match once trimmed and case-folded, like the normalized
+# unique index on noun_mstr, and the combination stores the master row's
+# spelling. With create_missing the caller passes pre-allocated ids for the
+# names that may be new; only those not already in the master tables are
+# inserted. Rows whose noun or modifier cannot be resolved are skipped. The
+# NOTIFY for every touched table is sent from the same statement.
+CREATE_NOUNMODIFIERS_SQL = text(f"""
+    WITH input AS (
+        SELECT *
+        FROM unnest(
+            CAST(:nounmodifier_id AS text[]), CAST(:noun AS text[]), CAST(:modifier AS text[]),
+            CAST(:abbreviation AS text[]), CAST(:description AS text[]), CAST(:isactive AS boolean[])
+        ) AS u(nounmodifier_id, noun, modifier, abbreviation, description, isactive)
+    ),
+    new_noun AS (
+        INSERT INTO noun_mstr (noun_id, noun, abbreviation, description, isactive)
+        SELECT c.noun_id, c.noun, '', '', true
+        FROM unnest(CAST(:new_noun_id AS text[]), CAST(:new_noun AS text[])) AS c(noun_id, noun)
+        WHERE NOT EXISTS (SELECT 1 FROM noun_mstr n WHERE lower(btrim(n.noun)) = lower(btrim(c.noun)))
+        ON CONFLICT (lower(btrim(noun))) DO NOTHING
+        RETURNING noun_id, noun
+    ),
+    new_modifier AS (
+        INSERT INTO modifier_mstr (modifier_id, modifier, abbreviation, description, isactive)
+        SELECT c.modifier_id, c.modifier, '', '', true
+        FROM unnest(CAST(:new_modifier_id AS text[]), CAST(:new_modifier AS text[])) AS c(modifier_id, modifier)
+        WHERE NOT EXISTS (SELECT 1 FROM modifier_mstr m WHERE lower(btrim(m.modifier)) = lower(btrim(c.modifier)))
+        RETURNING modifier_id, modifier
+    ),
+    nouns AS (
+        (SELECT DISTINCT ON (lower(btrim(noun))) lower(btrim(noun)) AS name_key, noun, noun_id FROM noun_mstr
+         WHERE lower(btrim(noun)) IN (SELECT lower(btrim(noun)) FROM input) ORDER BY lower(btrim(noun)), noun_id)
+        UNION ALL
+        SELECT lower(btrim(noun)), noun, noun_id FROM new_noun
+    ),
+    modifiers AS (
+        (SELECT DISTINCT ON (lower(btrim(modifier))) lower(btrim(modifier)) AS name_key, modifier, modifier_id FROM modifier_mstr
+         WHERE lower(btrim(modifier)) IN (SELECT lower(btrim(modifier)) FROM input) ORDER BY lower(btrim(modifier)), modifier_id)
+        UNION ALL
+        SELECT lower(btrim(modifier)), modifier, modifier_id FROM new_modifier
+    ),
+    inserted AS (
+        INSERT INTO {TABLE_NAME} (nounmodifier_id, noun, modifier, abbreviation, description, isactive, noun_id, modifier_id)
+        SELECT i.nounmodifier_id, n.noun, m.modifier, i.abbreviation, i.description, i.isactive, n.noun_id, m.modifier_id
+        FROM input i
+        JOIN nouns n ON n.name_key = lower(btrim(i.noun))
+        JOIN modifiers m ON m.name_key = lower(btrim(i.modifier))
+        RETURNING nounmodifier_id, noun, modifier, abbreviation, description, isactive, noun_id, modifier_id
+    ),
+    notified AS (
+        SELECT pg_notify(:channel, changed.tbl)
+        FROM (
+            SELECT '{TABLE_NAME}' AS tbl WHERE EXISTS (SELECT 1 FROM inserted)
+            UNION ALL SELECT 'noun_mstr' WHERE EXISTS (SELECT 1 FROM new_noun)
+            UNION ALL SELECT 'modifier_mstr' WHERE EXISTS (SELECT 1 FROM new_modifier)
+        ) changed
+    )
+    SELECT inserted.*,
+           (SELECT count(*) FROM new_noun) AS nouns_created,
+           (SELECT count(*) FROM new_modifier) AS modifiers_created,
+           (SELECT count(*) FROM notified) AS notified
+    FROM inserted
+""")
+
+
+def _name_key(name: str) -> str:
+    return name.strip(" ").lower()
+
+
+def _create_params(entries: List[NounModifierCreate], ids: List[str]) -> dict:
+    return {
+        "nounmodifier_id": ids,
+        "noun": [entry.noun for entry in entries],
+        "modifier": [entry.modifier for entry in entries],
+        "abbreviation": [entry.abbreviation for entry in entries],
+        "description": [entry.description for entry in entries],
+        "isactive": [entry.isactive for entry in entries],
+        "new_noun": [], "new_noun_id": [], "new_modifier": [], "new_modifier_id": [],
+        "channel": CACHE_CHANNEL,
+    }
+
+
+# Statements: the CTE itself plus, only when an allocator has run dry, one
+# nextval() per id pool and, for batches with create_missing, the name lookup.
+# A noun created by a concurrent request after the CTE's snapshot is skipped by
+# ON CONFLICT yet invisible to the same statement; the affected rows are
+# retried once in a second statement, which sees it.
+async def insert_nounmodifiers(db: AsyncSession, entries: List[NounModifierCreate], create_missing: bool):
+    ids = await nounmodifier_ids.next_ids(db, len(entries))
+    params = _create_params(entries, ids)
+    if create_missing:
+        # One spelling per trimmed, case-folded name
+        nouns = list({_name_key(noun): noun for noun in sorted(params["noun"])}.values())
+        modifiers = list({_name_key(modifier): modifier for modifier in sorted(params["modifier"])}.values())
+        if len(entries) > 1:
+            # Batches check which names exist first so ids are only spent on
+            # new ones; a single create skips this and may waste two ids
+            result = await db.execute(text("""
+                SELECT 'noun', lower(btrim(noun)) FROM noun_mstr WHERE lower(btrim(noun)) = ANY(CAST(:nouns AS text[]))
+                UNION ALL
+                SELECT 'modifier', lower(btrim(modifier)) FROM modifier_mstr WHERE lower(btrim(modifier)) = ANY(CAST(:modifiers AS text[]))
+            """), {"nouns": [_name_key(noun) for noun in nouns], "modifiers": [_name_key(modifier) for modifier in modifiers]})
+            existing = set(result.fetchall())
+            nouns = [noun for noun in nouns if ("noun", _name_key(noun)) not in existing]
+            modifiers = [modifier for modifier in modifiers if ("modifier", _name_key(modifier)) not in existing]
+        params["new_noun"], params["new_noun_id"] = nouns, await noun_ids.next_ids(db, len(nouns))
+        params["new_modifier"], params["new_modifier_id"] = modifiers, await modifier_ids.next_ids(db, len(modifiers))
+
+    result = await db.execute(CREATE_NOUNMODIFIERS_SQL, params)
+    rows = result.fetchall()
+    if create_missing and len(rows) < len(entries):
+        created = {row.nounmodifier_id for row in rows}
+        retry = [position for position, new_id in enumerate(ids) if new_id not in created]
+        result = await db.execute(
+            CREATE_NOUNMODIFIERS_SQL, _create_params([entries[position] for position in retry], [ids[position] for position in retry])
+        )
+        rows += result.fetchall()
+    if rows:
+        bump_after_commit(db, TABLE_NAME)
+        if any(row.nouns_created for row in rows):
+            bump_after_commit(db, "noun_mstr")
+        if any(row.modifiers_created for row in rows):
+            bump_after_commit(db, "modifier_mstr")
+    return {row.nounmodifier_id: row for row in rows}, ids
 
 
-async def get_existing_noun_id(db: AsyncSession) -> str:
-    query = text("SELECT noun_id FROM noun_mstr ORDER BY noun_id DESC LIMIT 1")
-    result = await db.execute(query)
-    return result.scalar() or "N_0000"  # Return a default if not found
-
-async def get_existing_modifier_id(db: AsyncSession) -> str:
-    query = text("SELECT modifier_id FROM modifier_mstr ORDER BY modifier_id DESC LIMIT 1")
-    result = await db.execute(query)
-    return result.scalar() or "M_0000"  # Return a default if not found
-
-
-# Helper function to increment IDs like "N_0990", "M_0990"
-def increment_id(existing_id: str) -> str:
-    prefix, num_part = existing_id.split('_')
-    new_number = int(num_part) + 1
-    return f"{prefix}_{new_number:04d}"  # Maintain format with leading zeros
-
-# Generate new nounmodifier_id based on the last one in the table
 async def generate_nounmodifier_id(db: AsyncSession) -> str:
-    query = text(f"SELECT nounmodifier_id FROM nounmodifier_combined ORDER BY nounmodifier_id DESC LIMIT 1")
-    result = await db.execute(query)
-    last_nounmodifier_id = result.scalar()
-
-    if last_nounmodifier_id is not None:
-        prefix, num_part = last_nounmodifier_id.split('_')
-        new_id_number = int(num_part) + 1
-        return f"{prefix}_{new_id_number:04d}"  # Maintain format with leading zeros
-    else:
-        return "NM_0001"  # Start from NM_0001 if no entries exist
+    return await nounmodifier_ids.next_id(db)
 
 @app.get("/NounModifier", response_model=NounModifierResponse)
-async def get_noun_values(db: AsyncSession = Depends(get_db)):
+@query_budget(2)
+async def get_noun_values(
+    request: Request,
+    page: PageParams = Depends(),
+    since: Optional[str] = Query(None, description="Token from a previous sync; returns only rows changed since then"),
+    db: AsyncSession = Depends(get_db),
+):
     try:
-        query = text(f"""
-            SELECT noun_id,modifier_id, noun,modifier,abbreviation,description,isactive,nounmodifier_id,noun_modifier
-            FROM {TABLE_NAME}
-            ORDER BY nounmodifier_id
-        """)
-        result = await db.execute(query)
-        rows = result.fetchall()
-
-        # Map the fetched rows to the NounResponse model
-        nounmodifiers = [NounModifierData(
-            noun_id=row[0],
-            modifier_id=row[1],
-            noun=row[2],
-            modifier=row[3],
-            abbreviation=row[4],
-            description=row[5],
-            isactive=row[6],
-            nounmodifier_id=row[7],
-            noun_modifier=row[8]
-
-        ) for row in rows]
+        if since is not None:
+            return await delta_response(db, since, LIST_COLUMNS, TABLE_NAME, "nounmodifier_id", LIST_ENCODER, page)
 
-        return NounModifierResponse(message="success", data=nounmodifiers)
+        media_type = streaming_media_type(request)
+        if media_type:
+            return stream_table(LIST_COLUMNS, TABLE_NAME, "nounmodifier_id", page, media_type)
+
+        cached = list_cache.lookup(request, TABLE_NAME, page)
+        if cached:
+            return cached
+        version = list_cache.version(TABLE_NAME)
+
+        query, params = keyset_query(LIST_COLUMNS, TABLE_NAME, "nounmodifier_id", page)
+        result = await db.execute(query, params)
+        rows, next_cursor = split_page(result.fetchall(), page, id_index=7)
+
+        return list_cache.store(request, TABLE_NAME, page, version, LIST_ENCODER.page(rows, next_cursor))
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
@@ -77,43 +203,23 @@ async def get_noun_values(db: AsyncSession = Depends(get_db)):
 
 
 @app.post("/NounModifier", response_model=NounModifierResponse)
-async def create_nounmodifier(entry: NounModifierCreate, db: AsyncSession = Depends(get_db)):
+@query_budget(5)
+async def create_nounmodifier(
+    entry: NounModifierCreate,
+    create_missing: bool = Query(False, description="Create the noun and modifier if they do not exist yet"),
+    db: AsyncSession = Depends(get_db),
+):
     try:
         # Validate that neither noun nor modifier is empty
         if not entry.noun.strip() or not entry.modifier.strip():
             raise HTTPException(status_code=400, detail="Noun or Modifier cannot be an empty string or just whitespace")
 
-        # Retrieve the latest noun_id and modifier_id
-        existing_noun_id = await get_existing_noun_id(db)  # Fetch last noun_id
-        existing_modifier_id = await get_existing_modifier_id(db)  # Fetch last modifier_id
-
-        # Increment noun_id and modifier_id
-        new_noun_id = increment_id(existing_noun_id)
-        new_modifier_id = increment_id(existing_modifier_id)
-
-        # Generate new nounmodifier_id
-        new_nounmodifier_id = await generate_nounmodifier_id(db)
-
-        # Insert into nounmodifier_combined table
-        query = text(f"""
-            INSERT INTO {TABLE_NAME} (nounmodifier_id, noun, modifier, abbreviation, description, isactive, noun_id, modifier_id)
-            VALUES (:nounmodifier_id, :noun, :modifier, :abbreviation, :description, :isactive, :noun_id, :modifier_id)
-            RETURNING nounmodifier_id, noun, modifier, abbreviation, description, isactive, noun_id, modifier_id
-        """)
-        result = await db.execute(query, {
-            "nounmodifier_id": new_nounmodifier_id,
-            "noun": entry.noun,
-            "modifier": entry.modifier,
-            "abbreviation": entry.abbreviation,
-            "description": entry.description,
-            "isactive": entry.isactive,
-            "noun_id": new_noun_id,
-            "modifier_id": new_modifier_id,
-        })
+        inserted, ids = await insert_nounmodifiers(db, [entry], create_missing)
+        inserted_values = inserted.get(ids[0])
+        if inserted_values is None:
+            raise HTTPException(status_code=404, detail=f"Noun '{entry.noun}' or Modifier '{entry.modifier}' not found")
         await db.commit()
 
-        inserted_values = result.fetchone()
-
         response_data = {
             "message": "success",
             "data": [{
@@ -129,6 +235,9 @@ async def create_nounmodifier(entry: NounModifierCreate, db: AsyncSession = Depe
         }
         return JSONResponse(content=response_data)
 
+    except HTTPException:
+        await db.rollback()
+        raise
     except IntegrityError as ie:
         await db.rollback()
         raise HTTPException(status_code=400, detail=f"Integrity Error: {str(ie)}")
@@ -143,74 +252,43 @@ async def create_nounmodifier(entry: NounModifierCreate, db: AsyncSession = Depe
 
 # Updating an existing noun
 @app.put("/NounModifier/{nounmodifier_id}", response_model=NounModifierResponse)
-async def update_nounmodifier(nounmodifier_id: str, entry: NounModifierUpdate, db: AsyncSession = Depends(get_db)):
+@app.patch("/NounModifier/{nounmodifier_id}", response_model=NounModifierResponse)
+@query_budget(2)
+async def update_nounmodifier(
+    nounmodifier_id: str,
+    entry: NounModifierUpdate,
+    response: Response,
+    if_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_db),
+):
     try:
-        # Fetch the existing noun modifier by nounmodifier_id
-        existing_noun_modifier = await db.execute(
-            text(f"SELECT * FROM {TABLE_NAME} WHERE nounmodifier_id = :nounmodifier_id"),
-            {"nounmodifier_id": nounmodifier_id}
+        updated_row = await patch_row(
+            db, TABLE_NAME, "nounmodifier_id", nounmodifier_id, BULK_COLUMNS, entry.dict(), LIST_COLUMNS, if_match,
+            f"NounModifier with id {nounmodifier_id} not found."
         )
-        row = existing_noun_modifier.fetchone()
-
-        if row is None:
-            raise HTTPException(status_code=404, detail=f"NounModifier with id {nounmodifier_id} not found.")
-
-        # Update the fields that are provided (allow partial updates)
-        update_data = {
-            "noun": entry.noun if entry.noun is not None else row[1],
-            "modifier": entry.modifier if entry.modifier is not None else row[2],
-            "abbreviation": entry.abbreviation if entry.abbreviation is not None else row[3],
-            "description": entry.description if entry.description is not None else row[4],
-            "isactive": entry.isactive if entry.isactive is not None else row[5]
-        }
-
-        # Update the noun modifier in the database
-        query = text(f"""
-            UPDATE {TABLE_NAME}
-            SET noun = :noun, modifier = :modifier, abbreviation = :abbreviation, description = :description, isactive = :isactive
-            WHERE nounmodifier_id = :nounmodifier_id
-            RETURNING nounmodifier_id, noun, modifier, abbreviation, description, isactive
-        """)
-        result = await db.execute(query, {
-            "nounmodifier_id": nounmodifier_id,
-            "noun": update_data["noun"],
-            "modifier": update_data["modifier"],
-            "abbreviation": update_data["abbreviation"],
-            "description": update_data["description"],
-            "isactive": update_data["isactive"]
-        })
+        await invalidate(db, TABLE_NAME)
         await db.commit()
 
-        updated_row = result.fetchone()
-
-        # Create the response format
-        response_data = {
-            "noun_id": nounmodifier_id,  # Assuming noun_id corresponds to nounmodifier_id
-            "modifier_id": nounmodifier_id,  # Update with the correct modifier_id if it's different
-            "nounmodifier_id": updated_row[0],
-            "noun": updated_row[1],
-            "modifier": updated_row[2],
-            "abbreviation": updated_row[3],
-            "description": updated_row[4],
-            "isactive": updated_row[5]
-        }
-
+        response.headers["ETag"] = etag(updated_row.row_version)
         return {
             "message": "NounModifier updated successfully",
-            "data": [response_data]  # Return the updated noun modifier as a list
+            "data": LIST_ENCODER.rows([updated_row])
         }
 
+    except HTTPException:
+        await db.rollback()
+        raise
+    except IntegrityError as ie:
+        await db.rollback()
+        raise HTTPException(status_code=409, detail=f"Integrity Error: {str(ie.orig)}")
     except Exception as e:
         await db.rollback()
         raise HTTPException(status_code=500, detail=f"Internal Server Error: {str(e)}")
 
 
-
-
-
-
 # Deleting a noun using noun_id
 @app.delete("/NounModifier/{nounmodifier_id}", response_model=dict)
+@query_budget(3)
 async def delete_nounmodifier(nounmodifier_id: str, db: AsyncSession = Depends(get_db)):
     try:
         query_check = text(f"""
@@ -229,6 +307,7 @@ async def delete_nounmodifier(nounmodifier_id: str, db: AsyncSession = Depends(g
             WHERE nounmodifier_id = :nounmodifier_id
         """)
         await db.execute(query_delete, {"nounmodifier_id": nounmodifier_id})
+        await invalidate(db, TABLE_NAME)
         await db.commit()
 
         return {"message": "NounModifier entry deleted successfully"}
@@ -238,71 +317,141 @@ async def delete_nounmodifier(nounmodifier_id: str, db: AsyncSession = Depends(g
 
 
 # Upload an Excel file containing nouns
-@app.post("/upload-excel")
-async def upload_excel(file: UploadFile = File(...), db: AsyncSession = Depends(get_db)):
-    try:
-        df = pd.read_excel(file.file)
-
-        if 'noun' not in df.columns:
-            raise HTTPException(status_code=400, detail="Excel file must contain a 'noun' column")
-
-        async with db.begin():  # Use transaction
-            for index, row in df.iterrows():
-                noun_value = row['noun']
-                if pd.isna(noun_value) or not noun_value.strip():
-                    continue  # Skip empty rows
-
-                query_check = text(f"""
-                    SELECT noun_id
-                    FROM {TABLE_NAME}
-                    WHERE noun = :noun
-                """)
-                result_check = await db.execute(query_check, {"noun": noun_value})
-                existing_noun = result_check.fetchone()
-
-                if existing_noun:
-                    query_update = text(f"""
-                        UPDATE {TABLE_NAME}
-                        SET noun = :noun
-                        WHERE noun_id = :noun_id
-                    """)
-                    await db.execute(query_update, {"noun": noun_value, "noun_id": existing_noun[0]})
-                else:
-                    new_noun_id = await generate_nounmodifier_id(db)  # Generate new noun_id
-                    query_insert = text(f"""
-                        INSERT INTO {TABLE_NAME} (noun_id, noun)
-                        VALUES (:noun_id, :noun)
-                    """)
-                    await db.execute(query_insert, {"noun_id": new_noun_id, "noun": noun_value})
+async def ingest_nounmodifiers(db: AsyncSession, df) -> dict:
+    stats = await bulk_upsert(
+        db, df, TABLE_NAME, "nounmodifier_id", ["noun", "modifier"], UPLOAD_COLUMNS, nounmodifier_ids,
+        joins=NOUN_MODIFIER_JOINS
+    )
+    await invalidate(db, TABLE_NAME)
+    return stats
 
-        await db.commit()
-        return {"message": "Excel file processed successfully."}
-    except Exception as e:
-        await db.rollback()
-        raise HTTPException(status_code=400, detail=str(e))
+upload_jobs.register("nounmodifier", ["noun", "modifier"], ingest_nounmodifiers)
 
 
+# Returns straight away; progress is reported under /jobs/{job_id}
+@app.post("/upload-excel", status_code=202, response_model=JobAccepted)
+async def upload_excel(file: UploadFile = File(...), db: AsyncSession = Depends(get_db)):
+    job_id = await upload_jobs.submit(db, "nounmodifier", file)
+    return {"message": "Excel file accepted for processing.", "job_id": job_id, "status_url": f"/jobs/{job_id}"}
+
 
 @app.get("/export-excel")
-async def export_excel(db: AsyncSession = Depends(get_db)):
+@query_budget(0)
+async def export_excel(export_format: str = Query("xlsx", alias="format"), db: AsyncSession = Depends(get_db)):
     try:
         query = text(f"""
             SELECT noun_id, noun
             FROM {TABLE_NAME}
             ORDER BY noun_id
         """)
-        result = await db.execute(query)
-        rows = result.fetchall()
+        return export_response(query, ["noun_id", "noun"], "Nouns", "nouns", export_format)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@app.post("/bulk", response_model=BulkResponse)
+@query_budget(6)
+async def bulk_create_nounmodifiers(
+    entries: List[NounModifierCreate],
+    create_missing: bool = Query(False, description="Create nouns and modifiers that do not exist yet"),
+    db: AsyncSession = Depends(get_db),
+):
+    try:
+        results = [None] * len(entries)
+        valid = []
+        for index, entry in enumerate(entries):
+            if not entry.noun.strip() or not entry.modifier.strip():
+                results[index] = {"index": index, "status": "error", "id": None,
+                                  "error": "Noun or Modifier cannot be an empty string or just whitespace"}
+            else:
+                valid.append(index)
+
+        if valid:
+            inserted, ids = await insert_nounmodifiers(db, [entries[index] for index in valid], create_missing)
+            for index, new_id in zip(valid, ids):
+                if new_id in inserted:
+                    results[index] = {"index": index, "status": "created", "id": new_id, "error": None}
+                else:
+                    results[index] = {"index": index, "status": "error", "id": None,
+                                      "error": f"Noun '{entries[index].noun}' or Modifier '{entries[index].modifier}' not found"}
+        await db.commit()
+        return {"message": "success", "results": results}
+    except SQLAlchemyError as sql_err:
+        await db.rollback()
+        raise HTTPException(status_code=500, detail=f"Database error: {str(sql_err)}")
 
-        df = pd.DataFrame(rows, columns=["noun_id", "noun"])
 
-        output = io.BytesIO()
-        with pd.ExcelWriter(output, engine='openpyxl') as writer:
-            df.to_excel(writer, index=False, sheet_name='Nouns')
+@app.put("/bulk", response_model=BulkResponse)
+@query_budget(2)
+async def bulk_update_nounmodifiers(entries: List[NounModifierBulkUpdate], db: AsyncSession = Depends(get_db)):
+    try:
+        results = await bulk_update(db, [entry.dict() for entry in entries], TABLE_NAME, "nounmodifier_id", BULK_COLUMNS)
+        await invalidate(db, TABLE_NAME)
+        await db.commit()
+        return {"message": "success", "results": results}
+    except IntegrityError as ie:
+        await db.rollback()
+        raise HTTPException(status_code=409, detail=f"Integrity Error: {str(ie.orig)}")
+    except SQLAlchemyError as sql_err:
+        await db.rollback()
+        raise HTTPException(status_code=500, detail=f"Database error: {str(sql_err)}")
 
-        output.seek(0)  # Rewind the buffer to the beginning
 
-        return StreamingResponse(output, media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-                                 headers={"Content-Disposition": "attachment; filename=nouns.xlsx"})
+@app.post("/bulk/delete", response_model=BulkResponse)
+@query_budget(2)
+async def bulk_delete_nounmodifiers(entry: BulkDelete, db: AsyncSession = Depends(get_db)):
+    try:
+        results = await bulk_delete(db, entry.ids, TABLE_NAME, "nounmodifier_id")
+        await invalidate(db, TABLE_NAME)
+        await db.commit()
+        return {"message": "success", "results": results}
+    except IntegrityError:
+        await db.rollback()
+        raise HTTPException(status_code=409, detail="Some of these rows are still referenced; nothing was deleted")
+    except SQLAlchemyError as sql_err:
+        await db.rollback()
+        raise HTTPException(status_code=500, detail=f"Database error: {str(sql_err)}")
+
+
+# Deactivates or deletes every row matching ids and/or column filters in one
+# statement; with dry_run only the counts are returned
+@app.post("/bulk/filter", response_model=BulkFilterResponse)
+@query_budget(2)
+async def bulk_filter_nounmodifiers(entry: BulkFilterAction, db: AsyncSession = Depends(get_db)):
+    try:
+        counts = await bulk_filter_action(
+            db, TABLE_NAME, "nounmodifier_id", FILTER_COLUMNS, entry.action, entry.ids, entry.where, entry.dry_run
+        )
+        if counts["affected"] and not entry.dry_run:
+            await invalidate(db, TABLE_NAME)
+        await db.commit()
+        return {"message": "success", **counts}
+    except HTTPException:
+        await db.rollback()
+        raise
+    except IntegrityError:
+        await db.rollback()
+        raise HTTPException(status_code=409, detail="Some matching rows are still referenced; nothing was changed")
+    except SQLAlchemyError as sql_err:
+        await db.rollback()
+        raise HTTPException(status_code=500, detail=f"Database error: {str(sql_err)}")
+
+
+nounmodifier_prefix_index = PrefixIndex(TABLE_NAME, LIST_COLUMNS, SEARCH_COLUMNS)
+
+
+@app.get("/search", response_model=NounModifierResponse)
+@query_budget(1)
+async def search_nounmodifiers(params: SearchParams = Depends(), db: AsyncSession = Depends(get_db)):
+    try:
+        if params.mode == "memory":
+            rows = await nounmodifier_prefix_index.search(db, params)
+        else:
+            rows = await trigram_search(db, TABLE_NAME, LIST_COLUMNS, SEARCH_COLUMNS, params)
+
+        nounmodifiers = [NounModifierData(**row._mapping) for row in rows]
+        return NounModifierResponse(message="success", data=nounmodifiers)
     except Exception as e:
-        raise HTTPException(status_code=400, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=400, detail=str(e))
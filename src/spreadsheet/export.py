@@ -0,0 +1,71 @@
+import os
+import tempfile
+import zlib
+from typing import List
+from fastapi import HTTPException
+from fastapi.responses import StreamingResponse
+from src.utils.executor import run_in_thread
+from src.utils.streaming import encode_csv, stream_partitions
+
+EXPORT_CHUNK_ROWS = int(os.getenv("EXPORT_CHUNK_ROWS", "5000"))
+EXPORT_CHUNK_BYTES = 64 * 1024
+
+EXPORT_FORMATS = {
+    "xlsx": ("application/vnd.openxmlformats-officedocument.spreadsheetml.sheet", "xlsx"),
+    "csv": ("text/csv", "csv"),
+    "csv.gz": ("application/gzip", "csv.gz"),
+}
+
+
+async def _csv_chunks(query, columns: List[str]):
+    yield encode_csv([columns])
+    async for rows in stream_partitions(query, chunk_rows=EXPORT_CHUNK_ROWS):
+        yield encode_csv(rows)
+
+
+async def _gzip_chunks(chunks):
+    compressor = zlib.compressobj(wbits=31)  # 31 = gzip container
+    async for chunk in chunks:
+        data = await run_in_thread(compressor.compress, chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def _append_rows(sheet, rows):
+    for row in rows:
+        sheet.append(list(row))
+
+
+async def _xlsx_chunks(query, columns: List[str], sheet_name: str):
+    # A write-only workbook keeps rows on disk rather than in a cell tree, and
+    # the finished archive is read back in fixed-size chunks, so memory stays
+    # bounded by EXPORT_CHUNK_ROWS no matter how large the table is. Cell
+    # encoding and the final zip run on the executor, off the event loop
+    from openpyxl import Workbook  # only loaded once someone exports xlsx
+    with tempfile.TemporaryFile() as output:
+        workbook = Workbook(write_only=True)
+        sheet = workbook.create_sheet(sheet_name)
+        sheet.append(columns)
+        async for rows in stream_partitions(query, chunk_rows=EXPORT_CHUNK_ROWS):
+            await run_in_thread(_append_rows, sheet, rows)
+        await run_in_thread(workbook.save, output)
+        output.seek(0)
+        while chunk := await run_in_thread(output.read, EXPORT_CHUNK_BYTES):
+            yield chunk
+
+
+def export_response(query, columns: List[str], sheet_name: str, filename: str, export_format: str) -> StreamingResponse:
+    if export_format not in EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Unsupported export format: {export_format}")
+    media_type, extension = EXPORT_FORMATS[export_format]
+
+    if export_format == "xlsx":
+        body = _xlsx_chunks(query, columns, sheet_name)
+    elif export_format == "csv":
+        body = _csv_chunks(query, columns)
+    else:
+        body = _gzip_chunks(_csv_chunks(query, columns))
+
+    return StreamingResponse(body, media_type=media_type,
+                             headers={"Content-Disposition": f"attachment; filename={filename}.{extension}"})
@@ -0,0 +1,174 @@
+from __future__ import annotations
+
+import os
+import time
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+from src.db.idallocator import IdAllocator
+from src.utils.executor import run_blocking
+
+# pandas costs every worker noticeable import time and memory, yet only
+# uploads need it, so it is imported inside the functions that use it
+if TYPE_CHECKING:
+    import pandas as pd
+
+INGEST_CHUNK_SIZE = int(os.getenv("INGEST_CHUNK_SIZE", "5000"))
+# Sheet header plus pandas' 0-based index: frame row 0 is spreadsheet row 2
+SHEET_FIRST_ROW = 2
+
+_BOOL_VALUES = {"true": True, "1": True, "yes": True, "y": True, "false": False, "0": False, "no": False, "n": False}
+
+
+def read_sheet(path: str) -> pd.DataFrame:
+    import pandas as pd
+    return pd.read_excel(path)
+
+
+def _normalized(column: str) -> str:
+    # How keys are compared in SQL, matching the normalized unique indexes
+    return f"lower(btrim({column}))"
+
+
+def _key_column(column: str) -> str:
+    # Sheet frame column holding `column` trimmed and case-folded
+    return f"_{column}_key"
+
+
+def normalize_sheet(df: pd.DataFrame, key_columns: List[str], value_columns: Dict[str, str]) -> Tuple[pd.DataFrame, int]:
+    # Trim keys, drop blank rows and keep the last occurrence of each key once
+    # case-folded, which is how the database matches names. Adds the
+    # case-folded keys as _key_column() columns. Returns the clean frame and
+    # how many sheet rows were dropped.
+    columns = key_columns + [column for column in value_columns if column in df.columns]
+    clean = df[columns].copy()
+    for column in key_columns:
+        clean[column] = clean[column].astype("string").str.strip()
+    clean = clean.dropna(subset=key_columns)
+    clean = clean[(clean[key_columns] != "").all(axis=1)]
+    for column in key_columns:
+        clean[_key_column(column)] = clean[column].str.lower()
+    clean = clean.drop_duplicates(subset=[_key_column(column) for column in key_columns], keep="last")
+    for column, sql_type in value_columns.items():
+        if column not in clean.columns:
+            continue
+        if sql_type == "boolean":
+            clean[column] = clean[column].astype("string").str.strip().str.lower().map(_BOOL_VALUES)
+        else:
+            clean[column] = clean[column].astype("string").str.strip()
+    clean = clean.astype(object).where(clean.notna(), None)
+    return clean, len(df) - len(clean)
+
+
+async def _existing_ids(db: AsyncSession, table: str, id_column: str, key_columns: List[str], chunk: pd.DataFrame) -> pd.DataFrame:
+    # Existing rows by trimmed, case-folded key, like the normalized unique
+    # indexes, returned under the chunk's own _key_column() values for the merge
+    keys = [_key_column(column) for column in key_columns]
+    unnest = ", ".join(f"CAST(:{key} AS text[])" for key in keys)
+    on = " AND ".join(f"{_normalized(f't.{column}')} = {_normalized(f'u.{key}')}" for column, key in zip(key_columns, keys))
+    query = text(f"""
+        SELECT DISTINCT ON ({", ".join(f"u.{key}" for key in keys)}) {", ".join(f"u.{key}" for key in keys)}, t.{id_column}
+        FROM unnest({unnest}) AS u({", ".join(keys)})
+        JOIN {table} t ON {on}
+        ORDER BY {", ".join(f"u.{key}" for key in keys)}, t.{id_column}
+    """)
+    import pandas as pd
+    result = await db.execute(query, {key: chunk[key].tolist() for key in keys})
+    return pd.DataFrame(result.fetchall(), columns=keys + [id_column])
+
+
+async def bulk_upsert(
+    db: AsyncSession,
+    df: pd.DataFrame,
+    table: str,
+    id_column: str,
+    key_columns: List[str],
+    value_columns: Dict[str, str],
+    allocator: IdAllocator,
+    joins: Optional[List[Tuple[str, str, str, str]]] = None,
+    chunk_size: int = INGEST_CHUNK_SIZE,
+) -> dict:
+    # Set-based insert-or-update of a spreadsheet into `table`. Per chunk this
+    # costs one key lookup, at most one id allocation, one multi-row INSERT and
+    # one multi-row UPDATE. `value_columns` maps optional sheet columns to their
+    # SQL type; existing rows are only updated when the sheet carries at least
+    # one of them, otherwise they count as skipped. `joins` resolves extra id
+    # columns on insert as (target column, lookup table, key column, lookup id).
+    # Keys are matched trimmed and case-folded throughout: against existing
+    # rows, between sheet rows and in the joins. New rows that do not resolve
+    # every join are not inserted and come back in `errors` with their
+    # spreadsheet row number.
+    started = time.perf_counter()
+    clean, skipped = await run_blocking(normalize_sheet, df, key_columns, value_columns)
+    values = [column for column in value_columns if column in clean.columns]
+    column_types = {id_column: "text", **{key: "text" for key in key_columns}, **value_columns}
+    inserted = updated = 0
+    errors = []
+
+    for start in range(0, len(clean), chunk_size):
+        chunk = clean.iloc[start:start + chunk_size]
+        existing = await _existing_ids(db, table, id_column, key_columns, chunk)
+        merged = chunk.rename_axis("_sheet_row").reset_index().merge(
+            existing, on=[_key_column(column) for column in key_columns], how="left"
+        )
+        new_rows = merged[merged[id_column].isna()]
+        old_rows = merged[merged[id_column].notna()]
+
+        if len(new_rows):
+            ids = await allocator.next_ids(db, len(new_rows))
+            insert_columns = key_columns + values
+            params = {column: new_rows[column].tolist() for column in insert_columns}
+            params[id_column] = ids
+            unnest = ", ".join(f"CAST(:{column} AS {column_types[column]}[])" for column in [id_column] + insert_columns)
+            target_columns = [id_column] + insert_columns
+            select_columns = [f"u.{column}" for column in target_columns]
+            join_sql = ""
+            for index, (target, lookup_table, key, lookup_id) in enumerate(joins or []):
+                target_columns.append(target)
+                select_columns.append(f"j{index}.{lookup_id}")
+                if key in insert_columns:
+                    # Store the master row's spelling, as the create routes do
+                    select_columns[target_columns.index(key)] = f"j{index}.{key}"
+                join_sql += f"""
+                    JOIN LATERAL (
+                        SELECT {lookup_id}, {key} FROM {lookup_table}
+                        WHERE {_normalized(key)} = {_normalized(f'u.{key}')}
+                        ORDER BY {lookup_id} LIMIT 1
+                    ) j{index} ON true"""
+            result = await db.execute(text(f"""
+                INSERT INTO {table} ({", ".join(target_columns)})
+                SELECT {", ".join(select_columns)}
+                FROM unnest({unnest}) AS u({id_column}, {", ".join(insert_columns)}){join_sql}
+                RETURNING {id_column}
+            """), params)
+            created = set(result.scalars().all())
+            inserted += len(created)
+            for new_id, row in zip(ids, new_rows.to_dict("records")):
+                if new_id not in created:
+                    lookups = " or ".join(f"{key} {row[key]!r}" for _, _, key, _ in joins or [])
+                    errors.append({"row": int(row["_sheet_row"]) + SHEET_FIRST_ROW, "error": f"Unknown {lookups}"})
+
+        if len(old_rows):
+            if values:
+                params = {column: old_rows[column].tolist() for column in values}
+                params[id_column] = old_rows[id_column].tolist()
+                unnest = ", ".join(f"CAST(:{column} AS {column_types[column]}[])" for column in [id_column] + values)
+                assignments = ", ".join(f"{column} = COALESCE(u.{column}, t.{column})" for column in values)
+                await db.execute(text(f"""
+                    UPDATE {table} t
+                    SET {assignments}
+                    FROM unnest({unnest}) AS u({id_column}, {", ".join(values)})
+                    WHERE t.{id_column} = u.{id_column}
+                """), params)
+                updated += len(old_rows)
+            else:
+                skipped += len(old_rows)
+
+    return {
+        "inserted": inserted,
+        "updated": updated,
+        "skipped": skipped,
+        "failed": len(errors),
+        "errors": errors,
+        "elapsed_seconds": round(time.perf_counter() - started, 3),
+    }
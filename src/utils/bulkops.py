@@ -0,0 +1,235 @@
+from typing import Any, Dict, List, Optional, Tuple
+from fastapi import HTTPException
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+from src.db.idallocator import IdAllocator
+
+
+def _unnest(columns: List[str], column_types: Dict[str, str]) -> str:
+    return ", ".join(f"CAST(:{column} AS {column_types.get(column, 'text')}[])" for column in columns)
+
+
+def _error(index: int, message: str, item_id: Optional[str] = None) -> dict:
+    return {"index": index, "status": "error", "id": item_id, "error": message}
+
+
+async def bulk_create(
+    db: AsyncSession,
+    entries: List[dict],
+    table: str,
+    id_column: str,
+    columns: Dict[str, str],
+    allocator: IdAllocator,
+    name_column: str,
+    unique: bool = True,
+    joins: Optional[List[Tuple[str, str, str, str]]] = None,
+) -> List[dict]:
+    # Validates every entry in one pass and inserts all valid rows with one
+    # INSERT ... SELECT FROM unnest. With `unique`, names are compared trimmed
+    # and case-folded, and rows that collide with an existing name are skipped
+    # by ON CONFLICT against the normalized unique index (src/db/schema.py),
+    # so duplicate detection costs no extra query and cannot race. Any other
+    # conflict, such as an id clash, still raises.
+    # `columns` maps the inserted columns to their SQL type; `joins` resolves
+    # extra id columns as (target column, lookup table, key, lookup id).
+    # Results come back in input order. The caller commits.
+    results: List[Optional[dict]] = [None] * len(entries)
+    seen = set()
+    for index, entry in enumerate(entries):
+        name = entry.get(name_column)
+        if name is None or not str(name).strip():
+            results[index] = _error(index, f"{name_column} cannot be an empty string or just whitespace")
+            continue
+        key = str(name).strip().lower()
+        if unique and key in seen:
+            results[index] = _error(index, f"{name_column} is repeated in this request")
+        seen.add(key)
+
+    valid = [index for index in range(len(entries)) if results[index] is None]
+    if valid:
+        ids = await allocator.next_ids(db, len(valid))
+        insert_columns = list(columns)
+        params = {column: [entries[index].get(column) for index in valid] for column in insert_columns}
+        params[id_column] = ids
+        target_columns = [id_column] + insert_columns
+        select_columns = [f"u.{column}" for column in target_columns]
+        join_sql = ""
+        for position, (target, lookup_table, key, lookup_id) in enumerate(joins or []):
+            target_columns.append(target)
+            select_columns.append(f"j{position}.{lookup_id}")
+            join_sql += f" LEFT JOIN {lookup_table} j{position} ON j{position}.{key} = u.{key}"
+        result = await db.execute(text(f"""
+            INSERT INTO {table} ({", ".join(target_columns)})
+            SELECT {", ".join(select_columns)}
+            FROM unnest({_unnest([id_column] + insert_columns, columns)}) AS u({id_column}, {", ".join(insert_columns)}){join_sql}
+            {f"ON CONFLICT (lower(btrim({name_column}))) DO NOTHING" if unique else ""}
+            RETURNING {id_column}
+        """), params)
+        created = set(result.scalars().all())
+        for index, new_id in zip(valid, ids):
+            if new_id in created:
+                results[index] = {"index": index, "status": "created", "id": new_id, "error": None}
+            else:
+                results[index] = _error(index, f"{name_column} already exists")
+
+    return results
+
+
+async def bulk_update(
+    db: AsyncSession,
+    entries: List[dict],
+    table: str,
+    id_column: str,
+    columns: Dict[str, str],
+    name_column: Optional[str] = None,
+) -> List[dict]:
+    # Applies every entry with one UPDATE ... FROM unnest. Blank or missing
+    # fields keep their stored value, like the single-row update routes. Ids
+    # the statement did not return are reported as not found. With
+    # `name_column` (tables with a normalized unique index), an entry renaming
+    # a row to a name another row already has, trimmed and case-folded, is
+    # reported as an error from the same statement and only that row is left
+    # alone; a rename racing a concurrent write can still raise.
+    results: List[Optional[dict]] = [None] * len(entries)
+    seen = set()
+    names = set()
+    for index, entry in enumerate(entries):
+        item_id = entry.get(id_column)
+        name = entry.get(name_column) if name_column else None
+        if not item_id:
+            results[index] = _error(index, f"{id_column} is required")
+        elif item_id in seen:
+            results[index] = _error(index, f"{id_column} is repeated in this request", item_id)
+        elif name and name.strip() and name.strip().lower() in names:
+            results[index] = _error(index, f"{name_column} is repeated in this request", item_id)
+        seen.add(item_id)
+        if name and name.strip():
+            names.add(name.strip().lower())
+
+    valid = [index for index in range(len(entries)) if results[index] is None]
+    if valid:
+        update_columns = list(columns)
+        params = {column: [entries[index].get(column) for index in valid] for column in [id_column] + update_columns}
+        assignments = ", ".join(
+            f"{column} = COALESCE(u.{column}, t.{column})" if columns[column] != "text"
+            else f"{column} = COALESCE(NULLIF(u.{column}, ''), t.{column})"
+            for column in update_columns
+        )
+        if name_column:
+            conflicts = f"""
+                SELECT DISTINCT u.{id_column} FROM input u
+                JOIN {table} t ON lower(btrim(t.{name_column})) = lower(btrim(u.{name_column})) AND t.{id_column} <> u.{id_column}
+                WHERE NULLIF(u.{name_column}, '') IS NOT NULL
+                  AND EXISTS (SELECT 1 FROM {table} s WHERE s.{id_column} = u.{id_column})
+            """
+        else:
+            conflicts = f"SELECT {id_column} FROM input WHERE false"
+        result = await db.execute(text(f"""
+            WITH input AS (
+                SELECT * FROM unnest({_unnest([id_column] + update_columns, columns)}) AS u({id_column}, {", ".join(update_columns)})
+            ),
+            conflicts AS ({conflicts}),
+            updated AS (
+                UPDATE {table} t
+                SET {assignments}
+                FROM input u
+                WHERE t.{id_column} = u.{id_column}
+                  AND NOT EXISTS (SELECT 1 FROM conflicts c WHERE c.{id_column} = u.{id_column})
+                RETURNING t.{id_column}
+            )
+            SELECT {id_column}, true AS updated FROM updated
+            UNION ALL
+            SELECT {id_column}, false FROM conflicts
+        """), params)
+        outcome = dict(result.fetchall())
+        for index in valid:
+            item_id = entries[index][id_column]
+            if outcome.get(item_id):
+                results[index] = {"index": index, "status": "updated", "id": item_id, "error": None}
+            elif item_id in outcome:
+                results[index] = _error(index, f"{name_column} already exists", item_id)
+            else:
+                results[index] = _error(index, "not found", item_id)
+
+    return results
+
+
+async def bulk_delete(db: AsyncSession, ids: List[str], table: str, id_column: str) -> List[dict]:
+    # One DELETE ... WHERE id = ANY(...) for the whole request
+    result = await db.execute(
+        text(f"DELETE FROM {table} WHERE {id_column} = ANY(CAST(:ids AS text[])) RETURNING {id_column}"),
+        {"ids": list(set(ids))}
+    )
+    deleted = set(result.scalars().all())
+    results = []
+    reported = set()
+    for index, item_id in enumerate(ids):
+        if item_id in deleted and item_id not in reported:
+            results.append({"index": index, "status": "deleted", "id": item_id, "error": None})
+            reported.add(item_id)
+        elif item_id in reported:
+            results.append(_error(index, "repeated in this request", item_id))
+        else:
+            results.append(_error(index, "not found", item_id))
+    return results
+
+
+def _filter_clause(
+    id_column: str, filter_columns: Dict[str, str], ids: Optional[List[str]], where: Dict[str, Any]
+) -> Tuple[str, dict]:
+    conditions, params = [], {}
+    if ids is not None:
+        conditions.append(f"{id_column} = ANY(CAST(:ids AS text[]))")
+        params["ids"] = list(set(ids))
+    for position, (column, value) in enumerate(where.items()):
+        sql_type = filter_columns.get(column)
+        if sql_type is None:
+            raise HTTPException(status_code=400, detail=f"Cannot filter on {column}; allowed: {', '.join(filter_columns)}")
+        values = value if isinstance(value, list) else [value]
+        if not values or any(not isinstance(item, bool) if sql_type == "boolean" else not isinstance(item, str) for item in values):
+            raise HTTPException(status_code=400, detail=f"{column} must be a {sql_type} or a non-empty list of them")
+        conditions.append(f"{column} = ANY(CAST(:f{position} AS {sql_type}[]))")
+        params[f"f{position}"] = values
+    if not conditions:
+        # Never act on a whole table by omission
+        raise HTTPException(status_code=400, detail="Give ids or at least one where filter")
+    return " AND ".join(conditions), params
+
+
+async def bulk_filter_action(
+    db: AsyncSession,
+    table: str,
+    id_column: str,
+    filter_columns: Dict[str, str],
+    action: str,
+    ids: Optional[List[str]],
+    where: Dict[str, Any],
+    dry_run: bool,
+) -> dict:
+    # Deactivates or deletes every row matching the filter with one statement
+    # that also reports how many rows the filter matched. A dry run runs the
+    # same filter as a count and writes nothing. Deactivating only touches rows
+    # that are still active, so repeated calls report 0 affected. The caller
+    # commits.
+    if action not in ("deactivate", "delete"):
+        raise HTTPException(status_code=400, detail="action must be deactivate or delete")
+    condition, params = _filter_clause(id_column, filter_columns, ids, where)
+    pending = "isactive IS DISTINCT FROM false" if action == "deactivate" else "true"
+    if dry_run:
+        query = f"SELECT count(*) AS matched, count(*) FILTER (WHERE {pending}) AS affected FROM {table} WHERE {condition}"
+    elif action == "deactivate":
+        query = f"""
+            WITH changed AS (
+                UPDATE {table} SET isactive = false WHERE {condition} AND {pending} RETURNING 1
+            )
+            SELECT (SELECT count(*) FROM {table} WHERE {condition}) AS matched, (SELECT count(*) FROM changed) AS affected
+        """
+    else:
+        query = f"""
+            WITH changed AS (
+                DELETE FROM {table} WHERE {condition} RETURNING 1
+            )
+            SELECT count(*) AS matched, count(*) AS affected FROM changed
+        """
+    row = (await db.execute(text(query), params)).one()
+    return {"action": action, "dry_run": dry_run, "matched": row.matched, "affected": row.affected}
@@ -0,0 +1,128 @@
+import hashlib
+import logging
+import os
+import time
+from collections import OrderedDict
+from typing import Dict, Optional
+from fastapi import Request, Response
+from sqlalchemy import event, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from src.db.database import engine
+from src.utils.pagination import PageParams
+
+logger = logging.getLogger(__name__)
+
+CACHE_CHANNEL = "catalog_changes"
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "256"))
+# Safety net in case the LISTEN connection drops and a notification is missed
+CACHE_TTL_SECONDS = float(os.getenv("CACHE_TTL_SECONDS", "300"))
+
+
+class _Entry:
+    __slots__ = ("version", "etag", "body", "stored_at")
+
+    def __init__(self, version: int, etag: str, body: bytes):
+        self.version = version
+        self.etag = etag
+        self.body = body
+        self.stored_at = time.monotonic()
+
+
+# In-process cache of serialized list pages. Entries are tagged with the
+# table's version when the query started; any write bumps the version, which
+# makes every older entry for that table a miss. Hits are answered straight
+# from memory without touching the session, so no connection is checked out.
+class ListCache:
+    def __init__(self, max_entries: int = CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._versions: Dict[str, int] = {}
+        self._entries: Dict[str, OrderedDict] = {}
+
+    def version(self, table: str) -> int:
+        return self._versions.get(table, 0)
+
+    def bump(self, table: str):
+        self._versions[table] = self.version(table) + 1
+        self._entries.pop(table, None)
+
+    def lookup(self, request: Request, table: str, page: PageParams) -> Optional[Response]:
+        entries = self._entries.get(table)
+        entry = entries.get((page.limit, page.after)) if entries else None
+        if entry is None or entry.version != self.version(table):
+            return None
+        if time.monotonic() - entry.stored_at > CACHE_TTL_SECONDS:
+            del entries[(page.limit, page.after)]
+            return None
+        entries.move_to_end((page.limit, page.after))
+        return self._respond(request, entry)
+
+    def store(self, request: Request, table: str, page: PageParams, version: int, body: bytes) -> Response:
+        # Content hash, so every worker hands out the same ETag for the same page
+        entry = _Entry(version, f'"{hashlib.sha1(body).hexdigest()}"', body)
+        if version == self.version(table):
+            entries = self._entries.setdefault(table, OrderedDict())
+            entries[(page.limit, page.after)] = entry
+            if len(entries) > self.max_entries:
+                entries.popitem(last=False)
+        return self._respond(request, entry)
+
+    @staticmethod
+    def _respond(request: Request, entry: _Entry) -> Response:
+        if request.headers.get("if-none-match") == entry.etag:
+            return Response(status_code=304, headers={"ETag": entry.etag})
+        return Response(content=entry.body, media_type="application/json", headers={"ETag": entry.etag})
+
+
+list_cache = ListCache()
+
+
+# Session.info key of the tables to bump once the session's transaction commits
+_PENDING_BUMPS = "list_cache_pending_bumps"
+
+
+def bump_after_commit(db: AsyncSession, *tables: str):
+    # Bumping before the commit would let a concurrent GET on this worker read
+    # the new version, query rows that are not committed yet and cache them
+    # under it. A rollback drops the pending bumps.
+    db.sync_session.info.setdefault(_PENDING_BUMPS, set()).update(tables)
+
+
+@event.listens_for(Session, "after_commit")
+def _bump_committed(session):
+    for table in session.info.pop(_PENDING_BUMPS, ()):
+        list_cache.bump(table)
+
+
+@event.listens_for(Session, "after_rollback")
+def _drop_pending_bumps(session):
+    session.info.pop(_PENDING_BUMPS, None)
+
+
+async def invalidate(db: AsyncSession, table: str):
+    # Drop this worker's pages once the caller commits, and tell the other
+    # workers from inside the transaction (NOTIFY is only delivered on commit)
+    bump_after_commit(db, table)
+    await db.execute(text("SELECT pg_notify(:channel, :table)"), {"channel": CACHE_CHANNEL, "table": table})
+
+
+_listener = None
+
+
+def _on_notify(connection, pid, channel, table):
+    list_cache.bump(table)
+
+
+async def start_cache_listener():
+    global _listener
+    _listener = await engine.connect()
+    raw = await _listener.get_raw_connection()
+    await raw.driver_connection.add_listener(CACHE_CHANNEL, _on_notify)
+    logger.info("Listening for cache invalidations on %s", CACHE_CHANNEL)
+
+
+async def stop_cache_listener():
+    global _listener
+    if _listener is not None:
+        await _listener.close()
+        _listener = None
@@ -0,0 +1,141 @@
+import asyncio
+import logging
+from fastapi import HTTPException, Response
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+from src.db import settings
+from src.db.database import engine
+from src.db.schema import CHANGE_LOG_HORIZON_TABLE, CHANGE_LOG_TABLE
+from src.utils.pagination import PageParams, keyset_query, split_page
+from src.utils.serialization import RowEncoder, dumps
+
+logger = logging.getLogger(__name__)
+
+PRUNE_BATCH_ROWS = 10000
+
+
+def parse_token(since: str) -> int:
+    try:
+        return int(since)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="since must be a token returned by a previous sync, or 0")
+
+
+async def delta_response(
+    db: AsyncSession, since: str, columns: str, table: str, id_column: str, encoder: RowEncoder, page: PageParams
+) -> Response:
+    # Sync tokens are transaction ids. The new token is the oldest transaction
+    # still running when the deletions were read: everything older is in this
+    # answer, and anything that commits later has a txid >= the token, so it
+    # shows up next time. Rows may be delivered twice, never missed.
+    #
+    # The change log only keeps CHANGE_LOG_RETENTION_HOURS of history. A token
+    # older than the newest pruned change can no longer be answered (its
+    # deletions are gone) and gets 410; the client starts over with since=0.
+    since = parse_token(since)
+    if since == 0:
+        return await _full_sync(db, columns, table, id_column, encoder, page)
+
+    params = {"table": table, "since": since}
+    result = await db.execute(text(f"""
+        WITH changed AS (
+            SELECT DISTINCT row_id FROM {CHANGE_LOG_TABLE}
+            WHERE table_name = :table AND txid >= :since
+        )
+        SELECT txid_snapshot_xmin(txid_current_snapshot()) AS token,
+               (SELECT pruned_txid FROM {CHANGE_LOG_HORIZON_TABLE}) AS pruned_txid,
+               ARRAY(SELECT c.row_id FROM changed c
+                     WHERE NOT EXISTS (SELECT 1 FROM {table} t WHERE t.{id_column} = c.row_id)
+                     ORDER BY c.row_id) AS deleted
+    """), params)
+    token, pruned_txid, deleted = result.one()
+    if since < (pruned_txid or 0):
+        raise HTTPException(status_code=410, detail="since token has expired; start over with since=0")
+
+    result = await db.execute(text(f"""
+        SELECT {columns} FROM {table}
+        WHERE {id_column} IN (
+            SELECT row_id FROM {CHANGE_LOG_TABLE} WHERE table_name = :table AND txid >= :since
+        )
+        ORDER BY {id_column}
+    """), params)
+    return _delta_body(encoder.rows(result.fetchall()), None, str(token), deleted)
+
+
+async def _full_sync(db: AsyncSession, columns: str, table: str, id_column: str, encoder: RowEncoder, page: PageParams) -> Response:
+    # since=0 is paged like the list endpoints: call again with since=0 and
+    # after=next_cursor until next_cursor is null. The token is taken before
+    # the first page and carried in the cursor, and only the last page returns
+    # it as next_since, so rows that change mid-walk come again next sync.
+    if page.after:
+        token, _, after = page.after.partition(":")
+        try:
+            token = int(token)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="after must be a next_cursor returned by a previous full sync")
+    else:
+        token = (await db.execute(text("SELECT txid_snapshot_xmin(txid_current_snapshot())"))).scalar()
+        after = None
+
+    query, params = keyset_query(columns, table, id_column, PageParams(limit=page.limit, after=after))
+    result = await db.execute(query, params)
+    rows, last_id = split_page(result.fetchall(), page)
+    if last_id is not None:
+        return _delta_body(encoder.rows(rows), f"{token}:{last_id}", None, [])
+    return _delta_body(encoder.rows(rows), None, str(token), [])
+
+
+def _delta_body(data, next_cursor, next_since, deleted) -> Response:
+    body = dumps({
+        "message": "success",
+        "next_cursor": next_cursor,
+        "next_since": next_since,
+        "data": data,
+        "deleted": deleted,
+    })
+    return Response(content=body, media_type="application/json")
+
+
+async def prune_change_log() -> int:
+    # Deletes changes older than the retention window in batches, and moves
+    # the horizon past the newest pruned txid so tokens that relied on them
+    # get 410 rather than a silently incomplete delta. Workers take turns.
+    pruned = 0
+    while True:
+        async with engine.begin() as conn:
+            locked = await conn.execute(text("SELECT pg_try_advisory_xact_lock(hashtext('prune_change_log'))"))
+            if not locked.scalar():
+                return pruned
+            result = await conn.execute(text(f"""
+                WITH gone AS (
+                    DELETE FROM {CHANGE_LOG_TABLE}
+                    WHERE change_id IN (
+                        SELECT change_id FROM {CHANGE_LOG_TABLE}
+                        WHERE changed_at < now() - make_interval(hours => :hours)
+                        ORDER BY change_id
+                        LIMIT :batch
+                    )
+                    RETURNING txid
+                ),
+                horizon AS (
+                    UPDATE {CHANGE_LOG_HORIZON_TABLE}
+                    SET pruned_txid = GREATEST(pruned_txid, (SELECT max(txid) + 1 FROM gone))
+                    WHERE EXISTS (SELECT 1 FROM gone)
+                )
+                SELECT count(*) FROM gone
+            """), {"hours": settings.CHANGE_LOG_RETENTION_HOURS, "batch": PRUNE_BATCH_ROWS})
+            count = result.scalar()
+        pruned += count
+        if count < PRUNE_BATCH_ROWS:
+            return pruned
+
+
+async def prune_change_log_periodically():
+    while True:
+        try:
+            pruned = await prune_change_log()
+            if pruned:
+                logger.info("Pruned %d change log rows", pruned)
+        except Exception:
+            logger.exception("Pruning the change log failed")
+        await asyncio.sleep(settings.CHANGE_LOG_PRUNE_INTERVAL)
@@ -0,0 +1,232 @@
+import re
+from typing import Dict, List, Optional, Sequence
+import numpy as np
+
+# Near-duplicate detection over one name column. Nothing compares every pair:
+# rows are grouped by blocking keys and only rows that share a key become
+# candidates. The keys are
+#   normalized    same text after case folding and dropping punctuation and spaces
+#   token_order   same words in a different order
+#   abbreviation  one row's name or abbreviation equals another's abbreviation
+#   typo          short names one deletion apart (edit distance <= 2)
+#   minhash       one of the LSH bands of a MinHash signature over character
+#                 3-grams, which catches longer names that mostly overlap
+# Candidates are scored with the Jaccard similarity estimated from the MinHash
+# signatures. Rule matches are kept whatever their similarity and scored at
+# least their rule's confidence; minhash-only pairs must reach the threshold
+# and have the same number of words, since an extra word ("VALVE" / "VALVE
+# BALL") usually names a different item.
+#
+# Accepted pairs are clustered by connected components. Chains of weak links
+# (HAVUKA - HEVUKA - HEDUKA ...) can grow one huge component, so components
+# over MAX_CLUSTER_SIZE rows are split by dropping their weakest kind of link,
+# typo first, then minhash, abbreviation and token_order, until they fit. Names whose numbers differ ("M10" / "M12") are never
+# paired.
+
+NUM_PERM = 60
+BANDS = 12  # 5 rows per band: pairs above ~0.6 Jaccard almost always share a band
+SHINGLE_WIDTH = 64  # bytes of each normalized name that are shingled
+TYPO_MIN_LENGTH, TYPO_MAX_LENGTH = 5, 12
+MAX_BUCKET = 50  # larger buckets are too common a key to mean anything and are skipped
+CHUNK_ROWS = 1024  # rows hashed at once; memory is CHUNK_ROWS * SHINGLE_WIDTH * NUM_PERM * 8 bytes
+MAX_CLUSTER_SIZE = 25
+MAX_CLUSTER_PAIRS = 200
+
+REASONS = ["normalized", "token_order", "abbreviation", "typo", "minhash"]
+# Score floor per reason; minhash pairs get no floor and must pass the threshold
+REASON_SCORES = np.array([1.0, 0.95, 0.9, 0.85, 0.0], dtype=np.float32)
+# Order in which links are dropped from oversized clusters, weakest last
+REASON_STRENGTH = np.array([4, 3, 2, 0, 1], dtype=np.int8)
+
+_rng = np.random.RandomState(20240601)
+_HASH_A = _rng.randint(1, 2 ** 62, size=NUM_PERM, dtype=np.int64).astype(np.uint64) * np.uint64(2) + np.uint64(1)
+_HASH_B = _rng.randint(0, 2 ** 62, size=NUM_PERM, dtype=np.int64).astype(np.uint64)
+_BAND_MIX = _rng.randint(1, 2 ** 62, size=NUM_PERM // BANDS, dtype=np.int64).astype(np.uint64) * np.uint64(2) + np.uint64(1)
+
+_NON_ALNUM = re.compile(r"[^0-9a-z]+")
+_DIGITS = re.compile(r"\d+")
+
+
+def normalize(name: Optional[str]) -> str:
+    return _NON_ALNUM.sub(" ", str(name or "").lower()).strip()
+
+
+def _keys_to_ids(keys: Sequence) -> np.ndarray:
+    # hash() is stable within one process, which is all a single run needs
+    return np.fromiter((hash(key) for key in keys), dtype=np.int64, count=len(keys))
+
+
+def _bucket_pairs(keys: np.ndarray, rows: np.ndarray) -> np.ndarray:
+    # All (i, j), i < j, of rows sharing a key, for buckets of 2..MAX_BUCKET rows
+    if len(keys) == 0:
+        return np.empty((0, 2), dtype=np.int64)
+    order = np.lexsort((rows, keys))
+    keys, rows = keys[order], rows[order]
+    distinct = np.r_[True, (keys[1:] != keys[:-1]) | (rows[1:] != rows[:-1])]
+    keys, rows = keys[distinct], rows[distinct]
+    starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+    sizes = np.diff(np.r_[starts, len(keys)])
+    pairs = [np.empty((0, 2), dtype=np.int64)]
+    for size in np.unique(sizes[(sizes >= 2) & (sizes <= MAX_BUCKET)]):
+        members = rows[starts[sizes == size][:, None] + np.arange(size)]
+        first, second = np.triu_indices(size, 1)
+        pairs.append(np.stack([members[:, first].ravel(), members[:, second].ravel()], axis=1))
+    return np.concatenate(pairs)
+
+
+def _signatures(names: List[str]) -> np.ndarray:
+    # MinHash over byte 3-grams. Each name is padded with spaces, cut to
+    # SHINGLE_WIDTH bytes and laid out as a fixed-width uint8 matrix so the
+    # 3-grams and all NUM_PERM hash functions are computed array-wide. Rows go
+    # through in length order so each chunk is only as wide as its longest name.
+    padded = [f" {name} ".encode()[:SHINGLE_WIDTH] for name in names]
+    lengths = np.fromiter(map(len, padded), dtype=np.int64, count=len(padded))
+    raw = np.array(padded, dtype=f"S{SHINGLE_WIDTH}").view(np.uint8).reshape(len(padded), SHINGLE_WIDTH)
+    signatures = np.empty((len(padded), NUM_PERM), dtype=np.uint32)
+    by_length = np.argsort(lengths, kind="stable")
+    for start in range(0, len(padded), CHUNK_ROWS):
+        rows = by_length[start:start + CHUNK_ROWS]
+        width = max(int(lengths[rows[-1]]), 3)
+        block = raw[rows, :width].astype(np.uint64)
+        shingles = (block[:, :-2] << np.uint64(16)) | (block[:, 1:-1] << np.uint64(8)) | block[:, 2:]
+        # Multiply-shift hashing; uint64 overflow wraps, which is the intent
+        hashed = (shingles[:, :, None] * _HASH_A + _HASH_B) >> np.uint64(32)
+        hashed[np.arange(width - 2)[None, :] >= (lengths[rows, None] - 2)] = np.uint64(0xFFFFFFFF)
+        signatures[rows] = hashed.min(axis=1)
+    return signatures
+
+
+def _rule_keys(names: List[str], abbreviations: Optional[List[Optional[str]]]) -> List[np.ndarray]:
+    count = len(names)
+    all_rows = np.arange(count, dtype=np.int64)
+    pairs_by_reason = [
+        _bucket_pairs(_keys_to_ids([name.replace(" ", "") for name in names]), all_rows),
+        _bucket_pairs(_keys_to_ids([" ".join(sorted(name.split())) for name in names]), all_rows),
+    ]
+
+    keys, rows = list(names), list(range(count))
+    for row, abbreviation in enumerate(abbreviations or []):
+        abbreviation = normalize(abbreviation)
+        if abbreviation:
+            keys.append(abbreviation)
+            rows.append(row)
+    pairs_by_reason.append(_bucket_pairs(_keys_to_ids(keys), np.array(rows, dtype=np.int64)))
+
+    keys, rows = [], []
+    for row, name in enumerate(names):
+        if TYPO_MIN_LENGTH <= len(name) <= TYPO_MAX_LENGTH:
+            keys.append(name)
+            keys += [name[:position] + name[position + 1:] for position in range(len(name))]
+            rows += [row] * (len(name) + 1)
+    pairs_by_reason.append(_bucket_pairs(_keys_to_ids(keys), np.array(rows, dtype=np.int64)))
+    return pairs_by_reason
+
+
+def _band_pairs(signatures: np.ndarray) -> np.ndarray:
+    rows_per_band = NUM_PERM // BANDS
+    all_rows = np.arange(len(signatures), dtype=np.int64)
+    pairs = []
+    for band in range(BANDS):
+        values = signatures[:, band * rows_per_band:(band + 1) * rows_per_band].astype(np.uint64)
+        keys = (values * _BAND_MIX).sum(axis=1, dtype=np.uint64).view(np.int64)
+        pairs.append(_bucket_pairs(keys, all_rows))
+    return np.concatenate(pairs)
+
+
+def _scores(signatures: np.ndarray, pairs: np.ndarray) -> np.ndarray:
+    scores = np.empty(len(pairs), dtype=np.float32)
+    for start in range(0, len(pairs), CHUNK_ROWS * 64):
+        chunk = pairs[start:start + CHUNK_ROWS * 64]
+        scores[start:start + len(chunk)] = (signatures[chunk[:, 0]] == signatures[chunk[:, 1]]).mean(axis=1)
+    return scores
+
+
+def _components(count: int, pairs: np.ndarray) -> np.ndarray:
+    # Connected components by label propagation; every row starts as its own label
+    labels = np.arange(count, dtype=np.int64)
+    while True:
+        low = np.minimum(labels[pairs[:, 0]], labels[pairs[:, 1]])
+        updated = labels.copy()
+        np.minimum.at(updated, pairs[:, 0], low)
+        np.minimum.at(updated, pairs[:, 1], low)
+        updated = updated[updated]  # pointer jumping halves the remaining rounds
+        if np.array_equal(updated, labels):
+            return labels
+        labels = updated
+
+
+def _split_components(count: int, pairs: np.ndarray, reasons: np.ndarray) -> np.ndarray:
+    strength = REASON_STRENGTH[reasons]
+    keep = np.ones(len(pairs), dtype=bool)
+    for weakest in range(int(REASON_STRENGTH.max())):
+        labels = _components(count, pairs[keep])
+        sizes = np.bincount(labels, minlength=count)
+        oversized = sizes[labels[pairs[:, 0]]] > MAX_CLUSTER_SIZE
+        if not (oversized & keep).any():
+            return labels
+        keep &= ~(oversized & (strength == weakest))
+    return _components(count, pairs[keep])
+
+
+def find_duplicates(
+    names: List[Optional[str]],
+    abbreviations: Optional[List[Optional[str]]] = None,
+    threshold: float = 0.6,
+) -> Dict[str, object]:
+    # Returns {"clusters": [...], "stats": {...}}. Each cluster lists its member
+    # row indices, its accepted pairs as (i, j, score, reason) and its score,
+    # the weakest accepted pair. Clusters come largest first.
+    normalized = [normalize(name) for name in names]
+    signatures = _signatures(normalized)
+
+    candidate_sets = _rule_keys(normalized, abbreviations) + [_band_pairs(signatures)]
+    reasons = np.concatenate([np.full(len(pairs), code, dtype=np.int8) for code, pairs in enumerate(candidate_sets)])
+    pairs = np.concatenate(candidate_sets)
+    if len(pairs):
+        pairs = np.sort(pairs, axis=1)
+        # Keep one entry per pair, the strongest (lowest) reason
+        order = np.lexsort((reasons, pairs[:, 1], pairs[:, 0]))
+        pairs, reasons = pairs[order], reasons[order]
+        first = np.r_[True, (pairs[1:] != pairs[:-1]).any(axis=1)]
+        pairs, reasons = pairs[first], reasons[first]
+    candidates = len(pairs)
+
+    digits = _keys_to_ids([tuple(_DIGITS.findall(name)) for name in normalized])
+    blank = np.fromiter((not name for name in normalized), dtype=bool, count=len(normalized))
+    words = np.fromiter((name.count(" ") for name in normalized), dtype=np.int64, count=len(normalized))
+    scores = _scores(signatures, pairs)
+    accepted = (
+        (digits[pairs[:, 0]] == digits[pairs[:, 1]])
+        & ~blank[pairs[:, 0]] & ~blank[pairs[:, 1]]
+        & ((REASON_SCORES[reasons] > 0) | ((scores >= threshold) & (words[pairs[:, 0]] == words[pairs[:, 1]])))
+    )
+    scores = np.maximum(scores, REASON_SCORES[reasons])
+    pairs, reasons, scores = pairs[accepted], reasons[accepted], scores[accepted]
+
+    clusters = []
+    if len(pairs):
+        labels = _split_components(len(names), pairs, reasons)
+        # Links dropped while splitting now join two different clusters
+        linked = labels[pairs[:, 0]] == labels[pairs[:, 1]]
+        pairs, reasons, scores = pairs[linked], reasons[linked], scores[linked]
+        pair_labels = labels[pairs[:, 0]]
+        order = np.argsort(pair_labels, kind="stable")
+        pair_labels, pairs, reasons, scores = pair_labels[order], pairs[order], reasons[order], scores[order]
+        bounds = np.flatnonzero(np.r_[True, pair_labels[1:] != pair_labels[:-1], True])
+        for start, end in zip(bounds[:-1], bounds[1:]):
+            members = np.unique(pairs[start:end])
+            strongest = np.argsort(-scores[start:end], kind="stable")[:MAX_CLUSTER_PAIRS] + start
+            clusters.append({
+                "members": members.tolist(),
+                "score": round(float(scores[start:end].min()), 3),
+                "pairs": [
+                    (int(pairs[index, 0]), int(pairs[index, 1]), round(float(scores[index]), 3), REASONS[reasons[index]])
+                    for index in strongest
+                ],
+            })
+        clusters.sort(key=lambda cluster: (-len(cluster["members"]), -cluster["score"]))
+
+    return {
+        "clusters": clusters,
+        "stats": {"rows": len(names), "candidate_pairs": candidates, "accepted_pairs": len(pairs), "clusters": len(clusters)},
+    }
@@ -0,0 +1,217 @@
+import asyncio
+import logging
+import os
+import uuid
+from typing import List, Optional
+from fastapi import HTTPException
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+from src.db.database import SessionLocal, engine
+from src.db.schema import DEDUPE_CLUSTERS_TABLE, DEDUPE_JOBS_TABLE
+from src.utils.executor import run_blocking
+from src.utils.pagination import PageParams
+from src.utils.serialization import dumps
+
+logger = logging.getLogger(__name__)
+
+DEDUPE_WORKERS = int(os.getenv("DEDUPE_WORKERS", "1"))
+DEDUPE_QUEUE_SIZE = int(os.getenv("DEDUPE_QUEUE_SIZE", "20"))
+CLUSTER_INSERT_BATCH = 1000
+
+# Name columns a job can scan: source -> (table, id column, name column, abbreviation column)
+DEDUPE_SOURCES = {
+    "noun": ("noun_mstr", "noun_id", "noun", "abbreviation"),
+    "modifier": ("modifier_mstr", "modifier_id", "modifier", "abbreviation"),
+    "attribute_value": ("attribute_value_master", "attribute_value_id", "attribute_value", "attribute_value_abbr"),
+    "manufacturer": ("manufacturer_master", "manufacturid", "manufacturname", None),
+}
+
+JOB_COLUMNS = """
+    job_id, status, sources, threshold, total_rows, processed_sources, clusters, error,
+    created_at, started_at, finished_at
+"""
+
+
+def _cluster_rows(found: dict, ids: list, names: list, first_cluster_no: int) -> dict:
+    # find_duplicates works on row positions; store ids and names instead
+    params = {"cluster_no": [], "size": [], "score": [], "members": [], "pairs": []}
+    for offset, cluster in enumerate(found["clusters"]):
+        params["cluster_no"].append(first_cluster_no + offset)
+        params["size"].append(len(cluster["members"]))
+        params["score"].append(cluster["score"])
+        params["members"].append(dumps([{"id": ids[row], "name": names[row]} for row in cluster["members"]]).decode())
+        params["pairs"].append(dumps([
+            {"first": ids[first], "second": ids[second], "score": score, "reason": reason}
+            for first, second, score, reason in cluster["pairs"]
+        ]).decode())
+    return params
+
+
+# Near-duplicate scans run as background jobs, one source table after the
+# other. The detection itself (src/utils/dedupe.py, numpy) runs on the
+# blocking-work pool; its clusters are written to DEDUPE_CLUSTERS_TABLE and
+# paged out by cluster number. An interrupted job starts over, dropping what
+# it had written. Like the upload jobs, a session-level advisory lock keeps two
+# workers from running the same job.
+class DedupeJobs:
+    def __init__(self):
+        self._queue: asyncio.Queue = None
+        self._tasks: List[asyncio.Task] = []
+
+    async def start(self):
+        self._queue = asyncio.Queue(maxsize=DEDUPE_QUEUE_SIZE)
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(DEDUPE_WORKERS)]
+        self._tasks.append(asyncio.create_task(self._recover()))
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def submit(self, db: AsyncSession, sources: Optional[List[str]], threshold: float) -> str:
+        sources = list(dict.fromkeys(sources or DEDUPE_SOURCES))
+        unknown = [source for source in sources if source not in DEDUPE_SOURCES]
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown source(s) {', '.join(unknown)}; choose from {', '.join(DEDUPE_SOURCES)}")
+        if not 0 < threshold <= 1:
+            raise HTTPException(status_code=400, detail="threshold must be greater than 0 and at most 1")
+        if self._queue is None or self._queue.full():
+            raise HTTPException(status_code=503, detail="Dedupe queue is full, try again later")
+        job_id = uuid.uuid4().hex
+        await db.execute(
+            text(f"INSERT INTO {DEDUPE_JOBS_TABLE} (job_id, sources, threshold) VALUES (:job_id, CAST(:sources AS text[]), :threshold)"),
+            {"job_id": job_id, "sources": sources, "threshold": threshold}
+        )
+        await db.commit()
+        await self._queue.put(job_id)
+        return job_id
+
+    async def get(self, db: AsyncSession, job_id: str) -> dict:
+        result = await db.execute(text(f"SELECT {JOB_COLUMNS} FROM {DEDUPE_JOBS_TABLE} WHERE job_id = :job_id"), {"job_id": job_id})
+        row = result.mappings().one_or_none()
+        if row is None:
+            raise HTTPException(status_code=404, detail="Job not found")
+        return dict(row)
+
+    async def clusters(self, db: AsyncSession, job_id: str, page: PageParams, source: Optional[str]):
+        # Largest clusters first within each source; `after` is the last cluster_no seen
+        await self.get(db, job_id)  # 404 for unknown ids
+        try:
+            after = int(page.after) if page.after else -1
+        except ValueError:
+            raise HTTPException(status_code=400, detail="after must be a next_cursor returned by this endpoint")
+        result = await db.execute(text(f"""
+            SELECT cluster_no, source, size, score, members, pairs
+            FROM {DEDUPE_CLUSTERS_TABLE}
+            WHERE job_id = :job_id AND cluster_no > :after AND (CAST(:source AS text) IS NULL OR source = CAST(:source AS text))
+            ORDER BY cluster_no
+            LIMIT :limit
+        """), {"job_id": job_id, "after": after, "source": source, "limit": page.limit + 1})
+        rows = [dict(row) for row in result.mappings()]
+        if len(rows) > page.limit:
+            rows = rows[:page.limit]
+            return rows, str(rows[-1]["cluster_no"])
+        return rows, None
+
+    async def _recover(self):
+        async with SessionLocal() as db:
+            result = await db.execute(
+                text(f"SELECT job_id FROM {DEDUPE_JOBS_TABLE} WHERE status IN ('queued', 'running') ORDER BY created_at")
+            )
+            job_ids = result.scalars().all()
+        for job_id in job_ids:
+            await self._queue.put(job_id)
+
+    async def _worker(self):
+        while True:
+            job_id = await self._queue.get()
+            try:
+                await self._run(job_id)
+            except Exception:
+                logger.exception("Dedupe job %s crashed", job_id)
+            finally:
+                self._queue.task_done()
+
+    async def _run(self, job_id: str):
+        async with engine.connect() as lock:
+            result = await lock.execute(text("SELECT pg_try_advisory_lock(hashtext(:job_id))"), {"job_id": job_id})
+            acquired = result.scalar()
+            await lock.commit()
+            if not acquired:
+                return
+            try:
+                await self._process(job_id)
+            finally:
+                await lock.execute(text("SELECT pg_advisory_unlock(hashtext(:job_id))"), {"job_id": job_id})
+                await lock.commit()
+
+    async def _update(self, job_id: str, assignments: str, params: dict = None):
+        async with SessionLocal() as db:
+            await db.execute(text(f"UPDATE {DEDUPE_JOBS_TABLE} SET {assignments} WHERE job_id = :job_id"), {"job_id": job_id, **(params or {})})
+            await db.commit()
+
+    async def _process(self, job_id: str):
+        async with SessionLocal() as db:
+            result = await db.execute(
+                text(f"SELECT status, sources, threshold FROM {DEDUPE_JOBS_TABLE} WHERE job_id = :job_id"), {"job_id": job_id}
+            )
+            job = result.one_or_none()
+            if job is None or job.status not in ("queued", "running"):
+                return
+            await db.execute(text(f"DELETE FROM {DEDUPE_CLUSTERS_TABLE} WHERE job_id = :job_id"), {"job_id": job_id})
+            await db.execute(text(f"""
+                UPDATE {DEDUPE_JOBS_TABLE}
+                SET status = 'running', started_at = now(), finished_at = NULL,
+                    total_rows = 0, processed_sources = 0, clusters = 0, error = NULL
+                WHERE job_id = :job_id
+            """), {"job_id": job_id})
+            await db.commit()
+
+        try:
+            # numpy is only loaded once a dedupe job actually runs
+            from src.utils.dedupe import find_duplicates
+
+            cluster_no = 0
+            for source in job.sources:
+                table, id_column, name_column, abbreviation_column = DEDUPE_SOURCES[source]
+                columns = f"{id_column}, {name_column}" + (f", {abbreviation_column}" if abbreviation_column else "")
+                async with SessionLocal() as db:
+                    result = await db.execute(text(f"SELECT {columns} FROM {table} ORDER BY {id_column}"))
+                    rows = result.fetchall()
+                ids = [row[0] for row in rows]
+                names = [row[1] for row in rows]
+                abbreviations = [row[2] for row in rows] if abbreviation_column else None
+                # The pure-Python parts hold the GIL; SPREADSHEET_EXECUTOR=process
+                # keeps large scans from stalling the event loop
+                found = await run_blocking(find_duplicates, names, abbreviations, job.threshold)
+
+                params = _cluster_rows(found, ids, names, cluster_no)
+                async with SessionLocal() as db:
+                    async with db.begin():
+                        for start in range(0, len(params["cluster_no"]), CLUSTER_INSERT_BATCH):
+                            batch = {key: values[start:start + CLUSTER_INSERT_BATCH] for key, values in params.items()}
+                            await db.execute(text(f"""
+                                INSERT INTO {DEDUPE_CLUSTERS_TABLE} (job_id, cluster_no, source, size, score, members, pairs)
+                                SELECT :job_id, u.cluster_no, :source, u.size, u.score, CAST(u.members AS jsonb), CAST(u.pairs AS jsonb)
+                                FROM unnest(
+                                    CAST(:cluster_no AS integer[]), CAST(:size AS integer[]), CAST(:score AS real[]),
+                                    CAST(:members AS text[]), CAST(:pairs AS text[])
+                                ) AS u(cluster_no, size, score, members, pairs)
+                            """), {"job_id": job_id, "source": source, **batch})
+                        await db.execute(text(f"""
+                            UPDATE {DEDUPE_JOBS_TABLE}
+                            SET total_rows = total_rows + :rows, processed_sources = processed_sources + 1,
+                                clusters = clusters + :clusters
+                            WHERE job_id = :job_id
+                        """), {"job_id": job_id, "rows": len(rows), "clusters": len(found["clusters"])})
+                cluster_no += len(found["clusters"])
+        except Exception as e:
+            logger.exception("Dedupe job %s failed", job_id)
+            await self._update(job_id, "status = 'failed', error = :error, finished_at = now()", {"error": str(e)})
+            return
+
+        await self._update(job_id, "status = 'succeeded', finished_at = now()")
+
+
+dedupe_jobs = DedupeJobs()
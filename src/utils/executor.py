@@ -0,0 +1,51 @@
+import asyncio
+import functools
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Optional
+
+# Where blocking spreadsheet work runs. "thread" suits most loads since pandas
+# and zlib release the GIL for much of their work; "process" sidesteps the GIL
+# entirely for large parses at the cost of pickling the arguments and results.
+SPREADSHEET_EXECUTOR = os.getenv("SPREADSHEET_EXECUTOR", "thread")
+SPREADSHEET_WORKERS = int(os.getenv("SPREADSHEET_WORKERS", str(min(4, os.cpu_count() or 1))))
+
+_pool: Optional[Executor] = None
+_threads: Optional[ThreadPoolExecutor] = None
+
+
+def _get_pool() -> Executor:
+    global _pool
+    if _pool is None:
+        if SPREADSHEET_EXECUTOR == "process":
+            _pool = ProcessPoolExecutor(max_workers=SPREADSHEET_WORKERS)
+        else:
+            _pool = ThreadPoolExecutor(max_workers=SPREADSHEET_WORKERS, thread_name_prefix="spreadsheet")
+    return _pool
+
+
+def _get_threads() -> ThreadPoolExecutor:
+    global _threads
+    if _threads is None:
+        _threads = ThreadPoolExecutor(max_workers=SPREADSHEET_WORKERS, thread_name_prefix="blocking-io")
+    return _threads
+
+
+async def run_blocking(func, *args, **kwargs):
+    # Self-contained work (module-level function, picklable arguments) that
+    # may run in a separate process, e.g. parsing a workbook from a path
+    return await asyncio.get_running_loop().run_in_executor(_get_pool(), functools.partial(func, *args, **kwargs))
+
+
+async def run_in_thread(func, *args, **kwargs):
+    # Blocking calls on in-process objects (open files, workbooks, compressors)
+    # that cannot be shipped to another process
+    return await asyncio.get_running_loop().run_in_executor(_get_threads(), functools.partial(func, *args, **kwargs))
+
+
+def shutdown_executors():
+    global _pool, _threads
+    for executor in (_pool, _threads):
+        if executor is not None:
+            executor.shutdown(wait=False)
+    _pool = _threads = None
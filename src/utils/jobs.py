@@ -0,0 +1,205 @@
+import asyncio
+import logging
+import os
+import shutil
+import tempfile
+import uuid
+from typing import Awaitable, Callable, Dict, List
+from fastapi import HTTPException, UploadFile
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+from src.db.database import SessionLocal, engine
+from src.db.schema import JOBS_TABLE
+from src.spreadsheet.ingest import INGEST_CHUNK_SIZE, read_sheet
+from src.utils.executor import run_blocking, run_in_thread
+from src.utils.serialization import dumps
+
+logger = logging.getLogger(__name__)
+
+UPLOAD_WORKERS = int(os.getenv("UPLOAD_WORKERS", "2"))
+UPLOAD_QUEUE_SIZE = int(os.getenv("UPLOAD_QUEUE_SIZE", "100"))
+UPLOAD_JOB_DIR = os.getenv("UPLOAD_JOB_DIR", os.path.join(tempfile.gettempdir(), "modifierpro-uploads"))
+# Rejected rows kept per job for the status endpoint; all of them are counted in `failed`
+UPLOAD_MAX_ROW_ERRORS = int(os.getenv("UPLOAD_MAX_ROW_ERRORS", "1000"))
+
+def _spool(source, path: str):
+    with open(path, "wb") as spooled:
+        shutil.copyfileobj(source, spooled)
+
+
+JOB_COLUMNS = """
+    job_id, kind, status, filename, total_rows, processed_rows, inserted, updated, skipped, failed, row_errors, error,
+    created_at, started_at, finished_at,
+    CASE WHEN started_at IS NULL THEN NULL
+         ELSE round(((processed_rows - start_row) / GREATEST(EXTRACT(EPOCH FROM COALESCE(finished_at, now()) - started_at), 0.001))::numeric, 1)
+    END AS rows_per_second
+"""
+
+
+class _Kind:
+    def __init__(self, required_columns: List[str], ingest: Callable[..., Awaitable[dict]]):
+        self.required_columns = required_columns
+        self.ingest = ingest
+
+
+# Spreadsheet uploads run as background jobs. The request only spools the file
+# to UPLOAD_JOB_DIR and records a job row; a fixed number of worker tasks per
+# process then ingest the sheet in INGEST_CHUNK_SIZE-row chunks. Each chunk
+# commits together with the job's progress, so a failed or interrupted job
+# resumes from the first row that was not committed. A session-level advisory
+# lock keeps two workers (or processes) from running the same job.
+class UploadJobs:
+    def __init__(self):
+        self._kinds: Dict[str, _Kind] = {}
+        self._queue: asyncio.Queue = None
+        self._tasks: List[asyncio.Task] = []
+
+    def register(self, kind: str, required_columns: List[str], ingest):
+        # ingest(db, chunk) upserts one chunk inside the caller's transaction
+        # and returns bulk_upsert-style counts, optionally with failed rows
+        # under "failed" and "errors"
+        self._kinds[kind] = _Kind(required_columns, ingest)
+
+    async def start(self):
+        os.makedirs(UPLOAD_JOB_DIR, exist_ok=True)
+        self._queue = asyncio.Queue(maxsize=UPLOAD_QUEUE_SIZE)
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(UPLOAD_WORKERS)]
+        self._tasks.append(asyncio.create_task(self._recover()))
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def submit(self, db: AsyncSession, kind: str, file: UploadFile) -> str:
+        if self._queue is None or self._queue.full():
+            raise HTTPException(status_code=503, detail="Upload queue is full, try again later")
+        job_id = uuid.uuid4().hex
+        path = os.path.join(UPLOAD_JOB_DIR, f"{job_id}.xlsx")
+        await run_in_thread(_spool, file.file, path)
+        await db.execute(
+            text(f"INSERT INTO {JOBS_TABLE} (job_id, kind, filename, file_path) VALUES (:job_id, :kind, :filename, :file_path)"),
+            {"job_id": job_id, "kind": kind, "filename": file.filename, "file_path": path}
+        )
+        await db.commit()
+        await self._queue.put(job_id)
+        return job_id
+
+    async def get(self, db: AsyncSession, job_id: str) -> dict:
+        result = await db.execute(text(f"SELECT {JOB_COLUMNS} FROM {JOBS_TABLE} WHERE job_id = :job_id"), {"job_id": job_id})
+        row = result.mappings().one_or_none()
+        if row is None:
+            raise HTTPException(status_code=404, detail="Job not found")
+        return dict(row)
+
+    async def recent(self, db: AsyncSession, limit: int) -> List[dict]:
+        result = await db.execute(
+            text(f"SELECT {JOB_COLUMNS} FROM {JOBS_TABLE} ORDER BY created_at DESC LIMIT :limit"), {"limit": limit}
+        )
+        return [dict(row) for row in result.mappings()]
+
+    async def resume(self, db: AsyncSession, job_id: str):
+        result = await db.execute(
+            text(f"UPDATE {JOBS_TABLE} SET status = 'queued', error = NULL WHERE job_id = :job_id AND status = 'failed' RETURNING job_id"),
+            {"job_id": job_id}
+        )
+        if result.scalar() is None:
+            await db.rollback()
+            await self.get(db, job_id)  # 404 for unknown ids
+            raise HTTPException(status_code=409, detail="Only failed jobs can be resumed")
+        await db.commit()
+        await self._queue.put(job_id)
+
+    async def _recover(self):
+        # Jobs left queued or running by a previous process; the advisory lock
+        # in _run skips the ones another live process is still working on
+        async with SessionLocal() as db:
+            result = await db.execute(
+                text(f"SELECT job_id FROM {JOBS_TABLE} WHERE status IN ('queued', 'running') ORDER BY created_at")
+            )
+            job_ids = result.scalars().all()
+        for job_id in job_ids:
+            await self._queue.put(job_id)
+
+    async def _worker(self):
+        while True:
+            job_id = await self._queue.get()
+            try:
+                await self._run(job_id)
+            except Exception:
+                logger.exception("Upload job %s crashed", job_id)
+            finally:
+                self._queue.task_done()
+
+    async def _run(self, job_id: str):
+        async with engine.connect() as lock:
+            result = await lock.execute(text("SELECT pg_try_advisory_lock(hashtext(:job_id))"), {"job_id": job_id})
+            acquired = result.scalar()
+            # The lock is session-level; do not sit idle in a transaction for the whole job
+            await lock.commit()
+            if not acquired:
+                return
+            try:
+                await self._process(job_id)
+            finally:
+                await lock.execute(text("SELECT pg_advisory_unlock(hashtext(:job_id))"), {"job_id": job_id})
+                await lock.commit()
+
+    async def _update(self, job_id: str, assignments: str, params: dict = None):
+        async with SessionLocal() as db:
+            await db.execute(text(f"UPDATE {JOBS_TABLE} SET {assignments} WHERE job_id = :job_id"), {"job_id": job_id, **(params or {})})
+            await db.commit()
+
+    async def _process(self, job_id: str):
+        async with SessionLocal() as db:
+            result = await db.execute(
+                text(f"SELECT kind, status, file_path, processed_rows FROM {JOBS_TABLE} WHERE job_id = :job_id"), {"job_id": job_id}
+            )
+            job = result.one_or_none()
+        if job is None or job.status not in ("queued", "running"):
+            return
+        await self._update(job_id, "status = 'running', started_at = now(), finished_at = NULL, start_row = processed_rows")
+
+        try:
+            kind = self._kinds[job.kind]
+            df = await run_blocking(read_sheet, job.file_path)
+            missing = [column for column in kind.required_columns if column not in df.columns]
+            if missing:
+                raise ValueError(f"Excel file must contain {', '.join(repr(column) for column in missing)} column(s)")
+            await self._update(job_id, "total_rows = :total_rows", {"total_rows": len(df)})
+
+            for start in range(job.processed_rows, len(df), INGEST_CHUNK_SIZE):
+                end = min(start + INGEST_CHUNK_SIZE, len(df))
+                async with SessionLocal() as db:
+                    async with db.begin():
+                        stats = await kind.ingest(db, df.iloc[start:end])
+                        await db.execute(text(f"""
+                            UPDATE {JOBS_TABLE}
+                            SET processed_rows = :processed_rows, inserted = inserted + :inserted,
+                                updated = updated + :updated, skipped = skipped + :skipped, failed = failed + :failed,
+                                row_errors = row_errors || (
+                                    SELECT COALESCE(jsonb_agg(e ORDER BY n), '[]')
+                                    FROM jsonb_array_elements(CAST(:row_errors AS jsonb)) WITH ORDINALITY AS r(e, n)
+                                    WHERE n <= :max_row_errors - jsonb_array_length(row_errors)
+                                )
+                            WHERE job_id = :job_id
+                        """), {
+                            "job_id": job_id, "processed_rows": end,
+                            "inserted": stats["inserted"], "updated": stats["updated"], "skipped": stats["skipped"],
+                            "failed": stats.get("failed", 0), "row_errors": dumps(stats.get("errors", [])).decode(),
+                            "max_row_errors": UPLOAD_MAX_ROW_ERRORS,
+                        })
+        except Exception as e:
+            logger.exception("Upload job %s failed", job_id)
+            await self._update(job_id, "status = 'failed', error = :error, finished_at = now()", {"error": str(e)})
+            return
+
+        await self._update(job_id, "status = 'succeeded', finished_at = now()")
+        try:
+            os.remove(job.file_path)
+        except OSError:
+            pass
+
+
+upload_jobs = UploadJobs()
@@ -0,0 +1,232 @@
+import asyncio
+import os
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Tuple
+from src.db import settings
+
+# Minimal Prometheus text-format registry. Observations are a bisect and two
+# additions on plain dicts, cheap enough to leave on under production load.
+# Each worker process keeps its own numbers.
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+LOOP_LAG_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+LOOP_LAG_INTERVAL = float(os.getenv("LOOP_LAG_INTERVAL", "0.5"))
+
+
+class Histogram:
+    def __init__(self, name: str, help_text: str, buckets, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = tuple(buckets)
+        self.labelnames = labelnames
+        self._series: Dict[tuple, list] = {}
+
+    def observe(self, value: float, labels: tuple = ()):
+        series = self._series.get(labels)
+        if series is None:
+            series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1] += value
+        series[2] += 1
+
+    def _labels(self, labels: tuple, extra: str = "") -> str:
+        pairs = [f'{name}="{value}"' for name, value in zip(self.labelnames, labels)]
+        if extra:
+            pairs.append(extra)
+        return "{" + ",".join(pairs) + "}" if pairs else ""
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        for labels, (counts, total, count) in self._series.items():
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                le = f'le="{bound}"'
+                lines.append(f"{self.name}_bucket{self._labels(labels, le)} {cumulative}")
+            le = 'le="+Inf"'
+            lines.append(f"{self.name}_bucket{self._labels(labels, le)} {count}")
+            lines.append(f"{self.name}_sum{self._labels(labels)} {total}")
+            lines.append(f"{self.name}_count{self._labels(labels)} {count}")
+        return lines
+
+
+class Counter:
+    def __init__(self, name: str, help_text: str):
+        self.name = name
+        self.help_text = help_text
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0):
+        self.value += amount
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter", f"{self.name} {self.value}"]
+
+
+class Gauge:
+    def __init__(self, name: str, help_text: str):
+        self.name = name
+        self.help_text = help_text
+        self.value = 0.0
+
+    def set(self, value: float):
+        self.value = value
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} gauge", f"{self.name} {self.value}"]
+
+
+request_duration = Histogram(
+    "http_request_duration_seconds", "Request latency by route", LATENCY_BUCKETS, ("method", "route", "status")
+)
+request_db_queries = Histogram(
+    "http_request_db_queries", "Database statements executed per request", QUERY_COUNT_BUCKETS, ("method", "route")
+)
+request_db_seconds = Histogram(
+    "http_request_db_seconds", "Time spent in database statements per request", LATENCY_BUCKETS, ("method", "route")
+)
+request_pool_wait_seconds = Histogram(
+    "http_request_pool_wait_seconds", "Time spent waiting for pooled connections per request", LATENCY_BUCKETS, ("method", "route")
+)
+pool_wait_seconds = Histogram("db_pool_wait_seconds", "Time spent waiting for a pooled connection", LATENCY_BUCKETS)
+db_queries_total = Counter("db_queries_total", "Database statements executed")
+db_query_seconds_total = Counter("db_query_seconds_total", "Time spent in database statements")
+event_loop_lag = Gauge("event_loop_lag_seconds", "How late the most recent event loop probe woke up")
+event_loop_lag_samples = Histogram("event_loop_lag_sample_seconds", "Event loop probe lateness", LOOP_LAG_BUCKETS)
+
+REGISTRY = [
+    request_duration, request_db_queries, request_db_seconds, request_pool_wait_seconds,
+    pool_wait_seconds, db_queries_total, db_query_seconds_total, event_loop_lag, event_loop_lag_samples,
+]
+
+
+class RequestStats:
+    __slots__ = ("queries", "db_seconds", "pool_wait_seconds")
+
+    def __init__(self):
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.pool_wait_seconds = 0.0
+
+
+_current: ContextVar[Optional[RequestStats]] = ContextVar("request_stats", default=None)
+
+
+def current_request_stats() -> Optional[RequestStats]:
+    return _current.get()
+
+
+@contextmanager
+def untracked():
+    # For one-off housekeeping (e.g. creating an id sequence) that should not
+    # count against the request that happened to trigger it
+    token = _current.set(None)
+    try:
+        yield
+    finally:
+        _current.reset(token)
+
+
+class QueryCount:
+    def __init__(self, stats: RequestStats):
+        self._stats = stats
+        self._start = stats.queries
+
+    @property
+    def count(self) -> int:
+        return self._stats.queries - self._start
+
+
+@contextmanager
+def count_queries():
+    # Counts statements executed on the engine inside the block. Inside a
+    # request it reads the request's own counter, so concurrent requests never
+    # mix; outside one (scripts, tests) it installs a fresh counter.
+    stats = _current.get()
+    token = None
+    if stats is None:
+        stats = RequestStats()
+        token = _current.set(stats)
+    try:
+        yield QueryCount(stats)
+    finally:
+        if token is not None:
+            _current.reset(token)
+
+
+def record_query(seconds: float):
+    db_queries_total.inc()
+    db_query_seconds_total.inc(seconds)
+    stats = _current.get()
+    if stats is not None:
+        stats.queries += 1
+        stats.db_seconds += seconds
+
+
+def record_pool_wait(seconds: float):
+    pool_wait_seconds.observe(seconds)
+    stats = _current.get()
+    if stats is not None:
+        stats.pool_wait_seconds += seconds
+
+
+async def watch_event_loop_lag():
+    # Sleeps for a fixed interval and records how late it wakes up; anything
+    # blocking the loop (sync pandas, openpyxl, zlib calls) shows up as lag
+    while True:
+        started = time.perf_counter()
+        await asyncio.sleep(LOOP_LAG_INTERVAL)
+        lag = max(0.0, time.perf_counter() - started - LOOP_LAG_INTERVAL)
+        event_loop_lag.set(lag)
+        event_loop_lag_samples.observe(lag)
+
+
+def render(extra_lines: List[str] = ()) -> str:
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    lines.extend(extra_lines)
+    return "\n".join(lines) + "\n"
+
+
+# Pure ASGI middleware: unlike @app.middleware("http") it does not wrap the
+# response body, so streaming exports are timed to their last byte
+class MetricsMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats()
+        token = _current.set(stats)
+        status = [500]
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+                if settings.DEBUG:
+                    # Statements run after the headers went out (streamed bodies) are not included
+                    message.setdefault("headers", [])
+                    message["headers"] = list(message["headers"]) + [(b"x-db-queries", str(stats.queries).encode())]
+            await send(message)
+
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            _current.reset(token)
+            route = scope.get("route")
+            path = route.path if route is not None else "unmatched"
+            method = scope["method"]
+            request_duration.observe(elapsed, (method, path, str(status[0])))
+            request_db_queries.observe(stats.queries, (method, path))
+            request_db_seconds.observe(stats.db_seconds, (method, path))
+            request_pool_wait_seconds.observe(stats.pool_wait_seconds, (method, path))
@@ -0,0 +1,42 @@
+from fastapi import Query
+from sqlalchemy import text
+from typing import Optional
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+
+# Keyset pagination parameters shared by every list endpoint
+class PageParams:
+    def __init__(
+        self,
+        limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+        after: Optional[str] = Query(None, description="next_cursor returned by the previous page"),
+    ):
+        self.limit = limit
+        self.after = after
+
+
+def keyset_query(columns: str, table: str, id_column: str, page: PageParams):
+    # Seek past the cursor on the id index instead of OFFSET, and fetch one
+    # extra row so we know whether another page exists
+    where = f"WHERE {id_column} > :after" if page.after else ""
+    query = text(f"""
+        SELECT {columns}
+        FROM {table}
+        {where}
+        ORDER BY {id_column}
+        LIMIT :limit
+    """)
+    params = {"limit": page.limit + 1}
+    if page.after:
+        params["after"] = page.after
+    return query, params
+
+
+def split_page(rows, page: PageParams, id_index: int = 0):
+    # Returns (rows for this page, next_cursor)
+    if len(rows) > page.limit:
+        rows = rows[:page.limit]
+        return rows, rows[-1][id_index]
+    return rows, None
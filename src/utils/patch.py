@@ -0,0 +1,65 @@
+from typing import Dict, Optional
+from fastapi import HTTPException
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+def etag(row_version: int) -> str:
+    return f'"{row_version}"'
+
+
+def parse_if_match(if_match: Optional[str]) -> Optional[int]:
+    # None or "*" means no precondition
+    if if_match is None or if_match.strip() == "*":
+        return None
+    value = if_match.strip()
+    if value.startswith("W/"):
+        value = value[2:]
+    try:
+        return int(value.strip('"'))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="If-Match must be an ETag returned by this API")
+
+
+async def patch_row(
+    db: AsyncSession,
+    table: str,
+    id_column: str,
+    row_id: str,
+    columns: Dict[str, str],
+    values: dict,
+    returning: str,
+    if_match: Optional[str],
+    not_found: str,
+):
+    # Partial update in one statement. `columns` maps updatable columns to their
+    # SQL type; a None (or, for text, empty) value keeps the stored one, as in
+    # bulk_update. `returning` must include row_version. With
+    # If-Match the row is only touched when row_version still matches. The
+    # outer join tells "no such row" (404) apart from "row changed" (412)
+    # without a separate read. row_version is bumped by a trigger
+    # (src/db/schema.py), so bulk updates and uploads move the ETag too.
+    assignments = ", ".join(
+        f"{column} = COALESCE(NULLIF(CAST(:{column} AS text), ''), {column})" if sql_type == "text"
+        else f"{column} = COALESCE(CAST(:{column} AS {sql_type}), {column})"
+        for column, sql_type in columns.items()
+    )
+    result = await db.execute(text(f"""
+        WITH updated AS (
+            UPDATE {table}
+            SET {assignments}
+            WHERE {id_column} = :row_id
+              AND (CAST(:expected AS bigint) IS NULL OR row_version = CAST(:expected AS bigint))
+            RETURNING {returning}
+        )
+        SELECT updated.*, existing.{id_column} IS NOT NULL AS found
+        FROM (SELECT 1) AS one
+        LEFT JOIN updated ON true
+        LEFT JOIN {table} existing ON existing.{id_column} = :row_id
+    """), {**{column: values.get(column) for column in columns}, "row_id": row_id, "expected": parse_if_match(if_match)})
+    row = result.one()
+    if not row.found:
+        raise HTTPException(status_code=404, detail=not_found)
+    if row.row_version is None:
+        raise HTTPException(status_code=412, detail="Precondition failed: the row was changed by someone else")
+    return row
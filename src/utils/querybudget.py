@@ -0,0 +1,24 @@
+import functools
+import logging
+from src.db import settings
+from src.utils.metrics import count_queries
+
+logger = logging.getLogger(__name__)
+
+
+def query_budget(max_queries: int):
+    # Route decorator: fails loudly in DEBUG (and therefore in tests) when a
+    # handler issues more statements than budgeted, and logs in production
+    def decorator(handler):
+        @functools.wraps(handler)
+        async def wrapper(*args, **kwargs):
+            with count_queries() as counter:
+                response = await handler(*args, **kwargs)
+            if counter.count > max_queries:
+                message = f"{handler.__name__} ran {counter.count} queries, budget is {max_queries}"
+                if settings.DEBUG:
+                    raise AssertionError(message)
+                logger.warning(message)
+            return response
+        return wrapper
+    return decorator
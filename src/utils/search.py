@@ -0,0 +1,94 @@
+import asyncio
+import time
+from bisect import bisect_left
+from typing import Dict, List, Optional
+from fastapi import HTTPException, Query
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+from src.utils.cache import CACHE_TTL_SECONDS, list_cache
+
+DEFAULT_SEARCH_LIMIT = 20
+MAX_SEARCH_LIMIT = 200
+
+
+class SearchParams:
+    def __init__(
+        self,
+        q: str = Query(..., min_length=1),
+        limit: int = Query(DEFAULT_SEARCH_LIMIT, ge=1, le=MAX_SEARCH_LIMIT),
+        mode: str = Query("db", description="db: trigram index, memory: in-process prefix index"),
+    ):
+        if mode not in ("db", "memory"):
+            raise HTTPException(status_code=400, detail="mode must be 'db' or 'memory'")
+        self.q = q.strip()
+        self.limit = limit
+        self.mode = mode
+
+
+async def trigram_search(db: AsyncSession, table: str, columns: str, search_columns: List[str], params: SearchParams):
+    # Prefix matches rank first, then trigram similarity. Both the % operator
+    # and ILIKE 'q%' are served by the gin_trgm_ops indexes from src/db/schema.py
+    matches = " OR ".join(f"{column} % :q OR {column} ILIKE :prefix" for column in search_columns)
+    prefix_hit = " OR ".join(f"{column} ILIKE :prefix" for column in search_columns)
+    score = ", ".join(f"COALESCE(similarity({column}, :q), 0)" for column in search_columns)
+    query = text(f"""
+        SELECT {columns}
+        FROM {table}
+        WHERE {matches}
+        ORDER BY ({prefix_hit}) DESC, GREATEST({score}) DESC
+        LIMIT :limit
+    """)
+    prefix = params.q.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+    result = await db.execute(query, {"q": params.q, "prefix": prefix, "limit": params.limit})
+    return result.fetchall()
+
+
+# Case-insensitive prefix lookups served from memory. Every searchable value
+# is kept in one sorted array of (lowercased value, row position); a lookup is
+# a binary search to the first key with the prefix followed by a short scan,
+# which gives trie-style prefix matching without a node per character.
+# Rebuilt from the table when the list cache version moves or the TTL expires.
+class PrefixIndex:
+    def __init__(self, table: str, columns: str, search_columns: List[str]):
+        self.table = table
+        self.columns = columns
+        self.search_columns = search_columns
+        self._rows: List = []
+        self._keys: List = []
+        self._version: Optional[int] = None
+        self._built_at = 0.0
+        self._lock = asyncio.Lock()
+
+    def _fresh(self) -> bool:
+        return self._version == list_cache.version(self.table) and time.monotonic() - self._built_at < CACHE_TTL_SECONDS
+
+    async def _build(self, db: AsyncSession):
+        version = list_cache.version(self.table)
+        result = await db.execute(text(f"SELECT {self.columns} FROM {self.table}"))
+        rows = result.fetchall()
+        mappings = [row._mapping for row in rows]
+        keys = []
+        for position, row in enumerate(mappings):
+            for column in self.search_columns:
+                value = row[column]
+                if value:
+                    keys.append((str(value).lower(), position))
+        keys.sort()
+        self._rows, self._keys, self._version, self._built_at = rows, keys, version, time.monotonic()
+
+    async def search(self, db: AsyncSession, params: SearchParams):
+        if not self._fresh():
+            async with self._lock:
+                if not self._fresh():
+                    await self._build(db)
+        prefix = params.q.lower()
+        found: Dict[int, None] = {}
+        keys = self._keys
+        index = bisect_left(keys, (prefix, -1))
+        while index < len(keys) and len(found) < params.limit:
+            key, position = keys[index]
+            if not key.startswith(prefix):
+                break
+            found.setdefault(position)
+            index += 1
+        return [self._rows[position] for position in found]
@@ -0,0 +1,49 @@
+import json
+from operator import itemgetter
+from typing import Callable, Dict, List, Optional
+
+try:
+    import orjson
+except ImportError:  # orjson is optional; json produces the same document, only slower
+    orjson = None
+
+
+def dumps(payload) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(payload, default=str)
+    return json.dumps(payload, separators=(",", ":"), default=str).encode()
+
+
+def _model_fields(model) -> List[str]:
+    fields = getattr(model, "model_fields", None)
+    return list(fields if fields is not None else model.__fields__)
+
+
+# Serializes list pages straight from DB rows. Keys follow the *Data model's
+# field order and values go through the same conversions the handler used to
+# apply, so the document matches the one built from per-row models, without
+# constructing and validating a model per row.
+class RowEncoder:
+    def __init__(self, model, columns: str, converters: Optional[Dict[str, Callable]] = None):
+        positions = {name.strip(): index for index, name in enumerate(columns.split(","))}
+        self.keys = _model_fields(model)
+        self._values = itemgetter(*(positions[key] for key in self.keys))
+        self._converters = [
+            (index, converters[key]) for index, key in enumerate(self.keys) if converters and key in converters
+        ]
+
+    def rows(self, rows) -> List[dict]:
+        keys, values = self.keys, self._values
+        if not self._converters:
+            return [dict(zip(keys, values(row))) for row in rows]
+        encoded = []
+        for row in rows:
+            row_values = list(values(row))
+            for index, convert in self._converters:
+                row_values[index] = convert(row_values[index])
+            encoded.append(dict(zip(keys, row_values)))
+        return encoded
+
+    def page(self, rows, next_cursor: Optional[str], message: str = "success") -> bytes:
+        # Same key order as PageResponse subclasses: message, next_cursor, data
+        return dumps({"message": message, "next_cursor": next_cursor, "data": self.rows(rows)})
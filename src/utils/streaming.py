@@ -0,0 +1,70 @@
+import csv
+import io
+from typing import Optional
+from fastapi import Request
+from fastapi.responses import StreamingResponse
+from sqlalchemy import text
+from src.db.database import SessionLocal
+from src.utils.pagination import PageParams
+from src.utils.serialization import dumps
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+CSV_MEDIA_TYPE = "text/csv"
+STREAM_CHUNK_ROWS = 1000
+
+
+def streaming_media_type(request: Request) -> Optional[str]:
+    # Full-table streaming is opt-in through the Accept header
+    accept = request.headers.get("accept", "")
+    for media_type in (NDJSON_MEDIA_TYPE, CSV_MEDIA_TYPE):
+        if media_type in accept:
+            return media_type
+    return None
+
+
+def _encode_ndjson(columns, rows) -> bytes:
+    return b"".join(dumps(dict(zip(columns, row))) + b"\n" for row in rows)
+
+
+def encode_csv(rows) -> bytes:
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(rows)
+    return buffer.getvalue().encode()
+
+
+async def stream_partitions(query, params=None, chunk_rows: int = STREAM_CHUNK_ROWS):
+    # Yields lists of rows from a server-side cursor. The generator owns its
+    # session: the request-scoped one may already be closed by the time the
+    # response body is sent
+    async with SessionLocal() as session:
+        result = await session.stream(query, params or {}, execution_options={"yield_per": chunk_rows})
+        async for rows in result.partitions(chunk_rows):
+            yield rows
+
+
+async def _stream_rows(query, params, columns, media_type):
+    if media_type == CSV_MEDIA_TYPE:
+        yield encode_csv([columns])
+    async for rows in stream_partitions(query, params):
+        if media_type == CSV_MEDIA_TYPE:
+            yield encode_csv(rows)
+        else:
+            yield _encode_ndjson(columns, rows)
+
+
+def stream_table(columns: str, table: str, id_column: str, page: PageParams, media_type: str) -> StreamingResponse:
+    # Streams every row after the optional `after` cursor through a
+    # server-side cursor; `limit` does not apply to streamed responses
+    where = f"WHERE {id_column} > :after" if page.after else ""
+    query = text(f"""
+        SELECT {columns}
+        FROM {table}
+        {where}
+        ORDER BY {id_column}
+    """)
+    params = {"after": page.after} if page.after else {}
+    column_names = [column.strip() for column in columns.split(",")]
+    headers = {}
+    if media_type == CSV_MEDIA_TYPE:
+        headers["Content-Disposition"] = f"attachment; filename={table}.csv"
+    return StreamingResponse(_stream_rows(query, params, column_names, media_type), media_type=media_type, headers=headers)
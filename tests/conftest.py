@@ -0,0 +1,59 @@
+import os
+from contextlib import contextmanager
+import pytest
+
+# Tests that need Postgres run against TEST_DATABASE_URL, a disposable
+# database that already has the catalog tables (e.g. after benchmarks.seed).
+# They create rows under unique names and leave them behind. Without it they
+# are skipped, as they are when the server's own dependencies are missing.
+TEST_WORKERS = int(os.getenv("TEST_WORKERS", "4"))
+TEST_PORT = int(os.getenv("TEST_PORT", "8766"))
+
+
+@pytest.fixture(scope="session")
+def database_url():
+    url = os.getenv("TEST_DATABASE_URL")
+    if not url:
+        pytest.skip("TEST_DATABASE_URL is not set")
+    return url
+
+
+@pytest.fixture(scope="session")
+def server(database_url):
+    for module in ("fastapi", "uvicorn", "httpx", "sqlalchemy", "asyncpg"):
+        pytest.importorskip(module)
+    from benchmarks.server import Server
+
+    # Several workers, so id allocation and duplicate checks race across
+    # processes as in production. DEBUG turns query budget overruns into 500s
+    # and adds the X-DB-Queries header.
+    with Server(database_url, port=TEST_PORT, workers=TEST_WORKERS, env={"DEBUG": "true"}) as running:
+        yield running
+
+
+@pytest.fixture
+def max_queries():
+    # In-process budget: fails the test when the block runs more statements
+    #
+    #   with max_queries(2):
+    #       await handler(...)
+    from src.utils.metrics import count_queries
+
+    @contextmanager
+    def check(budget: int):
+        with count_queries() as counter:
+            yield counter
+        assert counter.count <= budget, f"ran {counter.count} queries, budget is {budget}"
+    return check
+
+
+@pytest.fixture
+def response_queries():
+    # Budget for a response from the DEBUG test server, read off X-DB-Queries
+    def check(response, budget: int):
+        request = f"{response.request.method} {response.request.url.path}"
+        assert response.status_code == 200, f"{request}: {response.status_code} {response.text}"
+        queries = int(response.headers["x-db-queries"])
+        assert queries <= budget, f"{request} ran {queries} queries, budget is {budget}"
+        return queries
+    return check
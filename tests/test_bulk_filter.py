@@ -0,0 +1,73 @@
+import uuid
+import pytest
+
+COLUMNS = {"noun": "text", "abbreviation": "text", "isactive": "boolean"}
+
+
+@pytest.fixture
+def filter_clause():
+    pytest.importorskip("fastapi")
+    pytest.importorskip("sqlalchemy")
+    from src.utils.bulkops import _filter_clause
+    return _filter_clause
+
+
+def test_ids_and_filters_are_anded(filter_clause):
+    condition, params = filter_clause("noun_id", COLUMNS, ["N_0001", "N_0001"], {"abbreviation": ["A", "B"], "isactive": True})
+    assert condition == (
+        "noun_id = ANY(CAST(:ids AS text[])) AND abbreviation = ANY(CAST(:f0 AS text[]))"
+        " AND isactive = ANY(CAST(:f1 AS boolean[]))"
+    )
+    assert params == {"ids": ["N_0001"], "f0": ["A", "B"], "f1": [True]}
+
+
+@pytest.mark.parametrize("ids, where", [
+    (None, {}),
+    (None, {"description": "x"}),
+    (None, {"abbreviation": []}),
+    (None, {"isactive": "false"}),
+    (None, {"noun": 1}),
+    (None, {"noun": True}),
+])
+def test_rejected_filters(filter_clause, ids, where):
+    from fastapi import HTTPException
+
+    with pytest.raises(HTTPException) as raised:
+        filter_clause("noun_id", COLUMNS, ids, where)
+    assert raised.value.status_code == 400
+
+
+def test_empty_id_list_matches_nothing(filter_clause):
+    condition, params = filter_clause("noun_id", COLUMNS, [], {})
+    assert condition == "noun_id = ANY(CAST(:ids AS text[]))"
+    assert params == {"ids": []}
+
+
+def _filter(client, **entry):
+    response = client.post("/Noun/bulk/filter", json=entry)
+    assert response.status_code == 200, response.text
+    body = response.json()
+    return body["matched"], body["affected"]
+
+
+def test_dry_run_counts_match_the_real_run(server):
+    import httpx
+
+    name = f"Filter {uuid.uuid4().hex[:8]}"
+    with httpx.Client(base_url=server.base_url, timeout=30) as client:
+        response = client.post("/Noun/bulk", json=[
+            {"noun": f"{name} {i}", "abbreviation": name, "description": "filter", "isactive": True} for i in range(3)
+        ])
+        assert response.status_code == 200, response.text
+        ids = [result["id"] for result in response.json()["results"]]
+        assert _filter(client, action="deactivate", ids=ids[:1]) == (1, 1)
+
+        # One of the three is already inactive
+        assert _filter(client, action="deactivate", where={"abbreviation": name}, dry_run=True) == (3, 2)
+        assert _filter(client, action="deactivate", where={"abbreviation": name}, dry_run=True) == (3, 2)
+        assert _filter(client, action="deactivate", where={"abbreviation": name}) == (3, 2)
+        assert _filter(client, action="deactivate", where={"abbreviation": name}) == (3, 0)
+
+        assert _filter(client, action="delete", ids=ids, dry_run=True) == (3, 3)
+        assert _filter(client, action="delete", ids=ids) == (3, 3)
+        assert _filter(client, action="delete", ids=ids, dry_run=True) == (0, 0)
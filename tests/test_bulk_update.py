@@ -0,0 +1,24 @@
+import uuid
+
+
+def test_rename_onto_an_existing_name_fails_only_that_item(server):
+    import httpx
+
+    name = f"Rename {uuid.uuid4().hex[:8]}"
+    with httpx.Client(base_url=server.base_url, timeout=30) as client:
+        response = client.post("/Noun/bulk", json=[
+            {"noun": f"{name} {i}", "abbreviation": "REN", "description": "rename", "isactive": True} for i in range(3)
+        ])
+        assert response.status_code == 200, response.text
+        ids = [result["id"] for result in response.json()["results"]]
+
+        response = client.put("/Noun/bulk", json=[
+            {"noun_id": ids[1], "noun": f" {name.upper()} 0"},
+            {"noun_id": ids[2], "noun": f"{name} renamed"},
+            {"noun_id": ids[0], "description": "kept"},
+        ])
+
+    assert response.status_code == 200, response.text
+    results = response.json()["results"]
+    assert [result["status"] for result in results] == ["error", "updated", "updated"]
+    assert results[0]["error"] == "noun already exists"
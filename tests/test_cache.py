@@ -0,0 +1,35 @@
+from types import SimpleNamespace
+import pytest
+
+pytest.importorskip("fastapi")
+sqlalchemy = pytest.importorskip("sqlalchemy")
+from sqlalchemy.orm import Session
+from src.utils.cache import bump_after_commit, list_cache
+
+
+@pytest.fixture
+def session():
+    engine = sqlalchemy.create_engine("sqlite://")
+    with Session(engine) as session:
+        yield session
+    engine.dispose()
+
+
+def test_bump_waits_for_commit(session):
+    version = list_cache.version("cache_test")
+    session.execute(sqlalchemy.text("SELECT 1"))
+    bump_after_commit(SimpleNamespace(sync_session=session), "cache_test")
+    # A GET running now must not see a version the uncommitted rows belong to
+    assert list_cache.version("cache_test") == version
+    session.commit()
+    assert list_cache.version("cache_test") == version + 1
+
+
+def test_rollback_drops_pending_bumps(session):
+    version = list_cache.version("cache_test")
+    session.execute(sqlalchemy.text("SELECT 1"))
+    bump_after_commit(SimpleNamespace(sync_session=session), "cache_test")
+    session.rollback()
+    session.execute(sqlalchemy.text("SELECT 1"))
+    session.commit()
+    assert list_cache.version("cache_test") == version
@@ -0,0 +1,69 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from src.utils.dedupe import find_duplicates, normalize
+
+
+def _member_sets(result):
+    return [set(cluster["members"]) for cluster in result["clusters"]]
+
+
+@pytest.mark.parametrize("names", [[], ["a"], ["abc", "abd"], ["", None], ["M10", "M12", "BOLT"]])
+def test_inputs_without_typo_keys_do_not_crash(names):
+    result = find_duplicates(names)
+    assert result["stats"]["rows"] == len(names)
+    assert isinstance(result["clusters"], list)
+
+
+def test_empty_input():
+    assert find_duplicates([]) == {
+        "clusters": [],
+        "stats": {"rows": 0, "candidate_pairs": 0, "accepted_pairs": 0, "clusters": 0},
+    }
+
+
+def test_single_name_has_no_cluster():
+    assert find_duplicates(["BALL VALVE"])["clusters"] == []
+
+
+def test_short_names_are_not_paired_by_typo():
+    # Below TYPO_MIN_LENGTH, one letter apart is a different name
+    assert find_duplicates(["abc", "abd"])["clusters"] == []
+
+
+def test_case_spacing_and_word_order():
+    result = find_duplicates(["Ball Valve", "valve ball", " BALL  VALVE ", "Gate Valve"])
+    assert _member_sets(result) == [{0, 1, 2}]
+    reasons = {pair[3] for pair in result["clusters"][0]["pairs"]}
+    assert reasons == {"normalized", "token_order"}
+
+
+def test_typo():
+    result = find_duplicates(["BEARING", "BEARNIG", "GASKET"])
+    assert _member_sets(result) == [{0, 1}]
+
+
+def test_abbreviation():
+    result = find_duplicates(["BEARING", "BRG", "PUMP"], abbreviations=["BRG", None, None])
+    assert _member_sets(result) == [{0, 1}]
+    assert result["clusters"][0]["pairs"][0][3] == "abbreviation"
+
+
+def test_different_numbers_are_never_paired():
+    assert find_duplicates(["BOLT M10", "BOLT M12", "bolt m10"])["clusters"] == [
+        {"members": [0, 2], "score": 1.0, "pairs": [(0, 2, 1.0, "normalized")]}
+    ]
+
+
+def test_pairs_and_scores_are_consistent():
+    result = find_duplicates(["HEX BOLT", "hex-bolt", "HEX BOLT ZINC", "NUT"])
+    for cluster in result["clusters"]:
+        assert cluster["score"] == min(pair[2] for pair in cluster["pairs"])
+        for first, second, score, _ in cluster["pairs"]:
+            assert first < second and first in cluster["members"] and second in cluster["members"]
+
+
+def test_normalize():
+    assert normalize("  Hex-Bolt, M10 ") == "hex bolt m10"
+    assert normalize(None) == ""
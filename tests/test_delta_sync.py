@@ -0,0 +1,37 @@
+import uuid
+
+
+def test_full_sync_is_paged_and_hands_out_the_token_last(server):
+    import httpx
+
+    with httpx.Client(base_url=server.base_url, timeout=30) as client:
+        params, pages, ids = {"since": "0", "limit": 50}, [], []
+        while True:
+            response = client.get("/Noun/", params=params)
+            assert response.status_code == 200, response.text
+            body = response.json()
+            pages.append(body)
+            ids += [row["noun_id"] for row in body["data"]]
+            if body["next_cursor"] is None:
+                break
+            assert body["next_since"] is None
+            params["after"] = body["next_cursor"]
+
+        assert all(len(page["data"]) <= 50 for page in pages)
+        assert len(ids) == len(set(ids))
+        token = pages[-1]["next_since"]
+        assert token is not None
+
+        name = f"Delta {uuid.uuid4().hex[:8]}"
+        created = client.post("/Noun/Noun", json={"noun": name, "abbreviation": "DEL", "description": "delta", "isactive": True})
+        assert created.status_code == 200, created.text
+        delta = client.get("/Noun/", params={"since": token}).json()
+        assert name in [row["noun"] for row in delta["data"]]
+
+
+def test_malformed_tokens_are_rejected(server):
+    import httpx
+
+    with httpx.Client(base_url=server.base_url, timeout=30) as client:
+        assert client.get("/Noun/", params={"since": "yesterday"}).status_code == 400
+        assert client.get("/Noun/", params={"since": "0", "after": "N_0001"}).status_code == 400
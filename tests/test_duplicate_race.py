@@ -0,0 +1,17 @@
+import asyncio
+from collections import Counter
+
+REQUESTS = 100
+
+
+def test_concurrent_creates_keep_one_row_per_name(server, database_url):
+    from benchmarks.duplicate_race import count_rows, race
+
+    report = asyncio.run(race(server.base_url, REQUESTS))
+    asyncio.run(count_rows(database_url, report))
+    for label, entry in report.items():
+        statuses = Counter(entry["statuses"])
+        assert entry["rows"] == 1, f"{label}: {entry['rows']} rows for {entry['name']}"
+        assert statuses[200] == 1, f"{label}: {dict(statuses)}"
+        # Every other request is a reported duplicate, never a server error
+        assert statuses[400] == REQUESTS - 1, f"{label}: {dict(statuses)}"
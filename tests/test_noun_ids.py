@@ -0,0 +1,40 @@
+import asyncio
+import re
+import uuid
+
+REQUESTS = 200
+
+
+async def _create_nouns(base_url: str, name: str):
+    import httpx
+
+    limits = httpx.Limits(max_connections=REQUESTS)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+        return await asyncio.gather(*(
+            client.post("/Noun/Noun", json={"noun": f"{name} {i}", "abbreviation": "PAR", "description": "parallel", "isactive": True})
+            for i in range(REQUESTS)
+        ))
+
+
+async def _count_nouns(database_url: str, name: str) -> int:
+    from sqlalchemy import text
+    from sqlalchemy.ext.asyncio import create_async_engine
+
+    engine = create_async_engine(database_url)
+    async with engine.connect() as conn:
+        result = await conn.execute(text("SELECT count(*) FROM noun_mstr WHERE noun LIKE :pattern"), {"pattern": f"{name} %"})
+        count = result.scalar()
+    await engine.dispose()
+    return count
+
+
+def test_parallel_noun_creates_get_distinct_ids(server, database_url):
+    name = f"Parallel {uuid.uuid4().hex[:8]}"
+    responses = asyncio.run(_create_nouns(server.base_url, name))
+
+    assert [response.status_code for response in responses] == [200] * REQUESTS
+    ids = [response.json()["data"][0]["noun_id"] for response in responses]
+    # Every worker serves its own sequence blocks, so no two creates share an id
+    assert len(set(ids)) == REQUESTS
+    assert all(re.fullmatch(r"N_\d{4,}", noun_id) for noun_id in ids)
+    assert asyncio.run(_count_nouns(database_url, name)) == REQUESTS
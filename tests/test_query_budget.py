@@ -0,0 +1,69 @@
+import asyncio
+import logging
+import uuid
+import pytest
+from src.db import settings
+from src.utils import metrics
+from src.utils.querybudget import query_budget
+
+# (method, path, body, budget); the budgets match the routes' @query_budget
+ENDPOINTS = [
+    ("GET", "/Noun/", None, 2),
+    ("GET", "/Modifier/Modifier", None, 2),
+    ("GET", "/NounModifier/NounModifier", None, 2),
+    ("GET", "/Attributename/Attribute", None, 2),
+    ("GET", "/Attributevalue/attribute_values", None, 2),
+    ("GET", "/Manufacure/manufacturers", None, 2),
+    ("GET", "/catalog/NM_0001", None, 4),
+    ("GET", "/catalog/NM_0001/short-description", None, 1),
+    ("POST", "/Noun/Noun", lambda: {"noun": f"Budget {uuid.uuid4().hex[:8]}", "abbreviation": "BUD", "description": "budget", "isactive": True}, 3),
+]
+
+
+def _handler(queries: int):
+    async def handler():
+        for _ in range(queries):
+            metrics.record_query(0.0)
+        return "ok"
+    return handler
+
+
+def test_within_budget_returns_response(monkeypatch):
+    monkeypatch.setattr(settings, "DEBUG", True)
+    assert asyncio.run(query_budget(2)(_handler(2))()) == "ok"
+
+
+def test_over_budget_fails_in_debug(monkeypatch):
+    monkeypatch.setattr(settings, "DEBUG", True)
+    with pytest.raises(AssertionError, match="ran 3 queries, budget is 2"):
+        asyncio.run(query_budget(2)(_handler(3))())
+
+
+def test_over_budget_logs_in_production(monkeypatch, caplog):
+    monkeypatch.setattr(settings, "DEBUG", False)
+    with caplog.at_level(logging.WARNING, logger="src.utils.querybudget"):
+        assert asyncio.run(query_budget(2)(_handler(3))()) == "ok"
+    assert "ran 3 queries, budget is 2" in caplog.text
+
+
+def test_untracked_queries_do_not_count(max_queries):
+    with max_queries(1) as counter:
+        metrics.record_query(0.0)
+        with metrics.untracked():
+            metrics.record_query(0.0)
+    assert counter.count == 1
+
+
+def test_max_queries_fixture_fails_over_budget(max_queries):
+    with pytest.raises(AssertionError, match="ran 2 queries, budget is 1"):
+        with max_queries(1):
+            metrics.record_query(0.0)
+            metrics.record_query(0.0)
+
+
+@pytest.mark.parametrize("method, path, body, budget", ENDPOINTS, ids=[f"{m} {p}" for m, p, _, _ in ENDPOINTS])
+def test_endpoint_query_budget(server, response_queries, method, path, body, budget):
+    import httpx
+
+    response = httpx.request(method, server.base_url + path, json=body() if body else None, timeout=30)
+    response_queries(response, budget)
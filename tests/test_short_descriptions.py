@@ -0,0 +1,49 @@
+import asyncio
+import uuid
+
+NOUNMODIFIER_ID = "NM_0001"
+
+INSERT_VALUE = """
+    INSERT INTO attribute_value_master (attribute_value_id, attribute_value, attribute_value_desc, remarks, isactive, nounmodifier_id, attribute_value_abbr)
+    VALUES (:id, :value, 'short description test', '', true, :nounmodifier_id, :value)
+"""
+STORED = "SELECT description, full_length FROM short_descriptions WHERE nounmodifier_id = :nounmodifier_id"
+
+
+async def _concurrent_value_inserts(database_url: str):
+    from sqlalchemy import text
+    from sqlalchemy.ext.asyncio import create_async_engine
+
+    engine = create_async_engine(database_url)
+    suffix = uuid.uuid4().hex[:8].upper()
+    ids = [f"ATRV_T{suffix}A", f"ATRV_T{suffix}B"]
+    try:
+        async with engine.connect() as first, engine.connect() as second:
+            await first.execute(text(INSERT_VALUE), {"id": ids[0], "value": f"A{suffix}", "nounmodifier_id": NOUNMODIFIER_ID})
+            blocked = asyncio.create_task(
+                second.execute(text(INSERT_VALUE), {"id": ids[1], "value": f"B{suffix}", "nounmodifier_id": NOUNMODIFIER_ID})
+            )
+            await asyncio.sleep(0.5)
+            # The second rebuild waits for the first transaction's lock on the noun-modifier
+            waited = not blocked.done()
+            await first.commit()
+            await blocked
+            await second.commit()
+
+        async with engine.connect() as conn:
+            stored = (await conn.execute(text(STORED), {"nounmodifier_id": NOUNMODIFIER_ID})).one()
+            await conn.execute(text("SELECT rebuild_short_descriptions(ARRAY[CAST(:nounmodifier_id AS text)])"), {"nounmodifier_id": NOUNMODIFIER_ID})
+            rebuilt = (await conn.execute(text(STORED), {"nounmodifier_id": NOUNMODIFIER_ID})).one()
+            await conn.rollback()
+        return waited, tuple(stored), tuple(rebuilt)
+    finally:
+        async with engine.begin() as conn:
+            await conn.execute(text("DELETE FROM attribute_value_master WHERE attribute_value_id = ANY(CAST(:ids AS text[]))"), {"ids": ids})
+        await engine.dispose()
+
+
+def test_concurrent_value_inserts_keep_both_in_description(server, database_url):
+    waited, stored, rebuilt = asyncio.run(_concurrent_value_inserts(database_url))
+    assert waited
+    # Without the lock the later commit stores a description missing the other value
+    assert stored == rebuilt
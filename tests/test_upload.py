@@ -0,0 +1,93 @@
+import asyncio
+import io
+import time
+import uuid
+import pytest
+
+JOB_TIMEOUT_SECONDS = 60
+
+
+def _sheet(columns, rows) -> bytes:
+    import openpyxl
+
+    workbook = openpyxl.Workbook()
+    sheet = workbook.active
+    sheet.append(columns)
+    for row in rows:
+        sheet.append(row)
+    buffer = io.BytesIO()
+    workbook.save(buffer)
+    return buffer.getvalue()
+
+
+def _upload(client, path: str, content: bytes) -> dict:
+    files = {"file": ("upload.xlsx", content, "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")}
+    response = client.post(path, files=files)
+    assert response.status_code == 202, response.text
+    status_url = response.json()["status_url"]
+    deadline = time.monotonic() + JOB_TIMEOUT_SECONDS
+    while time.monotonic() < deadline:
+        job = client.get(status_url).json()
+        if job["status"] in ("succeeded", "failed"):
+            return job
+        time.sleep(0.2)
+    raise AssertionError(f"{status_url} did not finish in {JOB_TIMEOUT_SECONDS}s")
+
+
+async def _count(database_url: str, table: str, condition: str, params: dict) -> int:
+    from sqlalchemy import text
+    from sqlalchemy.ext.asyncio import create_async_engine
+
+    engine = create_async_engine(database_url)
+    async with engine.connect() as conn:
+        count = (await conn.execute(text(f"SELECT count(*) FROM {table} WHERE {condition}"), params)).scalar()
+    await engine.dispose()
+    return count
+
+
+def test_upload_updates_case_variants_of_an_existing_modifier(server, database_url):
+    import httpx
+
+    pytest.importorskip("openpyxl")
+    name = f"Upload {uuid.uuid4().hex[:8]}"
+    with httpx.Client(base_url=server.base_url, timeout=30) as client:
+        created = client.post("/Modifier/Modifier", json={"modifier": name, "abbreviation": "UP", "description": "upload", "isactive": True, "message": ""})
+        assert created.status_code == 200, created.text
+
+        # Both rows are the existing modifier once trimmed and case-folded; the last one wins
+        job = _upload(client, "/Modifier/upload-excel", _sheet(
+            ["modifier", "abbreviation"], [[name.lower(), "LOW"], [f" {name.upper()} ", "UPP"]]
+        ))
+
+    assert job["status"] == "succeeded", job
+    assert (job["inserted"], job["updated"], job["skipped"], job["failed"]) == (0, 1, 1, 0)
+    assert asyncio.run(_count(database_url, "modifier_mstr", "lower(btrim(modifier)) = lower(:name)", {"name": name})) == 1
+    assert asyncio.run(_count(database_url, "modifier_mstr", "lower(btrim(modifier)) = lower(:name) AND abbreviation = 'UPP'", {"name": name})) == 1
+
+
+def test_upload_matches_noun_modifier_pairs_case_insensitively(server, database_url):
+    import httpx
+
+    pytest.importorskip("openpyxl")
+    suffix = uuid.uuid4().hex[:8]
+    noun, modifier, other = f"Noun {suffix}", f"Modifier {suffix}", f"Other {suffix}"
+    with httpx.Client(base_url=server.base_url, timeout=30) as client:
+        for name in (modifier, other):
+            pair = {"noun": noun, "modifier": name, "abbreviation": "", "description": "before", "isactive": True}
+            created = client.post("/NounModifier/NounModifier", params={"create_missing": "true"}, json=pair)
+            assert created.status_code == 200, created.text
+        # Drop the second combination again so the sheet can create it with other spelling
+        assert client.post("/NounModifier/bulk/filter", json={"action": "delete", "where": {"modifier": other}}).json()["affected"] == 1
+
+        job = _upload(client, "/NounModifier/upload-excel", _sheet(
+            ["noun", "modifier", "description"],
+            [[noun.upper(), f"  {modifier.lower()}", "after"], [noun.lower(), other.upper(), "new"]],
+        ))
+
+    assert job["status"] == "succeeded", job
+    assert (job["inserted"], job["updated"], job["failed"]) == (1, 1, 0)
+    pairs = "lower(btrim(noun)) = lower(:noun) AND lower(btrim(modifier)) = lower(:modifier)"
+    assert asyncio.run(_count(database_url, "nounmodifier_combined", f"{pairs} AND description = 'after'", {"noun": noun, "modifier": modifier})) == 1
+    assert asyncio.run(_count(database_url, "nounmodifier_combined", pairs, {"noun": noun, "modifier": modifier})) == 1
+    # A new combination stores the master rows' spelling, not the sheet's
+    assert asyncio.run(_count(database_url, "nounmodifier_combined", "noun = :noun AND modifier = :modifier", {"noun": noun, "modifier": other})) == 1